@@ -0,0 +1,2 @@
+from .response_cache import response_cache
+from .single_flight import single_flight
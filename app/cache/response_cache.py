@@ -0,0 +1,193 @@
+"""
+Response cache for /chat with an exact tier and an optional semantic tier.
+Entries expire after a TTL, the least recently used entry is evicted when the
+cache is full, and everything is invalidated when a reload swaps in new retrieval
+indexes. Responses generated from a replaced snapshot are not stored.
+"""
+
+import hashlib
+import re
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from app.config.config import (
+    RESPONSE_CACHE_ENABLED,
+    RESPONSE_CACHE_MAX_SIZE,
+    RESPONSE_CACHE_TTL,
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_THRESHOLD,
+)
+from app.llm.embedding_batcher import embedding_batcher
+from app.vector_store.vector_store import get_stores
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    message = re.sub(r"\s+", " ", message.strip().lower())
+    return message.rstrip("?!. ")
+
+
+class CacheEntry:
+    def __init__(self, response: str, sources: list, use_context: bool, embedding=None):
+        self.response = response
+        self.sources = sources
+        self.use_context = use_context
+        self.embedding = embedding
+        self.created_at = time.time()
+
+
+class ResponseCache:
+    """LRU + TTL cache of chat responses keyed on the normalized message and options."""
+
+    def __init__(
+        self,
+        enabled: bool = RESPONSE_CACHE_ENABLED,
+        max_size: int = RESPONSE_CACHE_MAX_SIZE,
+        ttl: float = RESPONSE_CACHE_TTL,
+        semantic_enabled: bool = SEMANTIC_CACHE_ENABLED,
+        semantic_threshold: float = SEMANTIC_CACHE_THRESHOLD,
+    ):
+        self.enabled = enabled
+        self.max_size = max_size
+        self.ttl = ttl
+        self.semantic_enabled = semantic_enabled
+        self.semantic_threshold = semantic_threshold
+        self.entries = OrderedDict()
+        self.fingerprint = get_stores().version
+        self.metrics = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+            "stale_responses": 0,
+        }
+
+    def _check_fingerprint(self):
+        """Drop every entry when a reload has swapped in new retrieval indexes."""
+        fingerprint = get_stores().version
+        if fingerprint != self.fingerprint:
+            if self.entries:
+                print(f"♻️  Response cache invalidated ({len(self.entries)} entries): indexes reloaded")
+            self.entries.clear()
+            self.fingerprint = fingerprint
+            self.metrics["invalidations"] += 1
+
+    def make_key(self, message: str, use_context: bool) -> str:
+        raw = "\x00".join([normalize_message(message), str(use_context), self.fingerprint])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _is_expired(self, entry: CacheEntry) -> bool:
+        return self.ttl > 0 and time.time() - entry.created_at > self.ttl
+
+    def _purge_expired(self):
+        expired = [key for key, entry in self.entries.items() if self._is_expired(entry)]
+        for key in expired:
+            del self.entries[key]
+        self.metrics["expirations"] += len(expired)
+
+    async def get(self, message: str, use_context: bool, semantic: bool = True):
+        """Look up a cached response.
+
+        Returns:
+            Tuple of (entry or None, query embedding or None). The embedding is only
+            computed for semantic lookups and should be passed back to ``put``.
+        """
+        if not self.enabled:
+            return None, None
+        self._check_fingerprint()
+
+        key = self.make_key(message, use_context)
+        entry = self.entries.get(key)
+        if entry is not None:
+            if self._is_expired(entry):
+                del self.entries[key]
+                self.metrics["expirations"] += 1
+            else:
+                self.entries.move_to_end(key)
+                self.metrics["exact_hits"] += 1
+                return entry, None
+
+        query_embedding = None
+        if self.semantic_enabled and semantic:
+            try:
+                query_embedding = np.asarray(await embedding_batcher.embed(message), dtype=np.float32)
+                key, entry = self._find_semantic_match(query_embedding, use_context)
+                if entry is not None:
+                    self.entries.move_to_end(key)
+                    self.metrics["semantic_hits"] += 1
+                    return entry, query_embedding
+            except Exception as e:
+                print(f"Semantic cache lookup failed: {e}")
+
+        self.metrics["misses"] += 1
+        return None, query_embedding
+
+    def _find_semantic_match(self, query_embedding, use_context: bool):
+        self._purge_expired()
+        candidates = [
+            (key, entry)
+            for key, entry in self.entries.items()
+            if entry.embedding is not None and entry.use_context == use_context
+        ]
+        if not candidates:
+            return None, None
+        matrix = np.stack([entry.embedding for _, entry in candidates])
+        norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query_embedding) or 1.0)
+        similarities = matrix @ query_embedding / np.where(norms == 0, 1.0, norms)
+        best = int(np.argmax(similarities))
+        if similarities[best] >= self.semantic_threshold:
+            return candidates[best]
+        return None, None
+
+    def put(
+        self,
+        message: str,
+        use_context: bool,
+        response: str,
+        sources: list,
+        query_embedding=None,
+        index_version: str = None,
+    ):
+        """Store a response, evicting the least recently used entry when full.
+
+        ``index_version`` is the version of the retrieval snapshot the response was
+        generated from; it is not stored if a reload has replaced that snapshot since.
+        """
+        if not self.enabled or not response:
+            return
+        self._check_fingerprint()
+        if index_version is not None and index_version != self.fingerprint:
+            self.metrics["stale_responses"] += 1
+            return
+        key = self.make_key(message, use_context)
+        self.entries[key] = CacheEntry(response, sources, use_context, query_embedding)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.metrics["evictions"] += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.metrics["invalidations"] += 1
+
+    def stats(self) -> dict:
+        lookups = self.metrics["exact_hits"] + self.metrics["semantic_hits"] + self.metrics["misses"]
+        hits = self.metrics["exact_hits"] + self.metrics["semantic_hits"]
+        return {
+            "enabled": self.enabled,
+            "semantic_enabled": self.semantic_enabled,
+            "semantic_threshold": self.semantic_threshold,
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            **self.metrics,
+        }
+
+
+# Global instance
+response_cache = ResponseCache()
@@ -0,0 +1,116 @@
+"""
+Single-flight coalescing of identical in-flight chat requests.
+Concurrent requests with the same key share one retrieval and one generation;
+every waiter receives the sources and the streamed tokens of the shared run.
+"""
+
+import asyncio
+
+
+class Flight:
+    """A shared retrieval + generation whose results fan out to every waiter."""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.sources = None
+        self.tokens = []
+        self.done = False
+        self.error = None
+        self.waiters = 1
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def set_sources(self, sources: list):
+        self.sources = sources
+        self._notify()
+
+    def add_token(self, token: str):
+        self.tokens.append(token)
+        self._notify()
+
+    def finish(self, error: Exception = None):
+        self.error = error
+        self.done = True
+        self._notify()
+
+    @property
+    def response(self) -> str:
+        return "".join(self.tokens)
+
+    async def events(self):
+        """Yield ``("sources", list)`` then ``("token", str)`` events, replaying what was already produced."""
+        sent_sources = False
+        index = 0
+        while True:
+            changed = self._changed
+            if not sent_sources and self.sources is not None:
+                yield "sources", self.sources
+                sent_sources = True
+            while index < len(self.tokens):
+                yield "token", self.tokens[index]
+                index += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await changed.wait()
+
+    async def result(self):
+        """Wait for the shared run to finish and return (response, sources)."""
+        async for _ in self.events():
+            pass
+        return self.response, self.sources or []
+
+
+class SingleFlight:
+    """Registry of in-flight runs keyed by request identity."""
+
+    def __init__(self):
+        self.flights = {}
+        # Strong references so running flights are not garbage collected mid-run
+        self.tasks = set()
+        self.started = 0
+        self.coalesced = 0
+
+    def run(self, key: str, produce) -> Flight:
+        """Join the in-flight run for ``key`` or start ``produce(flight)`` as a new shared run.
+
+        The run executes as its own task, so it completes for the remaining waiters
+        even if the request that started it goes away.
+        """
+        flight = self.flights.get(key)
+        if flight is not None:
+            flight.waiters += 1
+            self.coalesced += 1
+            return flight
+
+        flight = Flight(key)
+        self.flights[key] = flight
+        self.started += 1
+        task = asyncio.create_task(self._execute(flight, produce))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return flight
+
+    async def _execute(self, flight: Flight, produce):
+        try:
+            await produce(flight)
+            flight.finish()
+        except Exception as e:
+            flight.finish(e)
+        finally:
+            self.flights.pop(flight.key, None)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self.flights),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
+
+
+# Global instance
+single_flight = SingleFlight()
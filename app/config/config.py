@@ -17,12 +17,53 @@ TEMPERATURE = float(os.getenv("TEMPERATURE", "0.7"))
 MAX_TOKENS = int(os.getenv("MAX_TOKENS", "1000"))
 CHROMA_PERSIST_DIRECTORY = os.getenv("VECTOR_STORE_PATH", "./data/vector_store")
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "nomic-embed-text")
+EMBEDDING_MISMATCH_POLICY = os.getenv("EMBEDDING_MISMATCH_POLICY", "refuse")  # refuse or warn
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")  # chroma or numpy
+NUMPY_INDEX_PATH = os.getenv("NUMPY_INDEX_PATH", os.path.join(CHROMA_PERSIST_DIRECTORY, "numpy_index"))
+NUMPY_INDEX_DTYPE = os.getenv("NUMPY_INDEX_DTYPE", "float32")  # float32, float16, int8 or binary
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")  # hybrid, vector or lexical
+LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", os.path.join(CHROMA_PERSIST_DIRECTORY, "lexical_index.json"))
+INGEST_MANIFEST_PATH = os.getenv(
+    "INGEST_MANIFEST_PATH", os.path.join(CHROMA_PERSIST_DIRECTORY, "ingest_manifest.json")
+)
+HYBRID_FETCH_K = int(os.getenv("HYBRID_FETCH_K", "10"))  # candidates per retriever before fusion
+CATEGORY_ROUTING = os.getenv("CATEGORY_ROUTING", "True").lower() == "true"
+ROUTER_MAX_PARTITIONS = int(os.getenv("ROUTER_MAX_PARTITIONS", "2"))
+INDEX_WATCH_INTERVAL = float(os.getenv("INDEX_WATCH_INTERVAL", "10"))  # 0 disables index hot reload polling
 API_TITLE = os.getenv("API_TITLE", "Simple Insurance Chatbot")
 API_VERSION = os.getenv("API_VERSION", "1.0.0")
 API_HOST = os.getenv("API_HOST", "0.0.0.0")
 API_PORT = int(os.getenv("API_PORT", "8000"))
 DEBUG = os.getenv("DEBUG", "False").lower() == "true"
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+OLLAMA_MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))
+OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "20"))
+OLLAMA_KEEPALIVE_EXPIRY = float(os.getenv("OLLAMA_KEEPALIVE_EXPIRY", "60"))
+OLLAMA_REQUEST_TIMEOUT = float(os.getenv("OLLAMA_REQUEST_TIMEOUT", "300"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "0"))  # 0 keeps all retrieved chunks
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "True").lower() == "true"
+EMBEDDING_CACHE_MEMORY_SIZE = int(os.getenv("EMBEDDING_CACHE_MEMORY_SIZE", "10000"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./data/embedding_cache/embeddings.sqlite3")
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32"))
+HEALTH_CHECK_INTERVAL = float(os.getenv("HEALTH_CHECK_INTERVAL", "30"))
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "True").lower() == "true"
+RESPONSE_CACHE_MAX_SIZE = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", "1000"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "False").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+EVAL_WORKERS = int(os.getenv("EVAL_WORKERS", "2"))
+EVAL_CONCURRENCY = int(os.getenv("EVAL_CONCURRENCY", "4"))  # questions answered / judged at once by run_evaluation
+EVAL_CACHE_PATH = os.getenv("EVAL_CACHE_PATH", "app/evaluation/evaluation_results/eval_cache.sqlite3")
+EVAL_CACHE_MODE = os.getenv("EVAL_CACHE_MODE", "read_write")  # read_write, read_only, refresh or off
+EVAL_JUDGE_MODEL = os.getenv("EVAL_JUDGE_MODEL", OLLAMA_MODEL)  # fixed judge so scores compare across models
+EVAL_MODEL_CONCURRENCY = int(os.getenv("EVAL_MODEL_CONCURRENCY", "2"))  # models evaluated at once by the matrix
+EVAL_QUEUE_MAX_SIZE = int(os.getenv("EVAL_QUEUE_MAX_SIZE", "100"))
+EVAL_QUEUE_POLICY = os.getenv("EVAL_QUEUE_POLICY", "drop_newest")  # drop_newest, drop_oldest or spill
+EVAL_DRAIN_TIMEOUT = float(os.getenv("EVAL_DRAIN_TIMEOUT", "30"))
+EVAL_SPILL_FILE = os.getenv("EVAL_SPILL_FILE", "app/evaluation/evaluation_results/eval_queue_spill.jsonl")
 
 from dataclasses import dataclass
 
@@ -35,12 +76,51 @@ class Config:
     MAX_TOKENS: int = MAX_TOKENS
     VECTOR_STORE_PATH: str = CHROMA_PERSIST_DIRECTORY
     EMBEDDING_MODEL: str = EMBEDDING_MODEL
+    EMBEDDING_MISMATCH_POLICY: str = EMBEDDING_MISMATCH_POLICY
+    VECTOR_BACKEND: str = VECTOR_BACKEND
+    NUMPY_INDEX_PATH: str = NUMPY_INDEX_PATH
+    NUMPY_INDEX_DTYPE: str = NUMPY_INDEX_DTYPE
+    RETRIEVAL_MODE: str = RETRIEVAL_MODE
+    LEXICAL_INDEX_PATH: str = LEXICAL_INDEX_PATH
+    INGEST_MANIFEST_PATH: str = INGEST_MANIFEST_PATH
+    HYBRID_FETCH_K: int = HYBRID_FETCH_K
+    CATEGORY_ROUTING: bool = CATEGORY_ROUTING
+    ROUTER_MAX_PARTITIONS: int = ROUTER_MAX_PARTITIONS
+    INDEX_WATCH_INTERVAL: float = INDEX_WATCH_INTERVAL
     API_TITLE: str = API_TITLE
     API_VERSION: str = API_VERSION
     API_HOST: str = API_HOST
     API_PORT: int = API_PORT
     DEBUG: bool = DEBUG
     LOG_LEVEL: str = LOG_LEVEL
+    OLLAMA_MAX_CONCURRENCY: int = OLLAMA_MAX_CONCURRENCY
+    OLLAMA_MAX_CONNECTIONS: int = OLLAMA_MAX_CONNECTIONS
+    OLLAMA_KEEPALIVE_EXPIRY: float = OLLAMA_KEEPALIVE_EXPIRY
+    OLLAMA_REQUEST_TIMEOUT: float = OLLAMA_REQUEST_TIMEOUT
+    CONTEXT_TOKEN_BUDGET: int = CONTEXT_TOKEN_BUDGET
+    EMBEDDING_CACHE_ENABLED: bool = EMBEDDING_CACHE_ENABLED
+    EMBEDDING_CACHE_MEMORY_SIZE: int = EMBEDDING_CACHE_MEMORY_SIZE
+    EMBEDDING_CACHE_PATH: str = EMBEDDING_CACHE_PATH
+    EMBEDDING_BATCH_WINDOW_MS: float = EMBEDDING_BATCH_WINDOW_MS
+    EMBEDDING_BATCH_MAX_SIZE: int = EMBEDDING_BATCH_MAX_SIZE
+    HEALTH_CHECK_INTERVAL: float = HEALTH_CHECK_INTERVAL
+    RESPONSE_CACHE_ENABLED: bool = RESPONSE_CACHE_ENABLED
+    RESPONSE_CACHE_MAX_SIZE: int = RESPONSE_CACHE_MAX_SIZE
+    RESPONSE_CACHE_TTL: float = RESPONSE_CACHE_TTL
+    SEMANTIC_CACHE_ENABLED: bool = SEMANTIC_CACHE_ENABLED
+    SEMANTIC_CACHE_THRESHOLD: float = SEMANTIC_CACHE_THRESHOLD
+    BATCH_MAX_ITEMS: int = BATCH_MAX_ITEMS
+    BATCH_MAX_CONCURRENCY: int = BATCH_MAX_CONCURRENCY
+    EVAL_WORKERS: int = EVAL_WORKERS
+    EVAL_CONCURRENCY: int = EVAL_CONCURRENCY
+    EVAL_CACHE_PATH: str = EVAL_CACHE_PATH
+    EVAL_CACHE_MODE: str = EVAL_CACHE_MODE
+    EVAL_JUDGE_MODEL: str = EVAL_JUDGE_MODEL
+    EVAL_MODEL_CONCURRENCY: int = EVAL_MODEL_CONCURRENCY
+    EVAL_QUEUE_MAX_SIZE: int = EVAL_QUEUE_MAX_SIZE
+    EVAL_QUEUE_POLICY: str = EVAL_QUEUE_POLICY
+    EVAL_DRAIN_TIMEOUT: float = EVAL_DRAIN_TIMEOUT
+    EVAL_SPILL_FILE: str = EVAL_SPILL_FILE
 
     def __post_init__(self):
         os.makedirs(os.path.dirname(self.VECTOR_STORE_PATH), exist_ok=True)
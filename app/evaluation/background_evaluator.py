@@ -0,0 +1,227 @@
+"""
+Background worker pool for production semantic evaluation.
+Chat requests enqueue (question, response) pairs and return immediately;
+workers drain the bounded queue off the request path.
+"""
+
+import asyncio
+import json
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+from app.config.config import (
+    EVAL_DRAIN_TIMEOUT,
+    EVAL_QUEUE_MAX_SIZE,
+    EVAL_QUEUE_POLICY,
+    EVAL_SPILL_FILE,
+    EVAL_WORKERS,
+)
+from app.evaluation.semantic_evaluator import evaluate_production_question
+
+OVERFLOW_POLICIES = ("drop_newest", "drop_oldest", "spill")
+
+
+class BackgroundEvaluator:
+    """Bounded queue of production evaluations drained by a pool of async workers.
+
+    When the queue is full the overflow policy decides what happens to new items:
+    ``drop_newest`` rejects them, ``drop_oldest`` evicts the oldest queued item and
+    ``spill`` appends them to a JSONL file that workers replay once there is room.
+    """
+
+    def __init__(
+        self,
+        evaluate_fn=evaluate_production_question,
+        max_queue_size: int = EVAL_QUEUE_MAX_SIZE,
+        num_workers: int = EVAL_WORKERS,
+        overflow_policy: str = EVAL_QUEUE_POLICY,
+        spill_file: str = EVAL_SPILL_FILE,
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow_policy}', expected one of {OVERFLOW_POLICIES}")
+        self.evaluate_fn = evaluate_fn
+        self.max_queue_size = max_queue_size
+        self.num_workers = num_workers
+        self.overflow_policy = overflow_policy
+        self.spill_file = Path(spill_file)
+
+        self.queue = None
+        self.workers = []
+        self.stopped = False
+        self._enqueue_times = deque()
+
+        self.enqueued = 0
+        self.processed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self.last_processed_at = None
+
+    async def start(self):
+        """Create the queue and start the worker pool."""
+        if not self.workers:
+            self._start_workers()
+
+    def _start_workers(self):
+        if self.queue is None:
+            self.queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self.stopped = False
+        self._replay_spilled()
+        self.workers = [asyncio.create_task(self._worker(i)) for i in range(self.num_workers)]
+        print(f"🧵 Started {self.num_workers} background evaluation workers (queue size {self.max_queue_size})")
+
+    async def stop(self, timeout: float = EVAL_DRAIN_TIMEOUT):
+        """Stop accepting work, drain the queue for up to ``timeout`` seconds, then stop the workers."""
+        if not self.workers:
+            return
+        self.stopped = True
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️  Evaluation queue not drained after {timeout}s, {self.queue.qsize()} items left")
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+        # Whatever is left is either persisted for the next start or lost
+        while not self.queue.empty():
+            self._discard(self._get_nowait())
+        print(
+            f"🛑 Background evaluation stopped "
+            f"(processed {self.processed}, dropped {self.dropped}, spilled {self.spilled})"
+        )
+
+    def submit(self, question: str, response: str) -> bool:
+        """Enqueue a (question, response) pair without waiting. Returns False if it was not queued."""
+        if self.stopped:
+            self.dropped += 1
+            return False
+        if not self.workers:
+            # Lazily start when used outside the application lifespan
+            self._start_workers()
+
+        item = {"question": question, "response": response, "enqueued_at": time.time()}
+        if not self.queue.full():
+            self._put(item)
+            return True
+
+        if self.overflow_policy == "drop_oldest":
+            self._get_nowait()
+            self.dropped += 1
+            self._put(item)
+            return True
+        if self.overflow_policy == "spill":
+            self._spill(item)
+            return True
+        self.dropped += 1
+        return False
+
+    def stats(self) -> dict:
+        """Return queue depth, lag and drop counters."""
+        depth = self.queue.qsize() if self.queue else 0
+        oldest_age = 0.0
+        if self._enqueue_times:
+            oldest_age = time.time() - self._enqueue_times[0]
+        completed = self.processed + self.failed
+        return {
+            "running": bool(self.workers),
+            "workers": self.num_workers,
+            "overflow_policy": self.overflow_policy,
+            "max_queue_size": self.max_queue_size,
+            "queue_depth": depth,
+            "oldest_item_age_seconds": oldest_age,
+            "last_lag_seconds": self.last_lag,
+            "max_lag_seconds": self.max_lag,
+            "avg_lag_seconds": self.total_lag / completed if completed else 0.0,
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "spill_file": str(self.spill_file),
+            "last_processed_at": self.last_processed_at,
+        }
+
+    def _put(self, item: dict):
+        self.queue.put_nowait(item)
+        self._enqueue_times.append(item["enqueued_at"])
+        self.enqueued += 1
+
+    def _get_nowait(self) -> dict:
+        item = self.queue.get_nowait()
+        self._enqueue_times.popleft()
+        self.queue.task_done()
+        return item
+
+    def _spill(self, item: dict):
+        self.spill_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.spill_file, "a") as f:
+            f.write(json.dumps(item) + "\n")
+        self.spilled += 1
+
+    def _discard(self, item: dict):
+        """Persist an unprocessed item under the spill policy, otherwise count it as dropped."""
+        if self.overflow_policy == "spill":
+            self._spill(item)
+        else:
+            self.dropped += 1
+
+    def _replay_spilled(self):
+        """Move spilled items back into the queue while there is free capacity."""
+        if not self.spill_file.exists():
+            return
+        try:
+            with open(self.spill_file, "r") as f:
+                lines = [line for line in f if line.strip()]
+        except Exception as e:
+            print(f"Error reading evaluation spill file: {e}")
+            return
+        free = self.max_queue_size - self.queue.qsize()
+        if free <= 0 or not lines:
+            return
+        replay, remaining = lines[:free], lines[free:]
+        for line in replay:
+            try:
+                self._put(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        if remaining:
+            with open(self.spill_file, "w") as f:
+                f.writelines(remaining)
+        else:
+            self.spill_file.unlink()
+
+    async def _worker(self, worker_id: int):
+        while True:
+            item = await self.queue.get()
+            self._enqueue_times.popleft()
+            lag = time.time() - item["enqueued_at"]
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self.total_lag += lag
+            try:
+                result = await self.evaluate_fn(item["question"], item["response"])
+                self.processed += 1
+                print(f"🔍 Semantic evaluation (worker {worker_id}, lag {lag:.2f}s): {result}")
+            except asyncio.CancelledError:
+                # Cancelled mid-evaluation by stop(), the item must not vanish uncounted
+                self._discard(item)
+                raise
+            except Exception as e:
+                self.failed += 1
+                print(f"Error in semantic evaluation: {e}")
+            finally:
+                self.last_processed_at = datetime.now().isoformat()
+                self.queue.task_done()
+            if self.overflow_policy == "spill" and self.queue.empty() and not self.stopped:
+                self._replay_spilled()
+
+
+# Global instance
+background_evaluator = BackgroundEvaluator()
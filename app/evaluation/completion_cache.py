@@ -0,0 +1,97 @@
+"""
+On-disk memoization of the model calls made by the evaluation runner.
+Answers and judge verdicts are keyed by the model, the sampling settings and a
+hash of the full message list, so a changed judge prompt only re-runs judging
+and a changed answer prompt only re-runs the answers (and judges the new ones).
+The async methods run the SQLite reads and writes in a worker thread, off the event loop.
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from app.config.config import EVAL_CACHE_MODE, EVAL_CACHE_PATH, OLLAMA_MODEL
+
+# read_write: use and store entries; read_only: use entries, store nothing;
+# refresh: ignore entries and overwrite them; off: no cache
+CACHE_MODES = ("read_write", "read_only", "refresh", "off")
+
+
+class CompletionCache:
+    """SQLite cache of model responses, one row per (model, settings, messages) key."""
+
+    def __init__(self, db_path: str = EVAL_CACHE_PATH, mode: str = EVAL_CACHE_MODE):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"cache mode must be one of {', '.join(CACHE_MODES)}, got {mode!r}")
+        self.mode = mode
+        self.lock = threading.Lock()
+        self.db = None
+        if mode != "off":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self.db = sqlite3.connect(db_path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS completions "
+                "(key TEXT PRIMARY KEY, stage TEXT, model TEXT, response TEXT, created_at REAL, metrics TEXT)"
+            )
+            columns = {row[1] for row in self.db.execute("PRAGMA table_info(completions)")}
+            if "metrics" not in columns:
+                # Caches written before generation metrics were recorded
+                self.db.execute("ALTER TABLE completions ADD COLUMN metrics TEXT")
+            self.db.commit()
+        self.hits = {}
+        self.misses = {}
+
+    @staticmethod
+    def make_key(messages: list, model: str, temperature: float, max_tokens: int) -> str:
+        """Key of one model call; pass the sampling parameters the call is actually made with."""
+        payload = {"model": model, "temperature": temperature, "max_tokens": max_tokens, "messages": messages}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def get(self, key: str, stage: str):
+        """Return the cached (response, metrics) for ``key``, or None (always None in refresh and off modes).
+
+        ``metrics`` are the generation metrics measured when the response was produced.
+        """
+        entry = None
+        if self.db is not None and self.mode in ("read_write", "read_only"):
+            with self.lock:
+                row = self.db.execute("SELECT response, metrics FROM completions WHERE key = ?", (key,)).fetchone()
+            if row:
+                entry = (row[0], json.loads(row[1]) if row[1] else {})
+        with self.lock:
+            counter = self.hits if entry is not None else self.misses
+            counter[stage] = counter.get(stage, 0) + 1
+        return entry
+
+    async def aget(self, key: str, stage: str):
+        """``get`` without blocking the event loop."""
+        return await asyncio.to_thread(self.get, key, stage)
+
+    def put(self, key: str, stage: str, response: str, metrics: dict = None, model: str = OLLAMA_MODEL):
+        if self.db is None or self.mode == "read_only":
+            return
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO completions (key, stage, model, response, created_at, metrics) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, stage, model, response, time.time(), json.dumps(metrics or {})),
+            )
+            self.db.commit()
+
+    async def aput(self, key: str, stage: str, response: str, metrics: dict = None, model: str = OLLAMA_MODEL):
+        """``put`` without blocking the event loop."""
+        if self.db is None or self.mode == "read_only":
+            return
+        await asyncio.to_thread(self.put, key, stage, response, metrics, model)
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, "hits": dict(self.hits), "misses": dict(self.misses)}
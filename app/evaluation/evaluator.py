@@ -1,38 +1,190 @@
 """
 Simple evaluation runner for testing chatbot responses against ground truth.
+With context on, each question goes through the production RAG pipeline
+(retrieval, context assembly, generation) and retrieval is measured on its own.
 """
 
 import asyncio
 import json
 import os
+import re
 import sys
 import time
+from contextlib import nullcontext
 from datetime import datetime
 from pathlib import Path
 
 import mlflow
+import numpy as np
 import pandas as pd
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
+from app.config.config import (
+    EVAL_CACHE_MODE,
+    EVAL_CONCURRENCY,
+    EVAL_JUDGE_MODEL,
+    MAX_TOKENS,
+    OLLAMA_MODEL,
+    TEMPERATURE,
+)
+from app.evaluation.completion_cache import CompletionCache
 from app.evaluation.eval_data import get_eval_dataset, get_question_categories
-from app.prompts.system_prompt import EVALUATOR_SYSTEM_PROMPT, SYSTEM_PROMPT
-from app.tracking import get_ollama_response
+from app.prompts.system_prompt import EVALUATOR_SYSTEM_PROMPT, build_chat_messages
+from app.tracking import aget_ollama_response_with_metrics
+from app.vector_store.context_builder import estimate_tokens, tokenize
+
+# Question placeholder of prompt templates, e.g. tests/prompts/prompt_v1.txt
+PROMPT_PLACEHOLDER = re.compile(r"\{\{\s*user_query\s*\}\}")
+
+# Generation metrics summarized with p50/p95 per stage
+LATENCY_METRICS = ("wall_time", "time_to_first_token", "tokens_per_second")
+
+
+async def _complete(
+    messages: list,
+    stage: str,
+    cache: CompletionCache = None,
+    slots: asyncio.Semaphore = None,
+    model: str = OLLAMA_MODEL,
+):
+    """Model call through the evaluation cache; returns (response, generation metrics, cached).
+
+    Cache hits skip the Ollama call and take no concurrency slot; their metrics are the
+    ones measured when the response was generated.
+    """
+    key = cache.make_key(messages, model, TEMPERATURE, MAX_TOKENS) if cache else None
+    if cache:
+        entry = await cache.aget(key, stage)
+        if entry is not None:
+            response, generation = entry
+            return response, generation, True
+    async with slots or nullcontext():
+        response, generation = await aget_ollama_response_with_metrics(
+            messages, temperature=TEMPERATURE, max_tokens=MAX_TOKENS, model=model
+        )
+    if cache:
+        await cache.aput(key, stage, response, generation, model)
+    return response, generation, False
+
+
+def summarize_generations(generations: list) -> dict:
+    """p50/p95 of the latency metrics and total token counts over a list of generation metrics."""
+    summary = {"generations": len(generations)}
+    for name in LATENCY_METRICS:
+        values = [generation[name] for generation in generations if generation.get(name) is not None]
+        summary[f"{name}_p50"] = float(np.percentile(values, 50)) if values else None
+        summary[f"{name}_p95"] = float(np.percentile(values, 95)) if values else None
+    for name in ("prompt_tokens", "completion_tokens"):
+        summary[f"total_{name}"] = sum(generation.get(name) or 0 for generation in generations)
+    return summary
+
+
+def build_question_messages(question: str, prompt: str = None, context: str = "") -> list:
+    """Messages asking ``question`` with ``prompt`` and the retrieved ``context``.
+
+    Without a ``prompt`` these are the messages the chat endpoint sends. A prompt with a
+    ``{{ user_query }}`` placeholder (the promptfoo templates in tests/prompts) is
+    rendered into a single user message; any other prompt is the system message.
+    """
+    if prompt is None:
+        return build_chat_messages(question, context)
+    query = f"Context: {context}\n\nQuestion: {question}" if context else question
+    if PROMPT_PLACEHOLDER.search(prompt):
+        return [{"role": "user", "content": PROMPT_PLACEHOLDER.sub(lambda _: query, prompt)}]
+    return [
+        {"role": "system", "content": prompt},
+        {"role": "user", "content": query},
+    ]
+
+
+def context_recall(ground_truth: str, context: str):
+    """Share of the ground truth's terms that appear in the retrieved context (None without terms).
+
+    A lexical proxy for whether the retrieved chunks support the expected answer.
+    """
+    ground_truth_terms = set(tokenize(ground_truth))
+    if not ground_truth_terms:
+        return None
+    return len(ground_truth_terms & set(tokenize(context))) / len(ground_truth_terms)
+
+
+async def retrieve_context(question: str, ground_truth: str, k: int = 3):
+    """Retrieve and assemble context for ``question`` as the chat endpoint does.
+
+    Returns:
+        Tuple of (context, retrieval metrics)
+    """
+    from app.vector_store.vector_store import aget_context, get_stores
+
+    stores = get_stores()
+    if not (stores.vector_store or stores.lexical_index):
+        raise RuntimeError("use_context needs a vector store or lexical index, run load_documents.py first")
+    start_time = time.time()
+    context, sources = await aget_context(question, k, stores=stores)
+    retrieval = {
+        "retrieval_time": time.time() - start_time,
+        "context_characters": len(context),
+        "context_tokens": estimate_tokens(context),
+        "context_recall": context_recall(ground_truth, context),
+        "sources": sources,
+    }
+    return context, retrieval
+
+
+def summarize_retrievals(retrievals: list) -> dict:
+    """p50/p95 retrieval latency and average context size and recall over a list of retrieval metrics."""
+    times = [retrieval["retrieval_time"] for retrieval in retrievals]
+    recalls = [retrieval["context_recall"] for retrieval in retrievals if retrieval["context_recall"] is not None]
+    return {
+        "retrievals": len(retrievals),
+        "retrieval_time_p50": float(np.percentile(times, 50)) if times else None,
+        "retrieval_time_p95": float(np.percentile(times, 95)) if times else None,
+        "average_context_characters": (
+            sum(r["context_characters"] for r in retrievals) / len(retrievals) if retrievals else None
+        ),
+        "average_context_tokens": (
+            sum(r["context_tokens"] for r in retrievals) / len(retrievals) if retrievals else None
+        ),
+        "average_context_recall": sum(recalls) / len(recalls) if recalls else None,
+        "empty_contexts": sum(1 for r in retrievals if not r["context_characters"]),
+    }
 
 
 async def evaluate_single_question(
-    question: str, ground_truth: str, use_context: bool = False, use_llm_judge: bool = True
+    question: str,
+    ground_truth: str,
+    use_context: bool = False,
+    use_llm_judge: bool = True,
+    answer_slots: asyncio.Semaphore = None,
+    judge_slots: asyncio.Semaphore = None,
+    cache: CompletionCache = None,
+    model: str = OLLAMA_MODEL,
+    prompt: str = None,
+    retrieval_slots: asyncio.Semaphore = None,
 ):
-    """Evaluate a single question against ground truth."""
+    """Evaluate a single question against ground truth.
+
+    ``answer_slots``, ``judge_slots`` and ``retrieval_slots`` bound the answer calls,
+    judge calls and retrievals in flight across concurrently evaluated questions. With
+    a ``cache``, the answer and the verdict are reused when their full message lists
+    were seen before. The answer comes from ``model`` with ``prompt`` (see
+    ``build_question_messages``); the judge is always ``EVAL_JUDGE_MODEL`` so scores
+    stay comparable across models. With ``use_context``, context is retrieved first and
+    its latency, size and recall are reported under ``retrieval``, apart from generation.
+    """
     try:
+        # Retrieve context as the chat endpoint does; retrieval runs even when the answer is cached
+        context, retrieval = "", None
+        if use_context:
+            async with retrieval_slots or nullcontext():
+                context, retrieval = await retrieve_context(question, ground_truth)
+
         # Create messages for the model
-        messages = [
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": question},
-        ]
+        messages = build_question_messages(question, prompt, context)
 
         # Get model response
-        model_response = get_ollama_response(messages)
+        model_response, generation, answer_cached = await _complete(messages, "answer", cache, answer_slots, model)
 
         # Simple evaluation metrics
         response_length = len(model_response)
@@ -49,12 +201,25 @@ async def evaluate_single_question(
             "ground_truth_length": ground_truth_length,
             "word_overlap_ratio": word_overlap_ratio,
             "response_provided": len(model_response.strip()) > 0,
+            "response_time": generation.get("wall_time"),
+            "time_to_first_token": generation.get("time_to_first_token"),
+            "prompt_tokens": generation.get("prompt_tokens"),
+            "completion_tokens": generation.get("completion_tokens"),
+            "tokens_per_second": generation.get("tokens_per_second"),
         }
+        if retrieval:
+            metrics.update(
+                {
+                    "retrieval_time": retrieval["retrieval_time"],
+                    "context_tokens": retrieval["context_tokens"],
+                    "context_recall": retrieval["context_recall"],
+                }
+            )
 
         # Add LLM-as-a-judge evaluation
         llm_judge_result = None
         if use_llm_judge:
-            llm_judge_result = await llm_judge_evaluation(question, model_response, ground_truth)
+            llm_judge_result = await llm_judge_evaluation(question, model_response, ground_truth, cache, judge_slots)
             metrics.update(
                 {
                     "llm_judge_overall": llm_judge_result.get("overall_score", 0),
@@ -68,6 +233,9 @@ async def evaluate_single_question(
             "model_response": model_response,
             "metrics": metrics,
             "llm_judge": llm_judge_result,
+            "generation": generation,
+            "retrieval": retrieval,
+            "cached": {"answer": answer_cached, "judge": llm_judge_result.get("cached") if llm_judge_result else None},
         }
     except Exception as e:
         return {
@@ -79,88 +247,198 @@ async def evaluate_single_question(
         }
 
 
+async def evaluate_sample(
+    sample_data: pd.DataFrame,
+    use_context: bool = False,
+    use_llm_judge: bool = True,
+    concurrency: int = EVAL_CONCURRENCY,
+    cache: CompletionCache = None,
+    model: str = OLLAMA_MODEL,
+    prompt: str = None,
+):
+    """Evaluate every question of ``sample_data`` and summarize the results, without MLflow.
+
+    Questions are evaluated as a pipeline: up to ``concurrency`` retrievals (with
+    ``use_context``), answer calls and judge calls are in flight, and each answer is
+    judged as soon as it arrives. Results keep the dataset order whatever order they
+    complete in.
+
+    Returns:
+        Tuple of (results, summary)
+    """
+    answer_slots = asyncio.Semaphore(concurrency)
+    judge_slots = asyncio.Semaphore(concurrency)
+    retrieval_slots = asyncio.Semaphore(concurrency)
+    total = len(sample_data)
+    completed = 0
+    start_time = time.time()
+
+    async def evaluate(row):
+        nonlocal completed
+        result = await evaluate_single_question(
+            row["inputs"],
+            row["ground_truth"],
+            use_context,
+            use_llm_judge,
+            answer_slots,
+            judge_slots,
+            cache,
+            model,
+            prompt,
+            retrieval_slots,
+        )
+        completed += 1
+        print(f"  Question {completed}/{total} done ({model}): {row['inputs'][:50]}...")
+        return result
+
+    # gather returns results in dataset order, however the questions interleave
+    results = await asyncio.gather(*(evaluate(row) for _, row in sample_data.iterrows()))
+    wall_clock_time = time.time() - start_time
+
+    # Calculate summary metrics
+    total_questions = len(results)
+    successful_responses = sum(1 for r in results if not r["metrics"].get("error", False))
+    avg_word_overlap = sum(r["metrics"].get("word_overlap_ratio", 0) for r in results) / total_questions
+
+    # Calculate LLM judge metrics if available
+    avg_llm_judge_score = 0
+    if use_llm_judge:
+        llm_scores = [r["metrics"].get("llm_judge_overall", 0) for r in results if not r["metrics"].get("error", False)]
+        avg_llm_judge_score = sum(llm_scores) / len(llm_scores) if llm_scores else 0
+
+    # Latency and token throughput per stage, over every answer and judge generation
+    successful = [r for r in results if not r["metrics"].get("error", False)]
+    generations = {"answer": summarize_generations([r["generation"] for r in successful])}
+    if use_llm_judge:
+        judge_generations = [r["llm_judge"].get("generation") for r in successful]
+        generations["judge"] = summarize_generations([g for g in judge_generations if g is not None])
+    retrievals = summarize_retrievals([r["retrieval"] for r in successful]) if use_context else None
+    response_times = [r["metrics"]["response_time"] for r in successful if r["metrics"]["response_time"] is not None]
+
+    summary = {
+        "timestamp": datetime.now().isoformat(),
+        "model": model,
+        "judge_model": EVAL_JUDGE_MODEL if use_llm_judge else None,
+        "total_questions": total_questions,
+        "successful_responses": successful_responses,
+        "success_rate": successful_responses / total_questions,
+        "average_word_overlap": avg_word_overlap,
+        "average_llm_judge_score": avg_llm_judge_score,
+        "use_context": use_context,
+        "use_llm_judge": use_llm_judge,
+        "concurrency": concurrency,
+        "wall_clock_time": wall_clock_time,
+        "questions_per_minute": total_questions / wall_clock_time * 60 if wall_clock_time else 0,
+        "cache": cache.stats() if cache else None,
+        "average_response_time": sum(response_times) / len(response_times) if response_times else 0,
+        "generation_metrics": generations,
+        "retrieval_metrics": retrievals,
+    }
+    return results, summary
+
+
+def log_evaluation(results: list, summary: dict):
+    """Log per-question and summary metrics of an evaluation to the active MLflow run."""
+    # Per-question metrics, in dataset order and in one call
+    question_metrics = {}
+    for idx, result in enumerate(results):
+        if not result["metrics"].get("error", False):
+            question_metrics[f"word_overlap_q{idx+1}"] = result["metrics"].get("word_overlap_ratio", 0)
+            for name, key in (
+                ("response_time", "response_time"),
+                ("ttft", "time_to_first_token"),
+                ("tokens_per_second", "tokens_per_second"),
+                ("retrieval_time", "retrieval_time"),
+                ("context_tokens", "context_tokens"),
+                ("context_recall", "context_recall"),
+            ):
+                if result["metrics"].get(key) is not None:
+                    question_metrics[f"{name}_q{idx+1}"] = result["metrics"][key]
+            if summary["use_llm_judge"]:
+                question_metrics[f"llm_judge_score_q{idx+1}"] = result["metrics"].get("llm_judge_overall", 0)
+    if question_metrics:
+        mlflow.log_metrics(question_metrics)
+
+    cache_hits = summary["cache"]["hits"] if summary["cache"] else {}
+    mlflow.log_metrics(
+        {
+            "success_rate": summary["success_rate"],
+            "avg_word_overlap": summary["average_word_overlap"],
+            "avg_response_time": summary["average_response_time"],
+            "wall_clock_time": summary["wall_clock_time"],
+            "questions_per_minute": summary["questions_per_minute"],
+            "cached_answers": cache_hits.get("answer", 0),
+            "cached_judgements": cache_hits.get("judge", 0),
+        }
+    )
+    mlflow.log_metrics(
+        {
+            f"{stage}_{name}": value
+            for stage, stage_summary in summary["generation_metrics"].items()
+            for name, value in stage_summary.items()
+            if value is not None
+        }
+    )
+    if summary["retrieval_metrics"]:
+        mlflow.log_metrics({name: value for name, value in summary["retrieval_metrics"].items() if value is not None})
+    if summary["use_llm_judge"]:
+        mlflow.log_metric("avg_llm_judge_score", summary["average_llm_judge_score"])
+
+
 async def run_evaluation(
-    sample_size: int = 5, use_context: bool = False, use_llm_judge: bool = True, log_to_mlflow: bool = True
+    sample_size: int = 5,
+    use_context: bool = False,
+    use_llm_judge: bool = True,
+    log_to_mlflow: bool = True,
+    concurrency: int = EVAL_CONCURRENCY,
+    cache_mode: str = EVAL_CACHE_MODE,
+    model: str = OLLAMA_MODEL,
 ):
-    """Run evaluation on a sample of questions with optional MLflow tracking."""
+    """Run evaluation on a sample of questions with optional MLflow tracking.
+
+    Up to ``concurrency`` questions are answered and judged at once (see ``evaluate_sample``).
+    With ``use_context``, answers go through retrieval and context assembly as in the chat
+    endpoint, and retrieval latency, context size and context recall are reported too.
+
+    Answers and judge verdicts are memoized on disk. ``cache_mode`` is ``read_write``,
+    ``read_only`` (reuse entries, store nothing), ``refresh`` (re-run every call and
+    overwrite its entry) or ``off``.
+    """
     print(f"🧪 Running evaluation on {sample_size} questions...")
+    print(f"   Model: {model}")
+    print(f"   Using context: {use_context}")
     print(f"   Using LLM-as-a-judge: {use_llm_judge}")
     print(f"   Logging to MLflow: {log_to_mlflow}")
+    print(f"   Concurrency: {concurrency}")
+    print(f"   Cache mode: {cache_mode}")
+    cache = CompletionCache(mode=cache_mode)
 
     eval_data = get_eval_dataset()
     sample_data = eval_data.head(sample_size)
 
-    results = []
-
-    # Start MLflow run if logging is enabled
-    mlflow_run = None
-    if log_to_mlflow:
-        mlflow_run = mlflow.start_run(run_name=f"evaluation_{sample_size}_questions")
-        mlflow.log_params(
-            {
-                "sample_size": sample_size,
-                "use_context": use_context,
-                "use_llm_judge": use_llm_judge,
-                "evaluation_timestamp": datetime.now().isoformat(),
-            }
-        )
-
+    started_at = datetime.now().isoformat()
     try:
-        for idx, row in sample_data.iterrows():
-            print(f"  Question {idx + 1}/{sample_size}: {row['inputs'][:50]}...")
-            result = await evaluate_single_question(row["inputs"], row["ground_truth"], use_context, use_llm_judge)
-            results.append(result)
-
-            # Log individual metrics to MLflow
-            if log_to_mlflow and mlflow_run and not result["metrics"].get("error", False):
-                mlflow.log_metrics(
-                    {
-                        f"word_overlap_q{idx+1}": result["metrics"].get("word_overlap_ratio", 0),
-                        f"response_time_q{idx+1}": result["metrics"].get("response_time", 0),
-                    }
-                )
-                if use_llm_judge:
-                    mlflow.log_metric(f"llm_judge_score_q{idx+1}", result["metrics"].get("llm_judge_overall", 0))
-
-        # Calculate summary metrics
-        total_questions = len(results)
-        successful_responses = sum(1 for r in results if not r["metrics"].get("error", False))
-        avg_word_overlap = sum(r["metrics"].get("word_overlap_ratio", 0) for r in results) / total_questions
-
-        # Calculate LLM judge metrics if available
-        avg_llm_judge_score = 0
-        if use_llm_judge:
-            llm_scores = [
-                r["metrics"].get("llm_judge_overall", 0) for r in results if not r["metrics"].get("error", False)
-            ]
-            avg_llm_judge_score = sum(llm_scores) / len(llm_scores) if llm_scores else 0
-
-        summary = {
-            "timestamp": datetime.now().isoformat(),
-            "total_questions": total_questions,
-            "successful_responses": successful_responses,
-            "success_rate": successful_responses / total_questions,
-            "average_word_overlap": avg_word_overlap,
-            "average_llm_judge_score": avg_llm_judge_score,
-            "use_context": use_context,
-            "use_llm_judge": use_llm_judge,
-        }
+        results, summary = await evaluate_sample(sample_data, use_context, use_llm_judge, concurrency, cache, model)
+    finally:
+        cache.close()
 
-        # Log summary metrics to MLflow
-        if log_to_mlflow and mlflow_run:
-            mlflow.log_metrics(
+    # The run is opened only once the questions are done, and nothing below awaits, so it is
+    # never left active on the event loop while production evaluations log their own runs
+    if log_to_mlflow:
+        with mlflow.start_run(run_name=f"evaluation_{sample_size}_questions"):
+            mlflow.log_params(
                 {
-                    "success_rate": summary["success_rate"],
-                    "avg_word_overlap": summary["average_word_overlap"],
-                    "avg_response_time": sum(r["metrics"].get("response_time", 0) for r in results) / total_questions,
+                    "sample_size": sample_size,
+                    "model": model,
+                    "judge_model": EVAL_JUDGE_MODEL,
+                    "use_context": use_context,
+                    "use_llm_judge": use_llm_judge,
+                    "concurrency": concurrency,
+                    "cache_mode": cache_mode,
+                    "evaluation_timestamp": started_at,
                 }
             )
-            if use_llm_judge:
-                mlflow.log_metric("avg_llm_judge_score", summary["average_llm_judge_score"])
-
-    finally:
-        if log_to_mlflow and mlflow_run:
-            mlflow.end_run()
+            log_evaluation(results, summary)
 
     return {"summary": summary, "results": results}
 
@@ -179,8 +457,17 @@ def save_evaluation_results(results, filename=None):
     return filepath
 
 
-async def llm_judge_evaluation(question: str, model_response: str, ground_truth: str):
-    """Use LLM-as-a-judge to evaluate response quality."""
+async def llm_judge_evaluation(
+    question: str,
+    model_response: str,
+    ground_truth: str,
+    cache: CompletionCache = None,
+    slots: asyncio.Semaphore = None,
+):
+    """Use LLM-as-a-judge to evaluate response quality.
+
+    With a ``cache``, a verdict for the same judge messages is reused instead of asking the model again.
+    """
     try:
         judge_prompt = f"""
 Question: {question}
@@ -208,7 +495,7 @@ Feedback: [brief explanation]
             {"role": "user", "content": judge_prompt},
         ]
 
-        judge_response = get_ollama_response(judge_messages)
+        judge_response, generation, cached = await _complete(judge_messages, "judge", cache, slots, EVAL_JUDGE_MODEL)
 
         # Parse scores from response (simple parsing)
         scores = {}
@@ -228,6 +515,8 @@ Feedback: [brief explanation]
             "judge_response": judge_response,
             "scores": scores,
             "overall_score": scores.get("overall", sum(scores.values()) / len(scores) if scores else 0),
+            "cached": cached,
+            "generation": generation,
         }
     except Exception as e:
         return {"judge_response": f"Error: {str(e)}", "scores": {}, "overall_score": 0}
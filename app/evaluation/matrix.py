@@ -0,0 +1,283 @@
+"""
+Model x prompt evaluation matrix.
+Runs the evaluation dataset for every combination of models and prompt variants,
+then reports judge score, word overlap, p95 latency and tokens/sec per cell and the
+quality/latency Pareto front, to pick the cheapest model that meets a quality bar.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import mlflow
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from app.config.config import (
+    EVAL_CACHE_MODE,
+    EVAL_CONCURRENCY,
+    EVAL_JUDGE_MODEL,
+    EVAL_MODEL_CONCURRENCY,
+    OLLAMA_MODEL,
+)
+from app.evaluation.completion_cache import CompletionCache
+from app.evaluation.eval_data import get_eval_dataset
+from app.evaluation.evaluator import evaluate_sample, log_evaluation
+from app.prompts import system_prompt
+from app.tracking import close_backends
+
+RESULTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "evaluation_results/matrix_evaluations"))
+# Prompt variant files can only be read from here (the promptfoo templates)
+PROMPTS_DIR = Path(__file__).resolve().parents[2] / "tests" / "prompts"
+REPORT_COLUMNS = (
+    "model",
+    "prompt",
+    "judge_score",
+    "word_overlap",
+    "success_rate",
+    "p95_latency",
+    "p95_ttft",
+    "tokens_per_second",
+    "completion_tokens",
+    "retrieval_p95",
+    "context_recall",
+    "pareto",
+)
+
+
+def load_prompt_variant(spec: str):
+    """Return (name, prompt) for a constant of app/prompts/system_prompt.py (e.g. ``SYSTEM_PROMPT``) or
+    the name of a prompt file in tests/prompts (e.g. ``prompt_v1.txt``).
+
+    Specs come from API requests, so files are only resolved inside ``PROMPTS_DIR``.
+    """
+    if spec.isidentifier() and not spec.startswith("_") and isinstance(getattr(system_prompt, spec, None), str):
+        return spec, getattr(system_prompt, spec)
+    relative = Path(spec)
+    path = (PROMPTS_DIR / relative).resolve()
+    if relative.is_absolute() or ".." in relative.parts or not path.is_relative_to(PROMPTS_DIR) or not path.is_file():
+        raise ValueError(
+            f"prompt variant {spec!r} is neither a constant in app/prompts/system_prompt.py nor a file in tests/prompts"
+        )
+    return spec, path.read_text()
+
+
+def cell_row(model: str, prompt_name: str, summary: dict) -> dict:
+    answer = summary["generation_metrics"]["answer"]
+    retrieval = summary["retrieval_metrics"] or {}
+    return {
+        "model": model,
+        "prompt": prompt_name,
+        "judge_score": summary["average_llm_judge_score"] if summary["use_llm_judge"] else None,
+        "word_overlap": summary["average_word_overlap"],
+        "success_rate": summary["success_rate"],
+        "p95_latency": answer["wall_time_p95"],
+        "p95_ttft": answer["time_to_first_token_p95"],
+        "tokens_per_second": answer["tokens_per_second_p50"],
+        "completion_tokens": answer["total_completion_tokens"],
+        "retrieval_p95": retrieval.get("retrieval_time_p95"),
+        "context_recall": retrieval.get("average_context_recall"),
+    }
+
+
+def pareto_front(rows: list, quality_key: str) -> list:
+    """Rows no other row beats on both quality (higher) and p95 latency (lower)."""
+    candidates = [row for row in rows if row[quality_key] is not None and row["p95_latency"] is not None]
+
+    def dominates(a, b):
+        return (
+            a[quality_key] >= b[quality_key]
+            and a["p95_latency"] <= b["p95_latency"]
+            and (a[quality_key] > b[quality_key] or a["p95_latency"] < b["p95_latency"])
+        )
+
+    front = [row for row in candidates if not any(dominates(other, row) for other in candidates)]
+    return sorted(front, key=lambda row: row["p95_latency"])
+
+
+def fastest_meeting_bar(rows: list, quality_key: str, quality_bar: float):
+    """The row with the lowest p95 latency whose quality is at least ``quality_bar``, or None."""
+    passing = [
+        row
+        for row in rows
+        if row[quality_key] is not None and row["p95_latency"] is not None and row[quality_key] >= quality_bar
+    ]
+    return min(passing, key=lambda row: row["p95_latency"]) if passing else None
+
+
+async def run_matrix(
+    models: list,
+    prompts: list,
+    sample_size: int = None,
+    use_llm_judge: bool = True,
+    concurrency: int = EVAL_CONCURRENCY,
+    model_concurrency: int = EVAL_MODEL_CONCURRENCY,
+    cache_mode: str = EVAL_CACHE_MODE,
+    quality_bar: float = None,
+    log_to_mlflow: bool = True,
+    use_context: bool = False,
+):
+    """Evaluate every (model, prompt variant) cell over the evaluation dataset.
+
+    At most ``model_concurrency`` models are evaluated at once. A model's prompt variants
+    run back to back so it stays loaded in Ollama, each with up to ``concurrency``
+    questions in flight. Quality is the judge score (word overlap without the judge).
+    With ``use_context`` every cell answers through retrieval, as the chat endpoint does.
+
+    Returns:
+        Dict with the ``report`` (one row per cell, the Pareto front and the fastest cell
+        meeting ``quality_bar``) and each cell's ``summary`` and ``results``
+    """
+    variants = [load_prompt_variant(prompt) for prompt in prompts]
+    eval_data = get_eval_dataset()
+    sample_data = eval_data if sample_size is None else eval_data.head(sample_size)
+    print(f"🧮 Evaluating {len(models)} models x {len(variants)} prompts on {len(sample_data)} questions")
+
+    model_slots = asyncio.Semaphore(model_concurrency)
+    cells = {}
+
+    async def run_model(model: str):
+        async with model_slots:
+            for prompt_name, prompt in variants:
+                cache = CompletionCache(mode=cache_mode)
+                try:
+                    results, summary = await evaluate_sample(
+                        sample_data, use_context, use_llm_judge, concurrency, cache, model, prompt
+                    )
+                finally:
+                    cache.close()
+                cells[(model, prompt_name)] = {"summary": summary, "results": results}
+                print(f"✅ {model} | {prompt_name}: done in {summary['wall_clock_time']:.1f}s")
+
+    await asyncio.gather(*(run_model(model) for model in models))
+
+    # Rows in the order the models and prompts were given
+    rows = [cell_row(model, name, cells[(model, name)]["summary"]) for model in models for name, _ in variants]
+    quality_key = "judge_score" if use_llm_judge else "word_overlap"
+    front = pareto_front(rows, quality_key)
+    for row in rows:
+        row["pareto"] = any(row is member for member in front)
+    recommended = fastest_meeting_bar(rows, quality_key, quality_bar) if quality_bar is not None else None
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "questions": len(sample_data),
+        "judge_model": EVAL_JUDGE_MODEL if use_llm_judge else None,
+        "quality_metric": quality_key,
+        "use_context": use_context,
+        "quality_bar": quality_bar,
+        "cells": rows,
+        "pareto_front": [{"model": row["model"], "prompt": row["prompt"]} for row in front],
+        "recommended": {"model": recommended["model"], "prompt": recommended["prompt"]} if recommended else None,
+    }
+
+    if log_to_mlflow:
+        # Cells are logged one after another: MLflow allows a single active run per thread
+        with mlflow.start_run(run_name=f"evaluation_matrix_{len(models)}x{len(variants)}"):
+            mlflow.log_params(
+                {
+                    "models": ",".join(models),
+                    "prompts": ",".join(name for name, _ in variants),
+                    "sample_size": len(sample_data),
+                    "judge_model": report["judge_model"],
+                    "quality_bar": quality_bar,
+                    "use_context": use_context,
+                    "concurrency": concurrency,
+                    "model_concurrency": model_concurrency,
+                    "cache_mode": cache_mode,
+                }
+            )
+            for (model, prompt_name), cell in cells.items():
+                with mlflow.start_run(run_name=f"{model} | {prompt_name}", nested=True):
+                    mlflow.log_params({"model": model, "prompt": prompt_name})
+                    log_evaluation(cell["results"], cell["summary"])
+            mlflow.log_dict(report, "matrix_report.json")
+
+    return {"report": report, "cells": {f"{model} | {name}": cell for (model, name), cell in cells.items()}}
+
+
+def _format(value, spec: str) -> str:
+    return format(value, spec) if value is not None else "-"
+
+
+def print_report(report: dict):
+    print(
+        f"\n{'model':<20} {'prompt':<32} {'judge':>6} {'overlap':>8} {'p95 s':>7} {'ttft95':>7} {'tok/s':>7} {'pareto':>7}"
+    )
+    for row in report["cells"]:
+        print(
+            f"{row['model']:<20} {row['prompt']:<32} {_format(row['judge_score'], '.2f'):>6} "
+            f"{_format(row['word_overlap'], '.3f'):>8} {_format(row['p95_latency'], '.2f'):>7} "
+            f"{_format(row['p95_ttft'], '.2f'):>7} {_format(row['tokens_per_second'], '.1f'):>7} "
+            f"{'*' if row['pareto'] else '':>7}"
+        )
+    front = ", ".join(f"{cell['model']} | {cell['prompt']}" for cell in report["pareto_front"])
+    print(f"\nPareto front ({report['quality_metric']} vs p95 latency): {front or '-'}")
+    if report["quality_bar"] is not None:
+        recommended = report["recommended"]
+        choice = f"{recommended['model']} | {recommended['prompt']}" if recommended else "no cell meets it"
+        print(f"Fastest with {report['quality_metric']} >= {report['quality_bar']}: {choice}")
+
+
+def save_matrix_report(report: dict) -> str:
+    """Save the report as JSON and its table as CSV; returns the JSON path."""
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stem = os.path.join(RESULTS_DIR, f"matrix_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    with open(f"{stem}.json", "w") as f:
+        json.dump(report, f, indent=2)
+    with open(f"{stem}.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(report["cells"])
+    print(f"📊 Matrix report saved to {stem}.json and {stem}.csv")
+    return f"{stem}.json"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate a matrix of models and prompt variants")
+    parser.add_argument("--models", nargs="+", default=[OLLAMA_MODEL])
+    parser.add_argument(
+        "--prompts",
+        nargs="+",
+        default=["SYSTEM_PROMPT"],
+        help="Constants of app/prompts/system_prompt.py or prompt files in tests/prompts, e.g. prompt_v1.txt",
+    )
+    parser.add_argument("--sample-size", type=int, default=None, help="Questions per cell (default: all)")
+    parser.add_argument("--use-context", action="store_true", help="Answer through retrieval as /chat does")
+    parser.add_argument("--no-judge", action="store_true", help="Skip LLM-as-a-judge; quality is word overlap")
+    parser.add_argument("--concurrency", type=int, default=EVAL_CONCURRENCY, help="Questions in flight per cell")
+    parser.add_argument("--model-concurrency", type=int, default=EVAL_MODEL_CONCURRENCY, help="Models run at once")
+    parser.add_argument("--cache-mode", default=EVAL_CACHE_MODE, choices=("read_write", "read_only", "refresh", "off"))
+    parser.add_argument("--quality-bar", type=float, default=None, help="Minimum quality for the recommendation")
+    parser.add_argument("--no-mlflow", action="store_true")
+    args = parser.parse_args()
+
+    async def run():
+        try:
+            return await run_matrix(
+                args.models,
+                args.prompts,
+                sample_size=args.sample_size,
+                use_llm_judge=not args.no_judge,
+                concurrency=args.concurrency,
+                model_concurrency=args.model_concurrency,
+                cache_mode=args.cache_mode,
+                quality_bar=args.quality_bar,
+                log_to_mlflow=not args.no_mlflow,
+                use_context=args.use_context,
+            )
+        finally:
+            # Close the pooled Ollama connections before asyncio.run closes their loop
+            await close_backends()
+
+    matrix = asyncio.run(run())
+    print_report(matrix["report"])
+    save_matrix_report(matrix["report"])
+
+
+if __name__ == "__main__":
+    main()
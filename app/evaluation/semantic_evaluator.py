@@ -6,6 +6,7 @@ Automatically evaluates production questions against known ground truth.
 import asyncio
 import json
 import os
+import threading
 import time
 from datetime import datetime
 from pathlib import Path
@@ -19,7 +20,7 @@ from app.prompts.similarity_prompt import (
     SIMILARITY_SYSTEM_PROMPT,
     get_similarity_prompt,
 )
-from app.tracking import get_ollama_response
+from app.tracking import aget_ollama_response
 
 
 class SemanticEvaluator:
@@ -30,6 +31,8 @@ class SemanticEvaluator:
         self.eval_dataset = get_eval_dataset()
         self.new_questions_file = Path("app/evaluation/evaluation_results/new_questions.json")
         self.new_questions_file.parent.mkdir(exist_ok=True)
+        # Serializes rewrites of new_questions_file across worker threads
+        self._new_questions_lock = threading.Lock()
 
         # Load existing new questions if file exists
         self.new_questions = self._load_new_questions()
@@ -46,8 +49,11 @@ class SemanticEvaluator:
 
     def _save_new_questions(self):
         """Save new questions to file."""
-        with open(self.new_questions_file, "w") as f:
-            json.dump(self.new_questions, f, indent=2, default=str)
+        with self._new_questions_lock:
+            # Snapshot under the lock so the last writer always saves the newest list
+            new_questions = list(self.new_questions)
+            with open(self.new_questions_file, "w") as f:
+                json.dump(new_questions, f, indent=2, default=str)
 
     async def find_similar_question(self, user_question: str) -> dict:
         """
@@ -70,7 +76,7 @@ class SemanticEvaluator:
         ]
 
         try:
-            response = get_ollama_response(messages)
+            response = await aget_ollama_response(messages)
             print(f"🔍 Similarity LLM response: {response}")  # Debug output
             return self._parse_similarity_response(response, user_question)
         except Exception as e:
@@ -264,11 +270,9 @@ class SemanticEvaluator:
                 "llm_judge_score": judge_result.get("overall_score", 0),
             }
 
-            # Log to MLflow
-            await self._log_to_mlflow(evaluation_result)
-
-            # Save evaluation result
-            self._save_evaluation_result(evaluation_result)
+            # MLflow logging and file writes are blocking, keep them off the event loop
+            await asyncio.to_thread(self._log_to_mlflow, evaluation_result)
+            await asyncio.to_thread(self._save_evaluation_result, evaluation_result)
 
             return {
                 "evaluated": True,
@@ -291,7 +295,7 @@ class SemanticEvaluator:
             }
 
             self.new_questions.append(new_question_entry)
-            self._save_new_questions()
+            await asyncio.to_thread(self._save_new_questions)
 
             return {
                 "evaluated": False,
@@ -301,7 +305,7 @@ class SemanticEvaluator:
                 "new_questions_count": len(self.new_questions),
             }
 
-    async def _log_to_mlflow(self, evaluation_result: dict):
+    def _log_to_mlflow(self, evaluation_result: dict):
         """Log evaluation results to MLflow."""
         try:
             with mlflow.start_run(run_name="production_similarity_evaluation"):
@@ -0,0 +1 @@
+from .supervisor import health_supervisor
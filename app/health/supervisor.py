@@ -0,0 +1,129 @@
+"""
+Capability detection and cached health status for the LLM, embeddings and vector store.
+Checks run once at startup and then on a schedule in the background, so request
+handlers read the cached status instead of calling the models.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+
+import httpx
+
+from app.config.config import EMBEDDING_MODEL, HEALTH_CHECK_INTERVAL, OLLAMA_BASE_URL, OLLAMA_MODEL
+from app.llm.llm import ollama_embeddings
+from app.vector_store.vector_store import count_documents, get_stores
+
+EMBEDDING_PROBE = "The insured person's name is Julien Look"
+
+
+def _model_available(model: str, available: set) -> bool:
+    """Ollama reports untagged models as ``name:latest``."""
+    return model in available or f"{model}:latest" in available
+
+
+class HealthSupervisor:
+    """Periodically checks each capability and keeps the latest result."""
+
+    def __init__(self, interval: float = HEALTH_CHECK_INTERVAL):
+        self.interval = interval
+        self.status = {
+            name: {"status": "unknown", "checked_at": None, "latency": None}
+            for name in ("llm", "embeddings", "vector_store")
+        }
+        self.task = None
+
+    async def start(self):
+        """Run the initial capability check, then keep re-checking in the background."""
+        await self.check_all()
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check_all()
+
+    async def check_all(self):
+        await asyncio.gather(
+            self._check("llm", self.check_llm),
+            self._check("embeddings", self.check_embeddings),
+        )
+        # The vector store check compares against the embedding dimension just measured
+        await self._check("vector_store", self.check_vector_store)
+
+    async def _check(self, name: str, check_fn):
+        start_time = time.time()
+        try:
+            details = await check_fn()
+            status = "healthy"
+        except Exception as e:
+            details = {}
+            status = f"unhealthy: {str(e)}"
+        previous = self.status[name]["status"]
+        self.status[name] = {
+            "status": status,
+            "checked_at": datetime.now().isoformat(),
+            "latency": time.time() - start_time,
+            **details,
+        }
+        if status != previous:
+            print(f"🩺 {name} status changed: {previous} -> {status}")
+
+    async def check_llm(self) -> dict:
+        """Check that Ollama is reachable and the chat model is pulled, without generating."""
+        async with httpx.AsyncClient(timeout=10) as client:
+            response = await client.get(f"{OLLAMA_BASE_URL}/api/tags")
+            response.raise_for_status()
+        available = {model["name"] for model in response.json().get("models", [])}
+        if not _model_available(OLLAMA_MODEL, available):
+            raise RuntimeError(f"model {OLLAMA_MODEL} is not available")
+        return {"model": OLLAMA_MODEL}
+
+    async def check_embeddings(self) -> dict:
+        # Bypass the embedding cache so the service itself is checked
+        vector = await ollama_embeddings.aembed_query(EMBEDDING_PROBE)
+        if not vector:
+            raise RuntimeError("empty embedding returned")
+        return {"model": EMBEDDING_MODEL, "dimension": len(vector)}
+
+    async def check_vector_store(self) -> dict:
+        vector_store, lexical_index, embedding_status, _ = get_stores()
+        if vector_store is None:
+            raise RuntimeError(embedding_status.get("detail") or "not initialized")
+        # Stored vectors must have the dimension the embedding model currently returns
+        stored_dimension = embedding_status.get("embedding_dimension")
+        query_dimension = self.status["embeddings"].get("dimension")
+        if stored_dimension and query_dimension and stored_dimension != query_dimension:
+            raise RuntimeError(
+                f"stored vectors have {stored_dimension} dimensions, embeddings return {query_dimension}"
+            )
+        count = await asyncio.to_thread(count_documents, vector_store)
+        return {
+            "documents": count,
+            "lexical_documents": lexical_index.count() if lexical_index else None,
+            "collection": embedding_status.get("collection"),
+            "embedding_model": embedding_status.get("embedding_model"),
+            "embedding_check": embedding_status.get("status"),
+        }
+
+    def is_available(self, name: str) -> bool:
+        """True when the capability is healthy, or has not been checked yet."""
+        return self.status[name]["status"] in ("healthy", "unknown")
+
+    @property
+    def embeddings_available(self) -> bool:
+        return self.is_available("embeddings")
+
+    def overall_status(self) -> str:
+        return "healthy" if self.status["llm"]["status"] == "healthy" else "degraded"
+
+
+# Global instance
+health_supervisor = HealthSupervisor()
@@ -0,0 +1,96 @@
+"""
+Micro-batching of query embeddings across concurrent requests.
+Queries arriving within a short window are sent to Ollama as one
+``embed_documents`` call and each caller gets its own vector back.
+"""
+
+import asyncio
+
+from app.config.config import EMBEDDING_BATCH_MAX_SIZE, EMBEDDING_BATCH_WINDOW_MS
+from app.llm.llm import embeddings
+
+
+class EmbeddingBatcher:
+    """Collects embedding requests for up to ``window_ms`` or ``max_batch_size`` items."""
+
+    def __init__(
+        self,
+        embedding_model=embeddings,
+        window_ms: float = EMBEDDING_BATCH_WINDOW_MS,
+        max_batch_size: int = EMBEDDING_BATCH_MAX_SIZE,
+    ):
+        self.embedding_model = embedding_model
+        self.window_ms = window_ms
+        self.max_batch_size = max_batch_size
+        self.pending = []
+        self.flush_handle = None
+        # Strong references so in-flight batches are not garbage collected mid-call
+        self.tasks = set()
+
+        self.requests = 0
+        self.batches = 0
+        self.batched_texts = 0
+        self.max_fill = 0
+        self.full_batches = 0
+        self.errors = 0
+
+    async def embed(self, text: str) -> list:
+        """Embed a single text, sharing the Ollama call with other texts in the same window."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((text, future))
+        self.requests += 1
+
+        if len(self.pending) >= self.max_batch_size:
+            self._flush()
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(self.window_ms / 1000, self._flush)
+        return await future
+
+    def _flush(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        batch, self.pending = self.pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._embed_batch(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _embed_batch(self, batch: list):
+        # Identical texts in the same window are embedded once
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        self.batches += 1
+        self.batched_texts += len(batch)
+        self.max_fill = max(self.max_fill, len(batch))
+        if len(batch) >= self.max_batch_size:
+            self.full_batches += 1
+        try:
+            vectors = await self.embedding_model.aembed_documents(texts)
+        except Exception as e:
+            self.errors += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        by_text = dict(zip(texts, vectors))
+        for text, future in batch:
+            if not future.done():
+                future.set_result(by_text[text])
+
+    def stats(self) -> dict:
+        return {
+            "window_ms": self.window_ms,
+            "max_batch_size": self.max_batch_size,
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch_fill": self.batched_texts / self.batches if self.batches else 0.0,
+            "avg_fill_ratio": self.batched_texts / (self.batches * self.max_batch_size) if self.batches else 0.0,
+            "max_batch_fill": self.max_fill,
+            "full_batches": self.full_batches,
+            "errors": self.errors,
+        }
+
+
+# Global instance
+embedding_batcher = EmbeddingBatcher()
@@ -0,0 +1,169 @@
+"""
+Content-addressed embedding cache shared by retrieval, caching and evaluation.
+Vectors are keyed by (embedding model, text hash) and kept in an in-memory LRU
+tier backed by a SQLite tier that survives restarts. The async methods run the
+SQLite reads and writes in a worker thread, off the event loop.
+"""
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class CachedEmbeddings(Embeddings):
+    """Wraps an ``Embeddings`` object and only forwards texts that were never embedded."""
+
+    def __init__(self, underlying: Embeddings, model_name: str, memory_size: int = 10000, db_path: str = None):
+        self.underlying = underlying
+        self.model_name = model_name
+        self.memory_size = memory_size
+        self.memory = OrderedDict()
+        # Memory tier lock, only held briefly so the event loop never waits on SQLite
+        self.lock = threading.Lock()
+        self.db_lock = threading.Lock()
+        self.db = None
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self.db = sqlite3.connect(db_path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, model TEXT, dim INTEGER, vector BLOB)"
+            )
+            self.db.commit()
+            # Row count kept in memory so stats() never touches SQLite on the event loop
+            self.disk_entries = self.db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        else:
+            self.disk_entries = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\x00{text}".encode()).hexdigest()
+
+    def _lookup_memory(self, keys: list) -> dict:
+        """Return cached vectors for the keys found in memory."""
+        found = {}
+        with self.lock:
+            for key in keys:
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+                    found[key] = self.memory[key]
+                    self.memory_hits += 1
+        return found
+
+    def _lookup_disk(self, keys: list) -> dict:
+        """Return cached vectors for the keys found on disk, promoting them to memory."""
+        found = {}
+        if self.db is None or not keys:
+            return found
+        with self.db_lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                rows = self.db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        with self.lock:
+            for key, vector in found.items():
+                self._remember(key, vector)
+            self.disk_hits += len(found)
+        return found
+
+    def _lookup(self, keys: list) -> dict:
+        """Return cached vectors for the keys found in memory or on disk."""
+        found = self._lookup_memory(keys)
+        found.update(self._lookup_disk([key for key in dict.fromkeys(keys) if key not in found]))
+        return found
+
+    def _remember(self, key: str, vector: list):
+        self.memory[key] = vector
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def _store_memory(self, new_vectors: dict):
+        with self.lock:
+            for key, vector in new_vectors.items():
+                self._remember(key, vector)
+
+    def _store_disk(self, new_vectors: dict):
+        if self.db is None or not new_vectors:
+            return
+        with self.db_lock:
+            # Keys are content-addressed, so an existing row already holds the same vector
+            cursor = self.db.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, model, dim, vector) VALUES (?, ?, ?, ?)",
+                [
+                    (key, self.model_name, len(vector), np.asarray(vector, dtype=np.float32).tobytes())
+                    for key, vector in new_vectors.items()
+                ],
+            )
+            self.db.commit()
+            self.disk_entries += cursor.rowcount
+
+    def _store(self, new_vectors: dict):
+        self._store_memory(new_vectors)
+        self._store_disk(new_vectors)
+
+    def _missing_texts(self, texts: list, keys: list, found: dict) -> list:
+        missing = {}
+        for text, key in zip(texts, keys):
+            if key not in found and key not in missing:
+                missing[key] = text
+        self.misses += len(missing)
+        return list(missing.items())
+
+    def embed_documents(self, texts: list) -> list:
+        keys = [self._key(text) for text in texts]
+        found = self._lookup(keys)
+        missing = self._missing_texts(texts, keys, found)
+        if missing:
+            vectors = self.underlying.embed_documents([text for _, text in missing])
+            new_vectors = {key: list(vector) for (key, _), vector in zip(missing, vectors)}
+            self._store(new_vectors)
+            found.update(new_vectors)
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> list:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: list) -> list:
+        keys = [self._key(text) for text in texts]
+        found = self._lookup_memory(keys)
+        not_in_memory = [key for key in dict.fromkeys(keys) if key not in found]
+        if self.db is not None and not_in_memory:
+            found.update(await asyncio.to_thread(self._lookup_disk, not_in_memory))
+        missing = self._missing_texts(texts, keys, found)
+        if missing:
+            vectors = await self.underlying.aembed_documents([text for _, text in missing])
+            new_vectors = {key: list(vector) for (key, _), vector in zip(missing, vectors)}
+            # Memory first, so concurrent lookups hit before the disk write is done
+            self._store_memory(new_vectors)
+            if self.db is not None:
+                await asyncio.to_thread(self._store_disk, new_vectors)
+            found.update(new_vectors)
+        return [found[key] for key in keys]
+
+    async def aembed_query(self, text: str) -> list:
+        return (await self.aembed_documents([text]))[0]
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "model": self.model_name,
+            "memory_entries": len(self.memory),
+            "memory_size": self.memory_size,
+            "disk_entries": self.disk_entries,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
@@ -1,6 +1,24 @@
 from langchain_ollama import OllamaEmbeddings, OllamaLLM
 
-from app.config.config import EMBEDDING_MODEL, OLLAMA_BASE_URL, OLLAMA_MODEL
+from app.config.config import (
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_CACHE_MEMORY_SIZE,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_MODEL,
+    OLLAMA_BASE_URL,
+    OLLAMA_MODEL,
+)
+from app.llm.embedding_cache import CachedEmbeddings
 
 llm = OllamaLLM(model=OLLAMA_MODEL, base_url=OLLAMA_BASE_URL)
-embeddings = OllamaEmbeddings(model=EMBEDDING_MODEL, base_url=OLLAMA_BASE_URL)
+ollama_embeddings = OllamaEmbeddings(model=EMBEDDING_MODEL, base_url=OLLAMA_BASE_URL)
+
+# Every caller shares the content-addressed cache, so repeated texts are embedded once
+embeddings = ollama_embeddings
+if EMBEDDING_CACHE_ENABLED:
+    embeddings = CachedEmbeddings(
+        ollama_embeddings,
+        model_name=EMBEDDING_MODEL,
+        memory_size=EMBEDDING_CACHE_MEMORY_SIZE,
+        db_path=EMBEDDING_CACHE_PATH,
+    )
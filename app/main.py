@@ -3,19 +3,40 @@ Simple Insurance Chatbot API
 A basic LLMOps application using FastAPI, LangChain, and Ollama
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config.config import API_TITLE, API_VERSION
+from app.evaluation.background_evaluator import background_evaluator
+from app.health import health_supervisor
 from app.routes import router
+from app.tracking import close_backends
+from app.vector_store.index_reloader import index_reloader
 
 origins = ["http://localhost:5173"]  # Vite dev server
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await health_supervisor.start()
+    await background_evaluator.start()
+    await index_reloader.start()
+    yield
+    await index_reloader.stop()
+    await health_supervisor.stop()
+    # Drain queued evaluations before releasing pooled Ollama connections
+    await background_evaluator.stop()
+    await close_backends()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title=API_TITLE,
     version=API_VERSION,
     description="A simple insurance chatbot using Ollama and LangChain",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -11,9 +11,36 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     response: str
     sources: Optional[List[str]] = None
+    cached: bool = False
+
+
+class BatchChatRequest(BaseModel):
+    items: List[ChatRequest]
+    evaluate: bool = False
+
+
+class BatchChatItemResult(BaseModel):
+    index: int
+    response: Optional[str] = None
+    sources: Optional[List[str]] = None
+    cached: bool = False
+    error: Optional[str] = None
+    retrieval_time: float = 0.0
+    generation_time: float = 0.0
+    total_time: float = 0.0
+
+
+class BatchChatResponse(BaseModel):
+    results: List[BatchChatItemResult]
+    total_items: int
+    failed_items: int
+    retrieval_time: float
+    total_time: float
 
 
 class HealthResponse(BaseModel):
     status: str
     ollama_status: str
     vector_store_status: str
+    embeddings_status: Optional[str] = None
+    last_checked: Optional[str] = None
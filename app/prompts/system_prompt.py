@@ -25,3 +25,16 @@ Rate each response on a scale of 1-5 for each criterion, where:
 5 = Excellent (comprehensive and accurate)
 
 Provide specific feedback on what could be improved."""
+
+
+def build_chat_messages(message: str, context: str = "") -> list:
+    """Build the chat messages, including retrieved context when available."""
+    if context:
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT_CONTEXT},
+            {"role": "user", "content": f"Context: {context}\n\nQuestion: {message}"},
+        ]
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": message},
+    ]
@@ -1,18 +1,55 @@
+import asyncio
+import json
+import time
 from pathlib import Path
-
-from fastapi import APIRouter, HTTPException
-
-from app.config.config import CHROMA_PERSIST_DIRECTORY, OLLAMA_BASE_URL, OLLAMA_MODEL
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.cache import response_cache, single_flight
+from app.config.config import (
+    BATCH_MAX_CONCURRENCY,
+    BATCH_MAX_ITEMS,
+    CHROMA_PERSIST_DIRECTORY,
+    CONTEXT_TOKEN_BUDGET,
+    EVAL_CACHE_MODE,
+    EVAL_CONCURRENCY,
+    EVAL_MODEL_CONCURRENCY,
+    NUMPY_INDEX_PATH,
+    OLLAMA_BASE_URL,
+    OLLAMA_MODEL,
+    VECTOR_BACKEND,
+)
 from app.evaluation import eval_data
-from app.evaluation.semantic_evaluator import evaluate_production_question
-from app.llm.llm import embeddings, llm
-from app.models.models import ChatRequest, ChatResponse, HealthResponse
-from app.prompts.system_prompt import SYSTEM_PROMPT, SYSTEM_PROMPT_CONTEXT
-from app.tracking import get_ollama_response
-from app.vector_store.vector_store import get_context, vector_store
+from app.evaluation.background_evaluator import background_evaluator
+from app.health import health_supervisor
+from app.llm.embedding_batcher import embedding_batcher
+from app.llm.llm import embeddings
+from app.models.models import (
+    BatchChatItemResult,
+    BatchChatRequest,
+    BatchChatResponse,
+    ChatRequest,
+    ChatResponse,
+    HealthResponse,
+)
+from app.prompts.system_prompt import build_chat_messages
+from app.tracking import aget_ollama_response, astream_ollama_response, get_backend_stats
+from app.vector_store.index_reloader import index_reloader
+from app.vector_store.vector_store import (
+    aget_context,
+    context_stats,
+    count_documents,
+    get_contexts,
+    get_retrieval_stats,
+    get_stores,
+)
 
 router = APIRouter()
 
+STREAM_MEDIA_TYPES = {"sse": "text/event-stream", "ndjson": "application/x-ndjson"}
+
 
 @router.get("/", response_model=dict)
 async def root():
@@ -21,86 +58,246 @@ async def root():
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
-    try:
-        test_response = llm.invoke("Hello")
-        ollama_status = "healthy" if test_response else "unhealthy"
-    except Exception as e:
-        ollama_status = f"unhealthy: {str(e)}"
-    if vector_store:
-        try:
-            vector_store._collection.count()
-            vector_store_status = "healthy"
-        except Exception as e:
-            vector_store_status = f"unhealthy: {str(e)}"
-    else:
-        vector_store_status = "not initialized"
-    overall_status = "healthy" if ollama_status == "healthy" else "degraded"
-    return HealthResponse(status=overall_status, ollama_status=ollama_status, vector_store_status=vector_store_status)
+    """Report the cached capability status maintained by the health supervisor."""
+    status = health_supervisor.status
+    return HealthResponse(
+        status=health_supervisor.overall_status(),
+        ollama_status=status["llm"]["status"],
+        vector_store_status=status["vector_store"]["status"],
+        embeddings_status=status["embeddings"]["status"],
+        last_checked=status["llm"]["checked_at"],
+    )
+
+
+async def _prepare_chat(request: ChatRequest):
+    """Retrieve context for a chat request and return (messages, sources, index version)."""
+    sources = []
+    context = ""
+    embeddings_supported = health_supervisor.embeddings_available
+    stores = get_stores()
+    print(
+        f"Using context: {request.use_context}, embeddings supported: {embeddings_supported}, vector_store:  {stores.vector_store}"
+    )
+    if request.use_context and (stores.vector_store or stores.lexical_index):
+        # Lexical search needs no embedding call, so it keeps working when embeddings are degraded
+        context, sources = await aget_context(request.message, lexical_only=not embeddings_supported, stores=stores)
+        print(f"Context retrieved: {len(context)} characters, sources: {sources}")
+    return build_chat_messages(request.message, context), sources, stores.version
+
+
+def _start_chat_flight(request: ChatRequest, query_embedding=None):
+    """Join or start the shared retrieval + generation for this request.
+
+    Identical in-flight requests (same normalized message and options) share one run.
+    The run caches the response and queues it for evaluation exactly once.
+    """
+
+    async def produce(flight):
+        messages, sources, index_version = await _prepare_chat(request)
+        flight.set_sources(sources)
+
+        # Use auto-logged OpenAI client instead of direct LLM
+        async for token in astream_ollama_response(messages):
+            flight.add_token(token)
+
+        response_cache.put(
+            request.message, request.use_context, flight.response, sources, query_embedding, index_version
+        )
+
+        # Queue semantic evaluation for the background workers
+        background_evaluator.submit(request.message, flight.response)
+
+    key = response_cache.make_key(request.message, request.use_context)
+    return single_flight.run(key, produce)
 
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     try:
-        sources = []
-        context = ""
-        embeddings_supported = True
-        try:
-            _ = embeddings.embed_query("The insured person's name is Julien Look")
-        except Exception as e:
-            print(f"Embeddings not supported: {e}")
-            embeddings_supported = False
-        print(
-            f"Using context: {request.use_context}, embeddings supported: {embeddings_supported}, vector_store:  {vector_store}"
+        cached, query_embedding = await response_cache.get(
+            request.message, request.use_context, semantic=health_supervisor.embeddings_available
         )
-        if request.use_context and vector_store and embeddings_supported:
-            context, sources = get_context(request.message)
-            print(f"Context retrieved: {len(context)} characters, sources: {sources}")
-        if context:
-            messages = [
-                {
-                    "role": "system",
-                    "content": SYSTEM_PROMPT_CONTEXT,
-                },
-                {"role": "user", "content": f"Context: {context}\n\nQuestion: {request.message}"},
-            ]
-        else:
-            messages = [
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": request.message},
-            ]
+        if cached:
+            return ChatResponse(response=cached.response, sources=cached.sources or None, cached=True)
 
-        # Use auto-logged OpenAI client instead of direct LLM
-        response = get_ollama_response(messages)
-
-        # Perform semantic evaluation in background
-        try:
-            evaluation_result = await evaluate_production_question(request.message, response)
-            print(f"🔍 Semantic evaluation: {evaluation_result}")
-        except Exception as e:
-            print(f"Error in semantic evaluation: {e}")
-            evaluation_result = None
+        response, sources = await _start_chat_flight(request, query_embedding).result()
 
         return ChatResponse(response=response, sources=sources if sources else None)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
 
 
+def _format_event(event: str, data: dict, stream_format: str) -> str:
+    """Encode a stream event as a Server-Sent Event or a newline-delimited JSON line."""
+    if stream_format == "ndjson":
+        return json.dumps({"type": event, **data}) + "\n"
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _cached_event_stream(cached, stream_format: str):
+    """Replay a cached response as a stream with a single token event."""
+    yield _format_event("sources", {"sources": cached.sources}, stream_format)
+    yield _format_event("token", {"token": cached.response}, stream_format)
+    yield _format_event("done", {"response": cached.response, "cached": True}, stream_format)
+
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest, format: str = "sse"):
+    """Stream the chat response token by token.
+
+    Sources are sent first, followed by one event per token and a final ``done`` event
+    carrying the full response. ``format`` selects Server-Sent Events (``sse``) or
+    chunked newline-delimited JSON (``ndjson``). Identical concurrent requests share
+    one generation, and the full text is queued for semantic evaluation once it is complete.
+    """
+    if format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported stream format: {format}")
+    try:
+        cached, query_embedding = await response_cache.get(
+            request.message, request.use_context, semantic=health_supervisor.embeddings_available
+        )
+        if cached:
+            return StreamingResponse(_cached_event_stream(cached, format), media_type=STREAM_MEDIA_TYPES[format])
+        flight = _start_chat_flight(request, query_embedding)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
+
+    async def event_stream():
+        try:
+            async for event, payload in flight.events():
+                yield _format_event(event, {event: payload}, format)
+        except Exception as e:
+            yield _format_event("error", {"detail": f"Error processing request: {str(e)}"}, format)
+            return
+        yield _format_event("done", {"response": flight.response}, format)
+
+    return StreamingResponse(event_stream(), media_type=STREAM_MEDIA_TYPES[format])
+
+
+@router.post("/chat/batch", response_model=BatchChatResponse)
+async def chat_batch(request: BatchChatRequest):
+    """Answer a list of chat requests with shared retrieval and bounded parallel generation.
+
+    All queries that use context are embedded in one call and searched in one vector
+    query. Generation runs with at most ``BATCH_MAX_CONCURRENCY`` requests in flight.
+    Results are returned in input order with per-item errors and timings.
+    """
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch too large: {len(request.items)} > {BATCH_MAX_ITEMS} items")
+    batch_start = time.time()
+    results = [BatchChatItemResult(index=i) for i in range(len(request.items))]
+
+    # Serve exact cache hits first so they skip retrieval and generation
+    pending = []
+    for i, item in enumerate(request.items):
+        cached, _ = await response_cache.get(item.message, item.use_context, semantic=False)
+        if cached:
+            results[i].response = cached.response
+            results[i].sources = cached.sources or None
+            results[i].cached = True
+        else:
+            pending.append(i)
+
+    # Batched retrieval for every pending item that uses context
+    contexts = {i: ("", []) for i in pending}
+    context_items = [i for i in pending if request.items[i].use_context]
+    retrieval_time = 0.0
+    stores = get_stores()
+    if context_items and (stores.vector_store or stores.lexical_index):
+        retrieval_start = time.time()
+        batch_contexts = await asyncio.to_thread(
+            get_contexts,
+            [request.items[i].message for i in context_items],
+            lexical_only=not health_supervisor.embeddings_available,
+            stores=stores,
+        )
+        retrieval_time = time.time() - retrieval_start
+        for i, item_context in zip(context_items, batch_contexts):
+            contexts[i] = item_context
+            results[i].retrieval_time = retrieval_time / len(context_items)
+
+    semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+
+    async def generate(i: int):
+        item = request.items[i]
+        context, sources = contexts[i]
+        async with semaphore:
+            generation_start = time.time()
+            try:
+                response = await aget_ollama_response(build_chat_messages(item.message, context))
+                results[i].response = response
+                results[i].sources = sources or None
+                response_cache.put(item.message, item.use_context, response, sources, index_version=stores.version)
+                if request.evaluate:
+                    background_evaluator.submit(item.message, response)
+            except Exception as e:
+                results[i].error = f"Error processing request: {str(e)}"
+            results[i].generation_time = time.time() - generation_start
+
+    await asyncio.gather(*(generate(i) for i in pending))
+
+    for result in results:
+        result.total_time = result.retrieval_time + result.generation_time
+    return BatchChatResponse(
+        results=results,
+        total_items=len(results),
+        failed_items=sum(1 for result in results if result.error),
+        retrieval_time=retrieval_time,
+        total_time=time.time() - batch_start,
+    )
+
+
 @router.get("/info")
 async def get_info():
+    vector_store, _, embedding_status, _ = get_stores()
     doc_count = 0
     if vector_store:
         try:
-            doc_count = vector_store._collection.count()
+            doc_count = count_documents(vector_store)
         except:
             doc_count = "unknown"
     return {
         "model": OLLAMA_MODEL,
         "base_url": OLLAMA_BASE_URL,
         "documents_indexed": doc_count,
-        "vector_store_path": CHROMA_PERSIST_DIRECTORY,
+        "vector_backend": VECTOR_BACKEND,
+        "vector_store_path": NUMPY_INDEX_PATH if VECTOR_BACKEND == "numpy" else CHROMA_PERSIST_DIRECTORY,
+        "embedding_check": embedding_status,
+        "index_reload": index_reloader.stats(),
+        "ollama_backends": get_backend_stats(),
+        "retrieval": get_retrieval_stats(),
+        "context_builder": {"token_budget": CONTEXT_TOKEN_BUDGET, **context_stats},
+        "embedding_batcher": embedding_batcher.stats(),
+        "embedding_cache": embeddings.stats() if hasattr(embeddings, "stats") else None,
     }
 
 
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Get response cache size and hit/miss metrics, plus in-flight request coalescing counts."""
+    return {**response_cache.stats(), "single_flight": single_flight.stats()}
+
+
+@router.delete("/cache")
+async def clear_cache():
+    """Drop every cached chat response."""
+    response_cache.clear()
+    return {"status": "cleared"}
+
+
+@router.post("/index/reload")
+async def reload_index():
+    """Open the indexes currently on disk and swap them in without a restart.
+
+    In-flight requests finish on the previous indexes; if the new ones fail to open,
+    the previous ones keep serving and the error is reported.
+    """
+    stats = await index_reloader.reload("admin request")
+    if stats["last_error"]:
+        raise HTTPException(status_code=500, detail=f"Index reload failed: {stats['last_error']}")
+    return stats
+
+
 @router.get("/eval/sample")
 async def get_evaluation_sample():
     """Get a sample of evaluation questions."""
@@ -129,15 +326,30 @@ async def get_evaluation_categories():
 
 @router.post("/eval/run")
 async def run_evaluation_endpoint(
-    sample_size: int = 5, use_context: bool = False, use_llm_judge: bool = True, log_to_mlflow: bool = True
+    sample_size: int = 5,
+    use_context: bool = False,
+    use_llm_judge: bool = True,
+    log_to_mlflow: bool = True,
+    concurrency: int = EVAL_CONCURRENCY,
+    cache_mode: str = EVAL_CACHE_MODE,
+    model: str = OLLAMA_MODEL,
 ):
-    """Run evaluation on a sample of questions with optional MLflow tracking."""
+    """Run evaluation on a sample of questions with optional MLflow tracking.
+
+    ``cache_mode`` (read_write, read_only, refresh or off) controls reuse of memoized answers and verdicts.
+    """
     try:
         from app.evaluation.evaluator import run_evaluation, save_evaluation_results
 
         # Run the evaluation
         results = await run_evaluation(
-            sample_size=sample_size, use_context=use_context, use_llm_judge=use_llm_judge, log_to_mlflow=log_to_mlflow
+            sample_size=sample_size,
+            use_context=use_context,
+            use_llm_judge=use_llm_judge,
+            log_to_mlflow=log_to_mlflow,
+            concurrency=concurrency,
+            cache_mode=cache_mode,
+            model=model,
         )
 
         # Save results to file
@@ -155,6 +367,46 @@ async def run_evaluation_endpoint(
         return {"status": "error", "error": str(e)}
 
 
+@router.post("/eval/matrix")
+async def run_evaluation_matrix_endpoint(
+    models: List[str] = Query([OLLAMA_MODEL]),
+    prompts: List[str] = Query(["SYSTEM_PROMPT"]),
+    sample_size: Optional[int] = None,
+    use_llm_judge: bool = True,
+    concurrency: int = EVAL_CONCURRENCY,
+    model_concurrency: int = EVAL_MODEL_CONCURRENCY,
+    cache_mode: str = EVAL_CACHE_MODE,
+    quality_bar: Optional[float] = None,
+    log_to_mlflow: bool = True,
+    use_context: bool = False,
+):
+    """Evaluate every model x prompt variant and report quality, latency and the Pareto front.
+
+    ``prompts`` are constants of app/prompts/system_prompt.py or prompt files such as
+    prompt_v1.txt in tests/prompts; ``sample_size`` defaults to the whole dataset.
+    """
+    try:
+        from app.evaluation.matrix import run_matrix, save_matrix_report
+
+        matrix = await run_matrix(
+            models,
+            prompts,
+            sample_size=sample_size,
+            use_llm_judge=use_llm_judge,
+            concurrency=concurrency,
+            model_concurrency=model_concurrency,
+            cache_mode=cache_mode,
+            quality_bar=quality_bar,
+            log_to_mlflow=log_to_mlflow,
+            use_context=use_context,
+        )
+        filepath = save_matrix_report(matrix["report"])
+        return {"status": "completed", "report": matrix["report"], "report_file": filepath}
+
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
 @router.get("/eval/production/stats")
 async def get_production_evaluation_stats():
     """Get statistics about production evaluations."""
@@ -180,6 +432,12 @@ async def get_production_evaluation_stats():
         return {"error": str(e)}
 
 
+@router.get("/eval/production/queue")
+async def get_production_evaluation_queue():
+    """Get depth, lag and drop counts of the background evaluation queue."""
+    return background_evaluator.stats()
+
+
 @router.get("/eval/production/new-questions")
 async def get_new_questions():
     """Get list of new questions that weren't matched in evaluation dataset."""
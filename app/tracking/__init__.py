@@ -1 +1,8 @@
-from .tracker import get_ollama_response
+from .tracker import (
+    aget_ollama_response,
+    aget_ollama_response_with_metrics,
+    astream_ollama_response,
+    close_backends,
+    get_backend_stats,
+    get_ollama_response,
+)
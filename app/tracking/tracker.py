@@ -1,9 +1,22 @@
 """MLflow auto-tracking for Ollama via OpenAI-compatible API."""
 
+import asyncio
+import time
+
+import httpx
 import mlflow
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
-from app.config.config import OLLAMA_BASE_URL, OLLAMA_MODEL
+from app.config.config import (
+    MAX_TOKENS,
+    OLLAMA_BASE_URL,
+    OLLAMA_KEEPALIVE_EXPIRY,
+    OLLAMA_MAX_CONCURRENCY,
+    OLLAMA_MAX_CONNECTIONS,
+    OLLAMA_MODEL,
+    OLLAMA_REQUEST_TIMEOUT,
+    TEMPERATURE,
+)
 
 # Enable auto-tracing for OpenAI
 mlflow.openai.autolog()
@@ -16,7 +29,99 @@ mlflow.set_experiment("insurance_chatbot")
 client = OpenAI(base_url=f"{OLLAMA_BASE_URL}/v1", api_key="dummy")  # Required but not used by Ollama
 
 
-def get_ollama_response(messages: list, temperature: float = 0.7, max_tokens: int = 1000):
+class OllamaBackend:
+    """Pooled async client and in-flight limit for a single Ollama server."""
+
+    def __init__(self, base_url: str, max_concurrency: int = OLLAMA_MAX_CONCURRENCY):
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.waiting = 0
+        self.total_requests = 0
+        self.loop = asyncio.get_running_loop()
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        # Keep-alive connections are reused across requests to the same backend
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=OLLAMA_MAX_CONNECTIONS,
+                max_keepalive_connections=OLLAMA_MAX_CONNECTIONS,
+                keepalive_expiry=OLLAMA_KEEPALIVE_EXPIRY,
+            ),
+            timeout=OLLAMA_REQUEST_TIMEOUT,
+        )
+        self.client = AsyncOpenAI(base_url=f"{base_url}/v1", api_key="dummy", http_client=self.http_client)
+
+    async def __aenter__(self):
+        self.waiting += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        self.total_requests += 1
+        return self.client
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.in_flight -= 1
+        self.semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "total_requests": self.total_requests,
+        }
+
+
+# Backends keyed by (event loop, base_url): connections and semaphores are bound to the loop that created them
+_backends = {}
+
+
+def _prune_closed_loops():
+    """Forget backends of event loops that have been closed; nothing can await their clients any more."""
+    for key in [key for key, backend in _backends.items() if backend.loop.is_closed()]:
+        del _backends[key]
+
+
+def get_backend(base_url: str = OLLAMA_BASE_URL) -> OllamaBackend:
+    """Return the pooled backend for ``base_url``, creating it on first use in this event loop."""
+    loop = asyncio.get_running_loop()
+    backend = _backends.get((loop, base_url))
+    if backend is None:
+        _prune_closed_loops()
+        backend = OllamaBackend(base_url)
+        _backends[(loop, base_url)] = backend
+    return backend
+
+
+def _current_backends() -> dict:
+    """Backends of the running event loop by base_url (empty outside a loop)."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return {}
+    return {base_url: backend for (backend_loop, base_url), backend in _backends.items() if backend_loop is loop}
+
+
+def get_backend_stats() -> dict:
+    """Return connection and concurrency statistics for every Ollama backend in use by this event loop."""
+    return {base_url: backend.stats() for base_url, backend in _current_backends().items()}
+
+
+async def close_backends():
+    """Close pooled HTTP connections for the backends of this event loop."""
+    loop = asyncio.get_running_loop()
+    for base_url, backend in _current_backends().items():
+        try:
+            await backend.client.close()
+        except Exception as e:
+            print(f"Error closing Ollama client for {backend.base_url}: {e}")
+        del _backends[(loop, base_url)]
+    _prune_closed_loops()
+
+
+def get_ollama_response(messages: list, temperature: float = TEMPERATURE, max_tokens: int = MAX_TOKENS):
     """Get response from Ollama using OpenAI-compatible API with auto-logging.
 
     Args:
@@ -31,3 +136,130 @@ def get_ollama_response(messages: list, temperature: float = 0.7, max_tokens: in
         model=OLLAMA_MODEL, messages=messages, temperature=temperature, max_tokens=max_tokens
     )
     return response.choices[0].message.content
+
+
+async def aget_ollama_response(
+    messages: list,
+    temperature: float = TEMPERATURE,
+    max_tokens: int = MAX_TOKENS,
+    base_url: str = OLLAMA_BASE_URL,
+    model: str = OLLAMA_MODEL,
+):
+    """Async variant of ``get_ollama_response`` using pooled connections.
+
+    Waits for a free slot when the backend already has ``OLLAMA_MAX_CONCURRENCY``
+    requests in flight.
+
+    Args:
+        messages: List of message dicts with 'role' and 'content'
+        temperature: Sampling temperature
+        max_tokens: Maximum tokens to generate
+        base_url: Ollama server to send the request to
+        model: Ollama model to generate with
+
+    Returns:
+        Response text from the model
+    """
+    async with get_backend(base_url) as async_client:
+        response = await async_client.chat.completions.create(
+            model=model, messages=messages, temperature=temperature, max_tokens=max_tokens
+        )
+    return response.choices[0].message.content
+
+
+async def aget_ollama_response_with_metrics(
+    messages: list,
+    temperature: float = TEMPERATURE,
+    max_tokens: int = MAX_TOKENS,
+    base_url: str = OLLAMA_BASE_URL,
+    model: str = OLLAMA_MODEL,
+):
+    """``aget_ollama_response`` that streams the completion to measure it.
+
+    Timing starts once a backend slot is acquired, so queueing is not counted. Token
+    counts come from the usage Ollama reports at the end of the stream (None if absent).
+
+    Args:
+        messages: List of message dicts with 'role' and 'content'
+        temperature: Sampling temperature
+        max_tokens: Maximum tokens to generate
+        base_url: Ollama server to send the request to
+        model: Ollama model to generate with
+
+    Returns:
+        Tuple of (response text, metrics) where metrics holds wall_time, time_to_first_token,
+        prompt_tokens, completion_tokens and tokens_per_second (completion tokens per second
+        of generation after the first token)
+    """
+    parts = []
+    usage = None
+    first_token_time = None
+    async with get_backend(base_url) as async_client:
+        start_time = time.perf_counter()
+        stream = await async_client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        async for chunk in stream:
+            if chunk.usage:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if first_token_time is None:
+                    first_token_time = time.perf_counter()
+                parts.append(delta)
+        end_time = time.perf_counter()
+
+    wall_time = end_time - start_time
+    time_to_first_token = first_token_time - start_time if first_token_time is not None else None
+    completion_tokens = usage.completion_tokens if usage else None
+    tokens_per_second = None
+    if completion_tokens:
+        generation_time = end_time - first_token_time if first_token_time is not None else 0
+        tokens_per_second = completion_tokens / (generation_time if generation_time > 0 else wall_time)
+    return "".join(parts), {
+        "wall_time": wall_time,
+        "time_to_first_token": time_to_first_token,
+        "prompt_tokens": usage.prompt_tokens if usage else None,
+        "completion_tokens": completion_tokens,
+        "tokens_per_second": tokens_per_second,
+    }
+
+
+async def astream_ollama_response(
+    messages: list,
+    temperature: float = TEMPERATURE,
+    max_tokens: int = MAX_TOKENS,
+    base_url: str = OLLAMA_BASE_URL,
+    model: str = OLLAMA_MODEL,
+):
+    """Stream a response from Ollama token by token over pooled connections.
+
+    The backend slot is held until the stream is exhausted or closed.
+
+    Args:
+        messages: List of message dicts with 'role' and 'content'
+        temperature: Sampling temperature
+        max_tokens: Maximum tokens to generate
+        base_url: Ollama server to send the request to
+        model: Ollama model to generate with
+
+    Yields:
+        Text deltas as the model produces them
+    """
+    async with get_backend(base_url) as async_client:
+        stream = await async_client.chat.completions.create(
+            model=model, messages=messages, temperature=temperature, max_tokens=max_tokens, stream=True
+        )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
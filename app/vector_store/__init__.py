@@ -1 +1,15 @@
-from .vector_store import *
+"""
+Retrieval indexes. Importing the package opens nothing: the vector store module (which
+loads the persisted indexes on import) is only imported when one of its names is used,
+so tools like the offline benchmarks can import ``numpy_index`` on its own.
+"""
+
+import importlib
+import importlib.util
+
+
+def __getattr__(name: str):
+    # Submodules are imported as such; any other name comes from vector_store
+    if importlib.util.find_spec(f"{__name__}.{name}") is not None:
+        return importlib.import_module(f"{__name__}.{name}")
+    return getattr(importlib.import_module(f"{__name__}.vector_store"), name)
@@ -0,0 +1,79 @@
+"""
+Product-line categories for chunks and queries.
+Ingestion tags every chunk with the category whose keywords it mentions most;
+at query time the router picks one or two category partitions to search, or
+none (global search) when the query matches no category clearly.
+"""
+
+from app.vector_store.context_builder import tokenize
+
+# Same product lines as app/evaluation/eval_data.get_question_categories
+CATEGORY_KEYWORDS = {
+    "auto": "auto car vehicle driver driving collision motorist accident liability comprehensive truck motorcycle",
+    "home": "home homeowner house dwelling property flood earthquake renter roof belongings condo mold landlord",
+    "life": "life term whole universal beneficiary death funeral annuity estate",
+    "health": "health medical hospital doctor prescription copay coinsurance hmo ppo hsa fsa cobra dental vision "
+    "medicare medicaid preventive",
+    "general": "contact customer service payment pay quote hours business agent account billing cancel refund",
+}
+DEFAULT_CATEGORY = "general"
+
+# Keyword stems per category, stemmed the same way as chunk and query text
+_CATEGORY_TERMS = {category: set(tokenize(keywords)) for category, keywords in CATEGORY_KEYWORDS.items()}
+
+# A second partition is searched when it scores at least this fraction of the best one
+SECOND_PARTITION_RATIO = 0.5
+
+
+def category_scores(text: str) -> dict:
+    """Number of category keyword occurrences in ``text``, per category."""
+    scores = dict.fromkeys(_CATEGORY_TERMS, 0)
+    for term in tokenize(text):
+        for category, terms in _CATEGORY_TERMS.items():
+            if term in terms:
+                scores[category] += 1
+    return scores
+
+
+def classify_text(text: str) -> str:
+    """Category for a chunk: the one with the most keyword hits, or ``DEFAULT_CATEGORY``."""
+    scores = category_scores(text)
+    best = max(scores, key=scores.get)
+    return best if scores[best] else DEFAULT_CATEGORY
+
+
+class CategoryRouter:
+    """Keyword router that picks the partitions a query should search."""
+
+    def __init__(self, max_partitions: int = 2):
+        self.max_partitions = max_partitions
+        self.routed = dict.fromkeys(_CATEGORY_TERMS, 0)
+        self.global_searches = 0
+        # Routed searches that found too few chunks and were retried globally
+        self.fallbacks = 0
+
+    def route(self, query: str) -> list:
+        """Return the categories to search, best first; an empty list means search everything."""
+        scores = category_scores(query)
+        ranked = sorted((category for category in scores if scores[category]), key=scores.get, reverse=True)
+        categories = ranked[:1]
+        for category in ranked[1 : self.max_partitions]:
+            if scores[category] >= SECOND_PARTITION_RATIO * scores[ranked[0]]:
+                categories.append(category)
+        # No keyword matched, or a category left out ties with one that was picked
+        if not categories or (
+            len(ranked) > len(categories) and scores[ranked[len(categories)]] == scores[categories[-1]]
+        ):
+            self.global_searches += 1
+            return []
+        for category in categories:
+            self.routed[category] += 1
+        return categories
+
+    def stats(self) -> dict:
+        return {
+            "max_partitions": self.max_partitions,
+            "routed": dict(self.routed),
+            "global": self.global_searches,
+            "fallbacks": self.fallbacks,
+        }
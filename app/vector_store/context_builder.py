@@ -0,0 +1,229 @@
+"""
+Token-budgeted context assembly with extractive compression.
+Overlapping chunks are merged into spans and near-duplicates dropped, then
+sentences are ranked by lexical relevance to the query and the best ones are
+kept, in document order, until the budget is spent.
+"""
+
+import math
+import re
+
+from langchain_core.documents import Document
+
+from app.config.config import CONTEXT_TOKEN_BUDGET
+
+STOP_WORDS = {
+    "a",
+    "an",
+    "and",
+    "are",
+    "as",
+    "at",
+    "be",
+    "but",
+    "by",
+    "can",
+    "do",
+    "does",
+    "for",
+    "from",
+    "how",
+    "i",
+    "if",
+    "in",
+    "is",
+    "it",
+    "my",
+    "of",
+    "on",
+    "or",
+    "should",
+    "that",
+    "the",
+    "this",
+    "to",
+    "what",
+    "when",
+    "will",
+    "with",
+    "would",
+    "you",
+    "your",
+}
+
+# Chunks from the same source this many characters apart are merged into one span
+MERGE_MAX_GAP = 2
+# Jaccard similarity of word shingles above which a chunk counts as a duplicate
+DUPLICATE_THRESHOLD = 0.8
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Split after sentence punctuation (but not list numbers like "1.") and on line breaks
+_SENTENCE_SPLIT = re.compile(r"(?<=[^\d\s][.!?])\s+|\n+")
+_TERM = re.compile(r"[a-z0-9]+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)."""
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def _stem(term: str) -> str:
+    return term[:-1] if len(term) > 3 and term.endswith("s") and not term.endswith("ss") else term
+
+
+def tokenize(text: str) -> list:
+    """Lowercase, lightly stemmed word terms without stop words."""
+    return [_stem(term) for term in _TERM.findall(text.lower()) if term not in STOP_WORDS]
+
+
+def split_sentences(text: str) -> list:
+    return [sentence.strip() for sentence in _SENTENCE_SPLIT.split(text) if sentence.strip()]
+
+
+def source_label(doc) -> str:
+    """Source path, with the character span when the chunk offsets are known."""
+    source = doc.metadata.get("source", "unknown")
+    start, end = doc.metadata.get("start_index"), doc.metadata.get("end_index")
+    if start is None or start < 0:
+        return source
+    if end is None:
+        end = start + len(doc.page_content)
+    return f"{source}#{start}-{end}"
+
+
+def _shingles(text: str, size: int = 3) -> set:
+    words = _TERM.findall(text.lower())
+    return {" ".join(words[i : i + size]) for i in range(max(len(words) - size + 1, 1))}
+
+
+def merge_chunks(docs: list, max_gap: int = MERGE_MAX_GAP, duplicate_threshold: float = DUPLICATE_THRESHOLD) -> list:
+    """Merge overlapping or adjacent chunks from the same source and drop near-duplicates.
+
+    Chunks with ``start_index`` metadata from the same source are merged into one span
+    when they overlap or are at most ``max_gap`` characters apart. Remaining chunks
+    whose word shingles overlap a kept chunk by ``duplicate_threshold`` (Jaccard) or
+    more are dropped. Merged spans keep the rank of their best-ranked chunk.
+    """
+    spans = []
+    by_source = {}
+    for rank, doc in enumerate(docs):
+        start = doc.metadata.get("start_index")
+        if start is None or start < 0:
+            spans.append((rank, doc))
+        else:
+            by_source.setdefault(doc.metadata.get("source", "unknown"), []).append((rank, doc))
+
+    for chunks in by_source.values():
+        chunks.sort(key=lambda item: item[1].metadata["start_index"])
+        rank, current = chunks[0]
+        text = current.page_content
+        start = current.metadata["start_index"]
+        end = start + len(text)
+        for next_rank, chunk in chunks[1:]:
+            chunk_start = chunk.metadata["start_index"]
+            chunk_end = chunk_start + len(chunk.page_content)
+            if chunk_start <= end + max_gap:
+                if chunk_end > end:
+                    overlap = end - chunk_start
+                    text = text + chunk.page_content[overlap:] if overlap >= 0 else text + "\n" + chunk.page_content
+                    end = chunk_end
+                rank = min(rank, next_rank)
+                continue
+            spans.append((rank, _span_document(current, text, start, end)))
+            rank, current, text, start, end = next_rank, chunk, chunk.page_content, chunk_start, chunk_end
+        spans.append((rank, _span_document(current, text, start, end)))
+
+    merged = []
+    kept_shingles = []
+    for _, doc in sorted(spans, key=lambda item: item[0]):
+        shingles = _shingles(doc.page_content)
+        if any(len(shingles & other) / len(shingles | other) >= duplicate_threshold for other in kept_shingles):
+            continue
+        kept_shingles.append(shingles)
+        merged.append(doc)
+    return merged
+
+
+def _span_document(doc, text: str, start: int, end: int):
+    return Document(page_content=text, metadata={**doc.metadata, "start_index": start, "end_index": end})
+
+
+def build_context(query: str, docs: list, token_budget: int = CONTEXT_TOKEN_BUDGET):
+    """Assemble the prompt context from retrieved documents within ``token_budget`` tokens.
+
+    Args:
+        query: User question the context should answer
+        docs: Retrieved documents, best match first
+        token_budget: Maximum context tokens; 0 or less keeps every chunk unchanged
+
+    Returns:
+        Tuple of (context, sources, stats) where sources are unique spans of the
+        documents that contributed text and stats reports original, kept and saved tokens
+    """
+    original_tokens = estimate_tokens("\n".join(doc.page_content for doc in docs))
+    docs = merge_chunks(docs)
+    full_context = "\n".join(doc.page_content for doc in docs)
+    merged_tokens = estimate_tokens(full_context)
+    if token_budget <= 0 or merged_tokens <= token_budget:
+        sources = list(dict.fromkeys(source_label(doc) for doc in docs))
+        stats = {
+            "original_tokens": original_tokens,
+            "context_tokens": merged_tokens,
+            "tokens_saved": original_tokens - merged_tokens,
+        }
+        return full_context, sources, stats
+
+    sentences = []
+    seen = set()
+    for doc_index, doc in enumerate(docs):
+        for position, sentence in enumerate(split_sentences(doc.page_content)):
+            # Overlapping chunks repeat sentences; keep the first occurrence only
+            if sentence.lower() in seen:
+                continue
+            seen.add(sentence.lower())
+            sentences.append((doc_index, position, sentence, set(tokenize(sentence))))
+    if not sentences:
+        return "", [], {"original_tokens": original_tokens, "context_tokens": 0, "tokens_saved": original_tokens}
+
+    # Inverse document frequency over sentences, so rare query terms weigh more
+    document_frequency = {}
+    for _, _, _, terms in sentences:
+        for term in terms:
+            document_frequency[term] = document_frequency.get(term, 0) + 1
+    query_terms = set(tokenize(query))
+    average_length = sum(len(terms) for _, _, _, terms in sentences) / len(sentences) or 1.0
+
+    def score(entry):
+        # BM25 with binary term frequency; ties go to higher-ranked documents
+        doc_index, _, _, terms = entry
+        idf = sum(math.log(1 + len(sentences) / document_frequency[term]) for term in terms & query_terms)
+        length_norm = 1 - BM25_B + BM25_B * len(terms) / average_length
+        return idf * (BM25_K1 + 1) / (1 + BM25_K1 * length_norm) - doc_index * 1e-3
+
+    kept = []
+    used_tokens = 0
+    for entry in sorted(sentences, key=score, reverse=True):
+        # Sentences sharing no terms with the query are not worth their tokens
+        if kept and not entry[3] & query_terms:
+            break
+        sentence_tokens = estimate_tokens(entry[2]) + 1
+        if used_tokens + sentence_tokens > token_budget:
+            continue
+        kept.append(entry)
+        used_tokens += sentence_tokens
+
+    kept.sort(key=lambda entry: (entry[0], entry[1]))
+    context = "\n".join(entry[2] for entry in kept)
+    kept_docs = sorted({entry[0] for entry in kept})
+    sources = list(dict.fromkeys(source_label(docs[doc_index]) for doc_index in kept_docs))
+    context_tokens = estimate_tokens(context)
+    stats = {
+        "original_tokens": original_tokens,
+        "context_tokens": context_tokens,
+        "tokens_saved": original_tokens - context_tokens,
+        "sentences_kept": len(kept),
+        "sentences_total": len(sentences),
+    }
+    return context, sources, stats
@@ -0,0 +1,77 @@
+"""
+Versioned vector store collections and the pointer to the active one.
+Each collection records the embedding model, dimension and normalization it
+was built with, so query-time embeddings can be checked against it. A
+migration writes a new collection and then swaps the pointer atomically.
+"""
+
+import json
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+ACTIVE_COLLECTION_FILE = "active_collection.json"
+# Collection name used by langchain_chroma before collections were versioned
+LEGACY_COLLECTION_NAME = "langchain"
+
+EMBEDDING_METADATA_KEYS = ("embedding_model", "embedding_dimension", "embedding_normalized")
+DIMENSION_PROBE = "Embedding dimension probe"
+
+
+def get_active_collection(persist_directory: str) -> str:
+    """Name of the collection the API and incremental ingestion use."""
+    path = Path(persist_directory) / ACTIVE_COLLECTION_FILE
+    if not path.exists():
+        return LEGACY_COLLECTION_NAME
+    with open(path, "r") as f:
+        return json.load(f)["collection"]
+
+
+def set_active_collection(persist_directory: str, collection_name: str):
+    """Point at ``collection_name``; the pointer file is replaced atomically."""
+    path = Path(persist_directory) / ACTIVE_COLLECTION_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(".tmp")
+    with open(temp_path, "w") as f:
+        json.dump({"collection": collection_name, "activated_at": datetime.now().isoformat()}, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def new_collection_name(embedding_model: str) -> str:
+    """Versioned collection name, e.g. ``docs-nomic-embed-text-20250101120000``."""
+    slug = re.sub(r"[^a-zA-Z0-9]+", "-", embedding_model).strip("-").lower()
+    return f"docs-{slug}-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+
+
+def describe_embeddings(embedding_function, embedding_model: str) -> dict:
+    """Collection metadata for ``embedding_model``, probing one vector for its dimension and norm."""
+    vector = np.asarray(embedding_function.embed_query(DIMENSION_PROBE), dtype=np.float32)
+    return {
+        "embedding_model": embedding_model,
+        "embedding_dimension": int(vector.shape[0]),
+        "embedding_normalized": bool(abs(float(np.linalg.norm(vector)) - 1.0) < 1e-3),
+    }
+
+
+def embedding_info(metadata: dict) -> dict:
+    """The embedding fields recorded in collection (or index) metadata."""
+    metadata = metadata or {}
+    return {key: metadata.get(key) for key in EMBEDDING_METADATA_KEYS}
+
+
+def check_compatibility(metadata: dict, embedding_model: str, dimension: int = None) -> str:
+    """Return a description of the mismatch between stored and query embeddings, or None if compatible.
+
+    Collections without recorded metadata (built before versioning) are reported as unknown.
+    """
+    info = embedding_info(metadata)
+    if info["embedding_model"] is None:
+        return "collection does not record its embedding model"
+    if info["embedding_model"] != embedding_model:
+        return f"collection was embedded with {info['embedding_model']}, queries use {embedding_model}"
+    if dimension is not None and info["embedding_dimension"] not in (None, dimension):
+        return f"collection has {info['embedding_dimension']}-dimensional vectors, queries have {dimension}"
+    return None
@@ -0,0 +1,154 @@
+"""
+Hot reload of the retrieval indexes without restarting the API.
+A background task watches the files re-indexing and migration write last (the
+active collection pointer, the NumPy index metadata and the lexical index). Once
+they stop changing, the new indexes are opened and warmed in a worker thread and
+swapped in as one snapshot; requests already retrieving finish on the old one.
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+
+from app.config.config import (
+    CHROMA_PERSIST_DIRECTORY,
+    INDEX_WATCH_INTERVAL,
+    LEXICAL_INDEX_PATH,
+    NUMPY_INDEX_PATH,
+    VECTOR_BACKEND,
+)
+from app.llm.llm import embeddings
+from app.vector_store.index_registry import ACTIVE_COLLECTION_FILE
+from app.vector_store.numpy_index import META_FILE
+from app.vector_store.vector_store import _search_by_vector, count_documents, get_stores, load_stores, swap_stores
+
+WARM_UP_QUERY = "What does my insurance policy cover?"
+
+
+def _watched_paths() -> list:
+    paths = [os.path.join(CHROMA_PERSIST_DIRECTORY, ACTIVE_COLLECTION_FILE), LEXICAL_INDEX_PATH]
+    if VECTOR_BACKEND == "numpy":
+        paths.append(os.path.join(NUMPY_INDEX_PATH, META_FILE))
+    return paths
+
+
+def index_signature() -> tuple:
+    """Modification times of the watched index files (None for a missing file)."""
+    signature = []
+    for path in _watched_paths():
+        try:
+            signature.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def warm_up(stores):
+    """Query each index once so the first requests after a swap don't pay for loading it."""
+    if stores.vector_store is not None:
+        try:
+            query_embedding = embeddings.embed_query(WARM_UP_QUERY)
+        except Exception as e:
+            # Embeddings are down: still open the collection, lexical search keeps serving
+            print(f"⚠️ Index warm-up without embeddings: {e}")
+            count_documents(stores.vector_store)
+        else:
+            _search_by_vector(stores.vector_store, query_embedding, 1)
+    if stores.lexical_index is not None:
+        stores.lexical_index.search(WARM_UP_QUERY, 1)
+
+
+class IndexReloader:
+    """Watches the persisted indexes and swaps in new ones when they change."""
+
+    def __init__(self, interval: float = INDEX_WATCH_INTERVAL):
+        self.interval = interval
+        self.signature = index_signature()
+        self.lock = asyncio.Lock()
+        self.task = None
+        self.reloads = 0
+        self.failures = 0
+        self.last_reload = None
+        self.last_error = None
+
+    async def start(self):
+        """Start watching the index files; an interval of 0 leaves only manual reloads."""
+        if self.interval > 0 and self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def _run(self):
+        pending = None
+        while True:
+            await asyncio.sleep(self.interval)
+            signature = await asyncio.to_thread(index_signature)
+            if signature == self.signature:
+                pending = None
+            elif signature != pending:
+                # Wait one more interval so a re-index that is still writing finishes first
+                pending = signature
+            else:
+                pending = None
+                await self.reload("index files changed")
+
+    async def reload(self, reason: str = "manual") -> dict:
+        """Open and warm the indexes currently on disk, then swap them in.
+
+        The current indexes keep serving if the new vector store or lexical index
+        fails to open or warm up.
+        """
+        async with self.lock:
+            start_time = time.time()
+            signature = await asyncio.to_thread(index_signature)
+            current = get_stores()
+            try:
+                # A fresh client, so deletes made by the re-ingest process are visible
+                stores = await asyncio.to_thread(load_stores, True)
+                if stores.vector_store is None and current.vector_store is not None:
+                    raise RuntimeError(stores.embedding_status.get("detail") or "vector store failed to open")
+                if stores.lexical_index is None and current.lexical_index is not None:
+                    raise RuntimeError("lexical index failed to load")
+                await asyncio.to_thread(warm_up, stores)
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                # Don't retry the same files on every poll; the next change triggers a new attempt
+                self.signature = signature
+                print(f"❌ Index reload failed, still serving {current.embedding_status.get('collection')}: {e}")
+                return self.stats()
+
+            swap_stores(stores)
+            self.signature = signature
+            self.reloads += 1
+            self.last_error = None
+            self.last_reload = {
+                "reason": reason,
+                "reloaded_at": datetime.now().isoformat(),
+                "duration": time.time() - start_time,
+                "previous_collection": current.embedding_status.get("collection"),
+            }
+            print(
+                f"🔄 Reloaded indexes ({reason}): {stores.embedding_status.get('collection')} "
+                f"in {self.last_reload['duration']:.2f}s"
+            )
+            return self.stats()
+
+    def stats(self) -> dict:
+        return {
+            "collection": get_stores().embedding_status.get("collection"),
+            "watch_interval": self.interval,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_reload": self.last_reload,
+            "last_error": self.last_error,
+        }
+
+
+# Global instance
+index_reloader = IndexReloader()
@@ -0,0 +1,141 @@
+"""
+BM25 inverted index for exact-term retrieval, built at ingestion time.
+Insurance terms like "COBRA", "HSA" or "NFIP" are matched lexically, so
+searching needs no embedding call.
+"""
+
+import heapq
+import json
+import math
+import os
+from pathlib import Path
+
+from langchain_core.documents import Document
+
+from app.vector_store.context_builder import BM25_B, BM25_K1, tokenize
+
+# Constant of reciprocal rank fusion; larger values flatten the weight of top ranks
+RRF_K = 60
+# Chunks fetched per Chroma get() when indexing a collection
+EXPORT_PAGE_SIZE = 1000
+
+
+class LexicalIndex:
+    """Inverted index mapping each term to ``[chunk, term frequency]`` postings."""
+
+    def __init__(self, ids: list, texts: list, metadatas: list, postings: dict, lengths: list):
+        self.ids = ids
+        self.texts = texts
+        self.metadatas = metadatas
+        self.postings = postings
+        self.lengths = lengths
+        self.average_length = sum(lengths) / len(lengths) if lengths else 1.0
+
+    @classmethod
+    def build(cls, ids: list, texts: list, metadatas: list):
+        postings = {}
+        lengths = []
+        for row, text in enumerate(texts):
+            terms = tokenize(text)
+            lengths.append(len(terms))
+            frequencies = {}
+            for term in terms:
+                frequencies[term] = frequencies.get(term, 0) + 1
+            for term, frequency in frequencies.items():
+                postings.setdefault(term, []).append([row, frequency])
+        return cls(list(ids), list(texts), [metadata or {} for metadata in metadatas], postings, lengths)
+
+    @classmethod
+    def from_chroma(cls, collection, page_size: int = EXPORT_PAGE_SIZE):
+        """Index every chunk of a Chroma collection, keeping its ids and metadata.
+
+        The collection is read ``page_size`` chunks at a time.
+        """
+        ids, texts, metadatas = [], [], []
+        for offset in range(0, collection.count(), page_size):
+            page = collection.get(limit=page_size, offset=offset, include=["documents", "metadatas"])
+            if not page["ids"]:
+                break
+            ids.extend(page["ids"])
+            texts.extend(page["documents"])
+            metadatas.extend(page["metadatas"])
+        return cls.build(ids, texts, metadatas)
+
+    def save(self, path: str):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Replaced atomically so a hot reload never reads a half-written index
+        temp_path = path.with_name(f"{path.name}.tmp")
+        with open(temp_path, "w") as f:
+            json.dump(
+                {
+                    "ids": self.ids,
+                    "texts": self.texts,
+                    "metadatas": self.metadatas,
+                    "lengths": self.lengths,
+                    "postings": self.postings,
+                },
+                f,
+            )
+        os.replace(temp_path, path)
+        print(f"💾 Saved lexical index with {len(self.ids)} chunks and {len(self.postings)} terms to {path}")
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, "r") as f:
+            data = json.load(f)
+        return cls(data["ids"], data["texts"], data["metadatas"], data["postings"], data["lengths"])
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def search_with_scores(self, query: str, k: int = 4, categories: list = None) -> list:
+        """Return the top ``k`` chunks by BM25 score as (Document, score) pairs.
+
+        ``categories`` restricts the search to chunks with that ``category`` metadata.
+        """
+        allowed = set(categories) if categories else None
+        scores = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (len(self.ids) - len(postings) + 0.5) / (len(postings) + 0.5))
+            for row, frequency in postings:
+                if allowed is not None and self.metadatas[row].get("category") not in allowed:
+                    continue
+                length_norm = 1 - BM25_B + BM25_B * self.lengths[row] / self.average_length
+                scores[row] = scores.get(row, 0.0) + idf * frequency * (BM25_K1 + 1) / (
+                    frequency + BM25_K1 * length_norm
+                )
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [
+            (Document(page_content=self.texts[row], metadata=self.metadatas[row], id=self.ids[row]), score)
+            for row, score in best
+        ]
+
+    def search(self, query: str, k: int = 4, categories: list = None) -> list:
+        return [doc for doc, _ in self.search_with_scores(query, k, categories)]
+
+
+def _document_key(doc):
+    if doc.id:
+        return doc.id
+    return (doc.metadata.get("source"), doc.metadata.get("start_index"), doc.page_content)
+
+
+def reciprocal_rank_fusion(result_lists: list, k: int, rrf_k: int = RRF_K) -> list:
+    """Fuse ranked document lists by summing ``1 / (rrf_k + rank)`` per document.
+
+    Documents are matched by id (or source, offset and text when there is no id)
+    and the top ``k`` fused documents are returned, best first.
+    """
+    scores = {}
+    documents = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = _document_key(doc)
+            documents.setdefault(key, doc)
+            scores[key] = scores.get(key, 0.0) + 1 / (rrf_k + rank)
+    ranked = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [documents[key] for key in ranked]
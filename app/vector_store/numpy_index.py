@@ -0,0 +1,317 @@
+"""
+In-process exact vector index backed by a contiguous NumPy matrix.
+Embeddings are L2-normalized and stored as float32 (or float16) in a
+memory-mapped ``.npy`` file; top-k search is one matmul plus argpartition.
+With int8 or binary storage, candidates are found on the quantized codes
+and only the shortlist is rescored against the float32 vectors on disk.
+Rows are grouped by their ``category`` metadata, so a search restricted to
+some categories only scans their contiguous slices of the matrix.
+"""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+
+VECTORS_FILE = "vectors.npy"
+DOCUMENTS_FILE = "documents.json"
+META_FILE = "index_meta.json"
+CODES_FILE = "codes.npy"
+SCALE_FILE = "scale.npy"
+
+QUANTIZED_DTYPES = ("int8", "binary")
+
+# Chunks fetched per Chroma get() when exporting a collection
+EXPORT_PAGE_SIZE = 1000
+# Rows scored per block when the matrix has to be upcast (float16 and int8 storage)
+SEARCH_BLOCK_ROWS = 2048
+# Quantized search rescores this many candidates per requested result
+RESCORE_MULTIPLIER = 10
+
+# Set bits per byte value, for numpy versions without np.bitwise_count
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def quantize_int8(matrix: np.ndarray):
+    """Symmetric per-dimension int8 quantization; returns (codes, scale) with ``matrix ~= codes * scale``."""
+    scale = np.abs(matrix).max(axis=0) / 127 if len(matrix) else np.ones(matrix.shape[1], dtype=np.float32)
+    scale = np.where(scale == 0, 1.0, scale).astype(np.float32)
+    codes = np.clip(np.rint(matrix / scale), -127, 127).astype(np.int8)
+    return codes, scale
+
+
+def quantize_binary(matrix: np.ndarray) -> np.ndarray:
+    """One sign bit per dimension, packed eight dimensions per byte."""
+    return np.packbits(matrix > 0, axis=-1)
+
+
+def _replace_file(path: Path, write):
+    """Write ``path`` through a temporary file and rename it into place. A reader that has
+    the old file memory-mapped keeps the old contents instead of seeing a truncated file."""
+    temp_path = path.with_name(f"{path.name}.tmp")
+    with open(temp_path, "wb") as f:
+        write(f)
+    os.replace(temp_path, path)
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return _POPCOUNT[values]
+
+
+class NumpyVectorIndex:
+    """Exact cosine-similarity search over an in-memory or memory-mapped matrix.
+
+    Exposes the subset of the LangChain vector store API that retrieval uses
+    (``similarity_search``, ``similarity_search_by_vector``) plus batched search.
+    """
+
+    def __init__(
+        self,
+        vectors,
+        ids: list,
+        texts: list,
+        metadatas: list,
+        embedding_function=None,
+        meta: dict = None,
+        codes=None,
+        scale=None,
+    ):
+        self.vectors = vectors
+        self.ids = ids
+        self.texts = texts
+        self.metadatas = metadatas
+        self.embedding_function = embedding_function
+        self.meta = meta or {}
+        # Quantized search codes (int8 or packed sign bits); vectors then stay float32 for rescoring
+        self.codes = codes
+        self.scale = scale
+        self.rescore_multiplier = RESCORE_MULTIPLIER
+
+    @property
+    def quantized(self) -> bool:
+        return self.codes is not None
+
+    @classmethod
+    def build(
+        cls, vectors, ids: list, texts: list, metadatas: list, embedding_function=None, dtype: str = "float32", **meta
+    ):
+        """Create an index from raw embeddings, normalizing them for cosine similarity.
+
+        ``dtype`` is float32 or float16 for exact search, or int8 / binary for quantized
+        candidate search with float32 rescoring. Rows are reordered by ``category``
+        metadata and each category's row range is recorded in ``meta["partitions"]``.
+        """
+        metadatas = [metadata or {} for metadata in metadatas]
+        order = sorted(range(len(ids)), key=lambda row: str(metadatas[row].get("category", "")))
+        ids = [ids[row] for row in order]
+        texts = [texts[row] for row in order]
+        metadatas = [metadatas[row] for row in order]
+        matrix = normalize_rows(vectors)[order] if len(order) else normalize_rows(vectors)
+        codes = scale = None
+        if dtype == "int8":
+            codes, scale = quantize_int8(matrix)
+        elif dtype == "binary":
+            codes = quantize_binary(matrix)
+        else:
+            matrix = matrix.astype(dtype)
+        matrix = np.ascontiguousarray(matrix)
+        partitions = {}
+        for row, metadata in enumerate(metadatas):
+            if "category" in metadata:
+                partitions.setdefault(metadata["category"], [row, row])[1] = row + 1
+        meta = {
+            "dtype": dtype,
+            "count": len(ids),
+            "dimension": int(matrix.shape[1]) if len(ids) else 0,
+            "partitions": partitions,
+            **meta,
+        }
+        return cls(matrix, list(ids), list(texts), metadatas, embedding_function, meta, codes, scale)
+
+    @classmethod
+    def from_chroma(
+        cls, collection, embedding_function=None, dtype: str = "float32", page_size: int = EXPORT_PAGE_SIZE, **meta
+    ):
+        """Export every vector and document of a Chroma collection without re-embedding.
+
+        The collection is read ``page_size`` chunks at a time into one preallocated float32
+        matrix. The collection name and its recorded embedding model info are kept in ``meta``.
+        """
+        recorded = {key: value for key, value in (collection.metadata or {}).items() if key.startswith("embedding_")}
+        meta = {"collection": collection.name, **recorded, **meta}
+        total = collection.count()
+        vectors = np.zeros((0, 0), dtype=np.float32)
+        ids, texts, metadatas = [], [], []
+        for offset in range(0, total, page_size):
+            page = collection.get(limit=page_size, offset=offset, include=["embeddings", "documents", "metadatas"])
+            if not page["ids"]:
+                break
+            page_vectors = np.asarray(page["embeddings"], dtype=np.float32)
+            if not ids:
+                vectors = np.empty((total, page_vectors.shape[1]), dtype=np.float32)
+            vectors[len(ids) : len(ids) + len(page_vectors)] = page_vectors
+            ids.extend(page["ids"])
+            texts.extend(page["documents"])
+            metadatas.extend(page["metadatas"])
+        return cls.build(vectors[: len(ids)], ids, texts, metadatas, embedding_function, dtype, **meta)
+
+    def save(self, path: str):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        _replace_file(path / VECTORS_FILE, lambda f: np.save(f, np.asarray(self.vectors)))
+        if self.quantized:
+            _replace_file(path / CODES_FILE, lambda f: np.save(f, np.asarray(self.codes)))
+        if self.scale is not None:
+            _replace_file(path / SCALE_FILE, lambda f: np.save(f, self.scale))
+        documents = {"ids": self.ids, "texts": self.texts, "metadatas": self.metadatas}
+        _replace_file(path / DOCUMENTS_FILE, lambda f: f.write(json.dumps(documents).encode()))
+        # Written last: its change marks a complete index for the hot reload watcher
+        _replace_file(path / META_FILE, lambda f: f.write(json.dumps(self.meta, indent=2).encode()))
+        print(f"💾 Saved NumPy index with {len(self.ids)} vectors ({self.meta.get('dtype')}) to {path}")
+
+    @classmethod
+    def load(cls, path: str, embedding_function=None, mmap: bool = True):
+        """Load a saved index; the matrix is memory-mapped unless ``mmap`` is False.
+
+        Quantized indexes always memory-map the float32 vectors, since only the
+        rescored shortlist rows are read.
+        """
+        path = Path(path)
+        with open(path / DOCUMENTS_FILE, "r") as f:
+            documents = json.load(f)
+        meta = {}
+        if (path / META_FILE).exists():
+            with open(path / META_FILE, "r") as f:
+                meta = json.load(f)
+        codes = scale = None
+        if meta.get("dtype") in QUANTIZED_DTYPES:
+            codes = np.load(path / CODES_FILE, mmap_mode="r" if mmap else None)
+            if (path / SCALE_FILE).exists():
+                scale = np.load(path / SCALE_FILE)
+        vectors = np.load(path / VECTORS_FILE, mmap_mode="r" if mmap or codes is not None else None)
+        return cls(
+            vectors,
+            documents["ids"],
+            documents["texts"],
+            documents["metadatas"],
+            embedding_function,
+            meta,
+            codes,
+            scale,
+        )
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def memory_stats(self) -> dict:
+        """Bytes scanned per search versus the full-precision matrix."""
+        full_precision = len(self.ids) * self.meta.get("dimension", 0) * 4
+        search = np.asarray(self.codes if self.quantized else self.vectors).nbytes
+        return {
+            "dtype": self.meta.get("dtype"),
+            "search_bytes": int(search),
+            "float32_bytes": int(full_precision),
+            "compression": full_precision / search if search else None,
+        }
+
+    def _scores(self, queries: np.ndarray, start: int = 0, end: int = None) -> np.ndarray:
+        """Cosine similarity of each query row against the stored vectors in rows ``start:end``."""
+        vectors = self.vectors[start:end]
+        if vectors.dtype == np.float32:
+            return queries @ vectors.T
+        scores = np.empty((queries.shape[0], vectors.shape[0]), dtype=np.float32)
+        for block_start in range(0, vectors.shape[0], SEARCH_BLOCK_ROWS):
+            block = np.asarray(vectors[block_start : block_start + SEARCH_BLOCK_ROWS], dtype=np.float32)
+            scores[:, block_start : block_start + block.shape[0]] = queries @ block.T
+        return scores
+
+    def _quantized_scores(self, queries: np.ndarray, start: int = 0, end: int = None) -> np.ndarray:
+        """Approximate scores on the quantized codes: scaled dot product (int8) or negative Hamming distance."""
+        codes = self.codes[start:end]
+        scores = np.empty((queries.shape[0], codes.shape[0]), dtype=np.float32)
+        if self.meta.get("dtype") == "binary":
+            query_bits = quantize_binary(queries)
+            for block_start in range(0, codes.shape[0], SEARCH_BLOCK_ROWS):
+                block = np.asarray(codes[block_start : block_start + SEARCH_BLOCK_ROWS])
+                distances = _popcount(query_bits[:, None, :] ^ block[None, :, :]).sum(axis=-1, dtype=np.int32)
+                scores[:, block_start : block_start + block.shape[0]] = -distances
+            return scores
+        scaled_queries = queries * self.scale
+        for block_start in range(0, codes.shape[0], SEARCH_BLOCK_ROWS):
+            block = np.asarray(codes[block_start : block_start + SEARCH_BLOCK_ROWS], dtype=np.float32)
+            scores[:, block_start : block_start + block.shape[0]] = scaled_queries @ block.T
+        return scores
+
+    def _rescore(self, query: np.ndarray, rows: np.ndarray, approximate_scores: np.ndarray, k: int) -> list:
+        """Rescore the quantized shortlist at full precision and return (row, score) pairs."""
+        shortlist = np.sort(rows[self._top_k(approximate_scores, k * self.rescore_multiplier)])
+        exact = np.asarray(self.vectors[shortlist], dtype=np.float32) @ query
+        return [(int(shortlist[i]), float(exact[i])) for i in self._top_k(exact, k)]
+
+    def _top_k(self, scores: np.ndarray, k: int) -> list:
+        k = min(k, scores.shape[0])
+        if k <= 0:
+            return []
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        return candidates[np.argsort(-scores[candidates])].tolist()
+
+    def partition_ranges(self, categories: list = None) -> list:
+        """Row ranges to search: the given categories' partitions, or the whole index.
+
+        Indexes saved without partitions always search everything.
+        """
+        partitions = self.meta.get("partitions")
+        if not categories or not partitions:
+            return [(0, len(self.ids))]
+        return [tuple(partitions[category]) for category in categories if category in partitions]
+
+    def _document(self, row: int) -> Document:
+        return Document(page_content=self.texts[row], metadata=self.metadatas[row], id=self.ids[row])
+
+    def similarity_search_by_vectors_with_scores(self, embeddings: list, k: int = 4, categories: list = None) -> list:
+        """Batched exact search; returns one list of (Document, score) per query.
+
+        ``categories`` restricts the search to those partitions.
+        """
+        ranges = self.partition_ranges(categories)
+        if not self.ids or not ranges:
+            return [[] for _ in embeddings]
+        queries = normalize_rows(np.atleast_2d(embeddings))
+        rows = np.concatenate([np.arange(start, end) for start, end in ranges])
+        score_fn = self._quantized_scores if self.quantized else self._scores
+        parts = [score_fn(queries, start, end) for start, end in ranges]
+        scores = parts[0] if len(parts) == 1 else np.hstack(parts)
+        if self.quantized:
+            return [
+                [(self._document(row), score) for row, score in self._rescore(query, rows, approximate, k)]
+                for query, approximate in zip(queries, scores)
+            ]
+        return [
+            [(self._document(int(rows[i])), float(row_scores[i])) for i in self._top_k(row_scores, k)]
+            for row_scores in scores
+        ]
+
+    def similarity_search_by_vectors(self, embeddings: list, k: int = 4, categories: list = None) -> list:
+        return [
+            [doc for doc, _ in results]
+            for results in self.similarity_search_by_vectors_with_scores(embeddings, k, categories)
+        ]
+
+    def similarity_search_by_vector(self, embedding: list, k: int = 4, categories: list = None, **kwargs) -> list:
+        return self.similarity_search_by_vectors([embedding], k, categories)[0]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs) -> list:
+        return self.similarity_search_by_vectors_with_scores([self.embedding_function.embed_query(query)], k)[0]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs) -> list:
+        return self.similarity_search_by_vector(self.embedding_function.embed_query(query), k)
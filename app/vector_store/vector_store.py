@@ -1,24 +1,411 @@
+import asyncio
+import itertools
+import os
+import time
+from typing import NamedTuple
+
+import chromadb
+from chromadb.api.shared_system_client import SharedSystemClient
 from langchain_chroma import Chroma
+from langchain_core.documents import Document
 
-from app.config.config import CHROMA_PERSIST_DIRECTORY
+from app.config.config import (
+    CATEGORY_ROUTING,
+    CHROMA_PERSIST_DIRECTORY,
+    EMBEDDING_MISMATCH_POLICY,
+    EMBEDDING_MODEL,
+    HYBRID_FETCH_K,
+    LEXICAL_INDEX_PATH,
+    NUMPY_INDEX_PATH,
+    RETRIEVAL_MODE,
+    ROUTER_MAX_PARTITIONS,
+    VECTOR_BACKEND,
+)
+from app.llm.embedding_batcher import embedding_batcher
 from app.llm.llm import embeddings
+from app.vector_store.category_router import CategoryRouter
+from app.vector_store.context_builder import build_context
+from app.vector_store.index_registry import check_compatibility, embedding_info, get_active_collection
+from app.vector_store.lexical_index import LexicalIndex, reciprocal_rank_fusion
+from app.vector_store.numpy_index import NumpyVectorIndex
 
-try:
-    vector_store = Chroma(persist_directory=CHROMA_PERSIST_DIRECTORY, embedding_function=embeddings)
-except Exception as e:
-    print(f"Warning: Could not initialize vector store: {e}")
-    vector_store = None
 
+def _open_vector_store(fresh_client: bool = False):
+    """Open the retrieval backend selected by ``VECTOR_BACKEND`` (chroma or numpy).
 
-def get_context(message: str, k: int = 3):
-    sources = []
+    With ``fresh_client``, Chroma is opened through a new client instead of the one
+    chromadb caches per path: the cached client keeps serving its in-memory HNSW segment,
+    which does not see deletes made by another process (an incremental re-ingest).
+
+    Returns:
+        Tuple of (store, metadata) where metadata holds the recorded embedding model info
+    """
+    if VECTOR_BACKEND == "numpy":
+        index = NumpyVectorIndex.load(NUMPY_INDEX_PATH, embedding_function=embeddings)
+        return index, index.meta
+    client = None
+    if fresh_client:
+        # Stores already opened keep their own system; only new clients get a fresh one
+        SharedSystemClient.clear_system_cache()
+        client = chromadb.PersistentClient(path=CHROMA_PERSIST_DIRECTORY)
+    store = Chroma(
+        collection_name=get_active_collection(CHROMA_PERSIST_DIRECTORY),
+        persist_directory=CHROMA_PERSIST_DIRECTORY,
+        client=client,
+        embedding_function=embeddings,
+    )
+    return store, store._collection.metadata
+
+
+def _check_embeddings(store, metadata: dict):
+    """Compare the stored embedding model with ``EMBEDDING_MODEL``.
+
+    On a model mismatch the store is refused (vector retrieval disabled, lexical search
+    keeps serving) unless ``EMBEDDING_MISMATCH_POLICY`` is ``warn``. Collections built
+    before the model was recorded only produce a warning.
+    """
+    collection = store.meta.get("collection") if isinstance(store, NumpyVectorIndex) else store._collection.name
+    status = {"collection": collection, **embedding_info(metadata), "status": "ok", "detail": None}
+    problem = check_compatibility(metadata, EMBEDDING_MODEL)
+    if problem is None:
+        return store, status
+    status["detail"] = problem
+    if embedding_info(metadata)["embedding_model"] is None:
+        status["status"] = "unknown"
+        print(f"⚠️ Vector store {collection}: {problem}; run migrate_index.py to re-embed into a versioned collection")
+        return store, status
+    status["status"] = "mismatch"
+    if EMBEDDING_MISMATCH_POLICY == "warn":
+        print(f"⚠️ Vector store {collection}: {problem}; retrieval quality will be poor")
+        return store, status
+    print(f"❌ Vector store {collection} refused: {problem}. Run migrate_index.py to re-embed it")
+    return None, status
+
+
+class RetrievalStores(NamedTuple):
+    """One consistent set of retrieval indexes; replaced as a whole on reload."""
+
+    vector_store: object
+    lexical_index: LexicalIndex
+    embedding_status: dict
+    # Unique per load, e.g. ``docs-nomic-embed-text-20250101120000@3``; keys cached answers
+    version: str
+
+
+_load_counter = itertools.count(1)
+
+
+def load_stores(fresh_client: bool = False) -> RetrievalStores:
+    """Open the vector store and lexical index from disk (see ``_open_vector_store`` for ``fresh_client``)."""
+    try:
+        vector_store, embedding_status = _check_embeddings(*_open_vector_store(fresh_client))
+    except Exception as e:
+        print(f"Warning: Could not initialize vector store: {e}")
+        vector_store = None
+        embedding_status = {"collection": None, "status": "unavailable", "detail": str(e)}
+
+    # The lexical index is optional; without it retrieval is vector-only
+    lexical_index = None
+    if os.path.exists(LEXICAL_INDEX_PATH):
+        try:
+            lexical_index = LexicalIndex.load(LEXICAL_INDEX_PATH)
+        except Exception as e:
+            print(f"Warning: Could not load lexical index: {e}")
+    version = f"{embedding_status.get('collection')}@{next(_load_counter)}"
+    return RetrievalStores(vector_store, lexical_index, embedding_status, version)
+
+
+_stores = load_stores()
+
+
+def get_stores() -> RetrievalStores:
+    """The current retrieval indexes. Callers keep the returned snapshot for a whole request,
+    so a concurrent reload never mixes old and new indexes within one retrieval."""
+    return _stores
+
+
+def swap_stores(stores: RetrievalStores) -> RetrievalStores:
+    """Make ``stores`` current and return the previous snapshot."""
+    global _stores
+    previous, _stores = _stores, stores
+    return previous
+
+
+def count_documents(store=None) -> int:
+    """Number of indexed chunks in ``store`` (default: the current vector store)."""
+    store = store if store is not None else _stores.vector_store
+    if isinstance(store, NumpyVectorIndex):
+        return store.count()
+    return store._collection.count()
+
+
+def _chroma_filter(categories: list):
+    if not categories:
+        return None
+    if len(categories) == 1:
+        return {"category": categories[0]}
+    return {"category": {"$in": categories}}
+
+
+def _search_by_vector(vector_store, query_embedding: list, k: int, categories: list = None) -> list:
+    """Vector search restricted to the ``categories`` partitions (all chunks when empty)."""
+    if isinstance(vector_store, NumpyVectorIndex):
+        return vector_store.similarity_search_by_vector(query_embedding, k, categories)
+    return vector_store.similarity_search_by_vector(query_embedding, k, filter=_chroma_filter(categories))
+
+
+def _search_by_vectors(vector_store, query_embeddings: list, k: int, categories: list = None) -> list:
+    """Run one batched vector search and return a list of documents per query."""
+    if isinstance(vector_store, NumpyVectorIndex):
+        return vector_store.similarity_search_by_vectors(query_embeddings, k, categories)
+    results = vector_store._collection.query(
+        query_embeddings=query_embeddings,
+        n_results=k,
+        where=_chroma_filter(categories),
+        include=["documents", "metadatas"],
+    )
+    return [
+        [
+            Document(page_content=text, metadata=metadata or {}, id=doc_id)
+            for doc_id, text, metadata in zip(ids, documents, metadatas)
+            if text is not None
+        ]
+        for ids, documents, metadatas in zip(results["ids"], results["documents"], results["metadatas"])
+    ]
+
+
+# Running totals of the context builder's savings, reported on /info
+context_stats = {"requests": 0, "original_tokens": 0, "context_tokens": 0, "tokens_saved": 0}
+
+
+def _format_context(docs: list, query: str):
     context = ""
-    if vector_store:
+    sources = []
+    if docs:
+        context, sources, stats = build_context(query, docs)
+        context_stats["requests"] += 1
+        for key in ("original_tokens", "context_tokens", "tokens_saved"):
+            context_stats[key] += stats[key]
+        if stats["tokens_saved"]:
+            print(
+                f"Context compressed: {stats['original_tokens']} -> {stats['context_tokens']} tokens "
+                f"({stats['tokens_saved']} saved)"
+            )
+    return context, sources
+
+
+# Per-retriever latency totals, reported on /info
+retrieval_stats = {name: {"requests": 0, "total_latency": 0.0, "last_latency": None} for name in ("vector", "lexical")}
+
+
+def _record_latency(name: str, start_time: float, count: int = 1):
+    latency = time.time() - start_time
+    stats = retrieval_stats[name]
+    stats["requests"] += count
+    stats["total_latency"] += latency
+    if count:
+        stats["last_latency"] = latency / count
+    return latency
+
+
+def _retrievers(stores: RetrievalStores, lexical_only: bool = False):
+    """Return (use_vector, use_lexical) for the configured ``RETRIEVAL_MODE``.
+
+    ``lexical_only`` is the fast path for when the embedding service is degraded.
+    """
+    use_lexical = stores.lexical_index is not None and (RETRIEVAL_MODE != "vector" or lexical_only)
+    use_vector = stores.vector_store is not None and RETRIEVAL_MODE != "lexical" and not lexical_only
+    return use_vector, use_lexical
+
+
+def _fuse(vector_docs, lexical_docs, k: int) -> list:
+    if vector_docs is None:
+        return (lexical_docs or [])[:k]
+    if lexical_docs is None:
+        return vector_docs[:k]
+    return reciprocal_rank_fusion([vector_docs, lexical_docs], k)
+
+
+category_router = CategoryRouter(ROUTER_MAX_PARTITIONS)
+
+
+def _route(message: str) -> list:
+    """Categories to restrict retrieval to; empty means global search."""
+    return category_router.route(message) if CATEGORY_ROUTING else []
+
+
+def _lexical_search(lexical_index, message: str, k: int, categories: list = None) -> list:
+    start_time = time.time()
+    docs = lexical_index.search(message, k, categories)
+    _record_latency("lexical", start_time)
+    return docs
+
+
+def _retrieve(stores: RetrievalStores, message: str, k: int, lexical_only: bool, categories: list) -> list:
+    use_vector, use_lexical = _retrievers(stores, lexical_only)
+    fetch_k = max(k, HYBRID_FETCH_K) if use_vector and use_lexical else k
+    vector_docs = lexical_docs = None
+    if use_vector:
         try:
-            docs = vector_store.similarity_search(message, k=k)
-            if docs:
-                context = "\n".join([doc.page_content for doc in docs])
-                sources = [doc.metadata.get("source", "unknown") for doc in docs]
+            start_time = time.time()
+            vector_docs = _search_by_vector(stores.vector_store, embeddings.embed_query(message), fetch_k, categories)
+            _record_latency("vector", start_time)
         except Exception as e:
             print(f"Vector search error: {e}")
+    if use_lexical:
+        try:
+            lexical_docs = _lexical_search(stores.lexical_index, message, fetch_k, categories)
+        except Exception as e:
+            print(f"Lexical search error: {e}")
+    return _fuse(vector_docs, lexical_docs, k)
+
+
+def get_context(message: str, k: int = 3, lexical_only: bool = False):
+    sources = []
+    context = ""
+    stores = get_stores()
+    categories = _route(message)
+    docs = _retrieve(stores, message, k, lexical_only, categories)
+    if categories and len(docs) < k:
+        # Too few matches in the routed partitions: fall back to global search
+        category_router.fallbacks += 1
+        docs = _retrieve(stores, message, k, lexical_only, [])
+    if docs:
+        context, sources = _format_context(docs, message)
+    return context, sources
+
+
+async def _aretrieve(stores: RetrievalStores, message: str, k: int, lexical_only: bool, categories: list) -> list:
+    use_vector, use_lexical = _retrievers(stores, lexical_only)
+    fetch_k = max(k, HYBRID_FETCH_K) if use_vector and use_lexical else k
+
+    async def vector_search():
+        start_time = time.time()
+        query_embedding = await embedding_batcher.embed(message)
+        docs = await asyncio.to_thread(_search_by_vector, stores.vector_store, query_embedding, fetch_k, categories)
+        _record_latency("vector", start_time)
+        return docs
+
+    async def lexical_search():
+        return await asyncio.to_thread(_lexical_search, stores.lexical_index, message, fetch_k, categories)
+
+    vector_docs, lexical_docs = await asyncio.gather(
+        vector_search() if use_vector else asyncio.sleep(0),
+        lexical_search() if use_lexical else asyncio.sleep(0),
+        return_exceptions=True,
+    )
+    if isinstance(vector_docs, Exception):
+        print(f"Vector search error: {vector_docs}")
+        vector_docs = None
+    if isinstance(lexical_docs, Exception):
+        print(f"Lexical search error: {lexical_docs}")
+        lexical_docs = None
+    return _fuse(vector_docs, lexical_docs, k)
+
+
+async def aget_context(message: str, k: int = 3, lexical_only: bool = False, stores: RetrievalStores = None):
+    """Async ``get_context`` that runs vector and lexical search concurrently and fuses them.
+
+    The query is embedded through the micro-batching dispatcher, so its vector is shared
+    with other requests in the same batching window. If one retriever fails, the results
+    of the other are used on their own. The category router restricts both searches to
+    the query's product-line partitions, falling back to global search when unsure.
+    ``stores`` defaults to the current snapshot.
+    """
+    sources = []
+    context = ""
+    stores = stores or get_stores()
+    categories = _route(message)
+    docs = await _aretrieve(stores, message, k, lexical_only, categories)
+    if categories and len(docs) < k:
+        category_router.fallbacks += 1
+        docs = await _aretrieve(stores, message, k, lexical_only, [])
+    if docs:
+        context, sources = _format_context(docs, message)
     return context, sources
+
+
+def _retrieve_batch(
+    stores: RetrievalStores, messages: list, query_embeddings: list, k: int, lexical_only: bool, categories: list
+) -> list:
+    """Retrieve for ``messages`` within ``categories``; ``query_embeddings`` is None when embedding failed."""
+    use_vector, use_lexical = _retrievers(stores, lexical_only)
+    fetch_k = max(k, HYBRID_FETCH_K) if use_vector and use_lexical else k
+    vector_results = [None] * len(messages)
+    lexical_results = [None] * len(messages)
+    if use_vector and query_embeddings is not None:
+        try:
+            start_time = time.time()
+            vector_results = _search_by_vectors(stores.vector_store, query_embeddings, fetch_k, categories)
+            _record_latency("vector", start_time, len(messages))
+        except Exception as e:
+            print(f"Vector search error: {e}")
+    if use_lexical:
+        try:
+            lexical_results = [
+                _lexical_search(stores.lexical_index, message, fetch_k, categories) for message in messages
+            ]
+        except Exception as e:
+            print(f"Lexical search error: {e}")
+    return [_fuse(vector_docs, lexical_docs, k) for vector_docs, lexical_docs in zip(vector_results, lexical_results)]
+
+
+def get_contexts(messages: list, k: int = 3, lexical_only: bool = False, stores: RetrievalStores = None) -> list:
+    """Batched ``get_context``: one embedding call for all messages and one vector query per routed partition set.
+
+    Returns:
+        List of (context, sources) tuples in the same order as ``messages``
+    """
+    stores = stores or get_stores()
+    use_vector, use_lexical = _retrievers(stores, lexical_only)
+    if not messages or not (use_vector or use_lexical):
+        return [("", []) for _ in messages]
+
+    # Every partition search (and the global fallback) reuses these vectors
+    query_embeddings = None
+    if use_vector:
+        try:
+            start_time = time.time()
+            query_embeddings = embeddings.embed_documents(messages)
+            # Embedding time counts towards vector latency; the searches count the queries
+            _record_latency("vector", start_time, 0)
+        except Exception as e:
+            print(f"Vector search error: {e}")
+
+    def vectors(indices: list):
+        return [query_embeddings[i] for i in indices] if query_embeddings is not None else None
+
+    routes = [_route(message) for message in messages]
+    groups = {}
+    for i, categories in enumerate(routes):
+        groups.setdefault(tuple(categories), []).append(i)
+    results = [None] * len(messages)
+    for categories, indices in groups.items():
+        batch = _retrieve_batch(
+            stores, [messages[i] for i in indices], vectors(indices), k, lexical_only, list(categories)
+        )
+        for i, docs in zip(indices, batch):
+            results[i] = docs
+
+    fallback = [i for i, categories in enumerate(routes) if categories and len(results[i]) < k]
+    if fallback:
+        category_router.fallbacks += len(fallback)
+        fallback_messages = [messages[i] for i in fallback]
+        fallback_batch = _retrieve_batch(stores, fallback_messages, vectors(fallback), k, lexical_only, [])
+        for i, docs in zip(fallback, fallback_batch):
+            results[i] = docs
+    return [_format_context(docs, message) if docs else ("", []) for message, docs in zip(messages, results)]
+
+
+def get_retrieval_stats() -> dict:
+    """Retrieval mode, lexical index size and average latency per retriever."""
+    lexical_index = _stores.lexical_index
+    return {
+        "mode": RETRIEVAL_MODE,
+        "lexical_documents": lexical_index.count() if lexical_index else None,
+        "category_routing": category_router.stats() if CATEGORY_ROUTING else None,
+        **{
+            name: {**stats, "avg_latency": stats["total_latency"] / stats["requests"] if stats["requests"] else None}
+            for name, stats in retrieval_stats.items()
+        },
+    }
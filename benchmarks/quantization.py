@@ -0,0 +1,111 @@
+"""
+Benchmark quantized vector storage against exact float32 search.
+Reports search memory, recall@k against the unquantized baseline and query latency
+for each storage dtype of the NumPy index.
+
+Usage:
+    python -m benchmarks.quantization                      # synthetic corpus
+    python -m benchmarks.quantization --size 200000 --dimension 768
+    python -m benchmarks.quantization --index ./data/vector_store/numpy_index
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.vector_store.numpy_index import NumpyVectorIndex
+
+DTYPES = ("float32", "float16", "int8", "binary")
+
+
+def synthetic_corpus(count: int, dim: int, clusters: int = 100, seed: int = 0) -> np.ndarray:
+    """Clustered random vectors, closer to real embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=count)
+    return centers[labels] + 0.6 * rng.normal(size=(count, dim)).astype(np.float32)
+
+
+def sample_queries(vectors: np.ndarray, count: int, seed: int = 1) -> np.ndarray:
+    """Perturbed corpus vectors, so every query has genuine near neighbours."""
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(vectors), size=count)
+    return vectors[rows] + 0.3 * rng.normal(size=(count, vectors.shape[1])).astype(np.float32)
+
+
+def run_benchmark(vectors: np.ndarray, queries: np.ndarray, k: int, rescore_multiplier: int) -> list:
+    ids = [str(i) for i in range(len(vectors))]
+    texts = [""] * len(vectors)
+    metadatas = [{}] * len(vectors)
+
+    baseline = NumpyVectorIndex.build(vectors, ids, texts, metadatas, dtype="float32")
+    expected = [
+        {doc.id for doc, _ in results} for results in baseline.similarity_search_by_vectors_with_scores(queries, k)
+    ]
+
+    rows = []
+    for dtype in DTYPES:
+        build_start = time.time()
+        index = NumpyVectorIndex.build(vectors, ids, texts, metadatas, dtype=dtype)
+        build_time = time.time() - build_start
+        index.rescore_multiplier = rescore_multiplier
+
+        latencies = []
+        hits = 0
+        for query, relevant in zip(queries, expected):
+            start_time = time.perf_counter()
+            results = index.similarity_search_by_vectors_with_scores([query], k)[0]
+            latencies.append(time.perf_counter() - start_time)
+            hits += len(relevant & {doc.id for doc, _ in results})
+
+        memory = index.memory_stats()
+        rows.append(
+            {
+                "dtype": dtype,
+                "search_mb": memory["search_bytes"] / 2**20,
+                "compression": memory["compression"],
+                f"recall@{k}": hits / (k * len(queries)),
+                "p50_ms": float(np.percentile(latencies, 50) * 1000),
+                "p95_ms": float(np.percentile(latencies, 95) * 1000),
+                "build_s": build_time,
+            }
+        )
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quantized NumPy index storage")
+    parser.add_argument("--index", help="Saved NumPy index to use instead of a synthetic corpus")
+    parser.add_argument("--size", type=int, default=50000, help="Number of synthetic vectors")
+    parser.add_argument("--dimension", type=int, default=768, help="Synthetic embedding dimension")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--rescore-multiplier", type=int, default=10)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.index:
+        vectors = np.asarray(NumpyVectorIndex.load(args.index).vectors, dtype=np.float32)
+    else:
+        vectors = synthetic_corpus(args.size, args.dimension)
+    queries = sample_queries(vectors, args.queries)
+    print(f"📏 Benchmarking {len(vectors)} vectors x {vectors.shape[1]} dims, {len(queries)} queries, k={args.k}")
+
+    rows = run_benchmark(vectors, queries, args.k, args.rescore_multiplier)
+    print(f"{'dtype':<8} {'search MB':>10} {'compr.':>7} {'recall':>7} {'p50 ms':>8} {'p95 ms':>8}")
+    for row in rows:
+        print(
+            f"{row['dtype']:<8} {row['search_mb']:>10.1f} {row['compression']:>6.1f}x "
+            f"{row[f'recall@{args.k}']:>7.3f} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"vectors": len(vectors), "dimension": int(vectors.shape[1]), "k": args.k, "results": rows}, f)
+        print(f"💾 Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Retrieval latency/recall benchmark with HNSW parameter sweeps.
+Builds indexes from data/documents or a synthetic corpus, runs the eval_data
+questions (plus generated paraphrases) through retrieval and reports p50/p95
+query latency, recall@k against exact search and index build time for every
+combination of parameters. Runs fully offline with a deterministic hashing
+embedder, so results are comparable between runs and machines.
+
+Usage:
+    python -m benchmarks.retrieval                                   # data/documents
+    python -m benchmarks.retrieval --corpus synthetic --size 20000
+    python -m benchmarks.retrieval --k 1,3,5 --hnsw-m 8,16,32 --ef-search 10,50,100
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import random
+import re
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import chromadb
+import numpy as np
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.embeddings import Embeddings
+
+from app.evaluation.eval_data import eval_data
+from app.vector_store.numpy_index import NumpyVectorIndex
+
+DOCUMENTS_PATH = "./data/documents"
+RESULTS_PATH = "./benchmarks/results"
+
+# Chroma rejects larger add() calls
+CHROMA_ADD_BATCH = 5000
+
+SYNTHETIC_TOPICS = {
+    "auto": "auto car vehicle collision liability comprehensive accident uninsured motorist driver premium claim",
+    "home": "home homeowners dwelling flood earthquake belongings replacement cost roof theft fire deductible",
+    "life": "life term whole beneficiary policy cash value borrow loan taxable death benefit premium",
+    "health": "health copay network ppo hmo hsa cobra prescription preventive care deductible coverage",
+}
+SYNTHETIC_FILLER = (
+    "the a your policy insurer may include typically coverage cost plan pay amount year month limit "
+    "provide protect after before customer agent company contact review option standard additional"
+).split()
+
+PARAPHRASE_SYNONYMS = {
+    "insurance": "coverage",
+    "cover": "protect",
+    "covered": "included",
+    "difference between": "distinction between",
+    "need": "require",
+    "car": "auto",
+    "affect": "change",
+    "happens": "occurs",
+}
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic offline embedder: hashed word and character trigram features, L2-normalized."""
+
+    def __init__(self, dimension: int = 256):
+        self.dimension = dimension
+
+    def _bucket(self, feature: str) -> tuple:
+        digest = hashlib.md5(feature.encode()).digest()
+        return int.from_bytes(digest[:4], "little") % self.dimension, 1.0 if digest[4] & 1 else -1.0
+
+    def _embed(self, text: str) -> list:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        words = re.findall(r"[a-z0-9]+", text.lower())
+        features = words + [word[i : i + 3] for word in words for i in range(max(len(word) - 2, 1))]
+        for feature in features:
+            index, sign = self._bucket(feature)
+            vector[index] += sign
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: list) -> list:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list:
+        return self._embed(text)
+
+
+def load_document_chunks(documents_path: str = DOCUMENTS_PATH) -> list:
+    """Read .txt and .md files as plain text and split them like load_documents.py."""
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    chunks = []
+    for file_path in sorted(Path(documents_path).rglob("*")):
+        if file_path.suffix in (".txt", ".md"):
+            chunks.extend(splitter.split_text(file_path.read_text(encoding="utf-8")))
+    return chunks
+
+
+def synthetic_chunks(size: int, seed: int = 0) -> list:
+    """Topic-clustered insurance-like chunks of 60-120 words."""
+    rng = random.Random(seed)
+    topics = [words.split() for words in SYNTHETIC_TOPICS.values()]
+    chunks = []
+    for _ in range(size):
+        topic = rng.choice(topics)
+        words = [
+            rng.choice(topic) if rng.random() < 0.4 else rng.choice(SYNTHETIC_FILLER)
+            for _ in range(rng.randint(60, 120))
+        ]
+        chunks.append(" ".join(words))
+    return chunks
+
+
+def paraphrase(question: str, variant: int) -> str:
+    """Deterministic rewordings of an eval question."""
+    if variant == 0:
+        return f"Could you tell me {question[0].lower()}{question[1:]}"
+    text = question
+    for word, synonym in PARAPHRASE_SYNONYMS.items():
+        text = re.sub(rf"\b{word}\b", synonym, text, flags=re.IGNORECASE)
+    return text
+
+
+def build_queries(paraphrases: int) -> list:
+    questions = list(eval_data["inputs"])
+    return questions + [paraphrase(question, variant) for variant in range(paraphrases) for question in questions]
+
+
+def percentile_ms(latencies: list, q: float) -> float:
+    return float(np.percentile(latencies, q) * 1000) if latencies else 0.0
+
+
+def recall_at_k(results: list, expected: list) -> float:
+    hits = sum(len(set(found) & set(relevant)) for found, relevant in zip(results, expected))
+    total = sum(len(relevant) for relevant in expected)
+    return hits / total if total else 1.0
+
+
+def time_queries(search, query_vectors: np.ndarray, k: int):
+    """Run one query at a time and return (ids per query, latencies)."""
+    results = []
+    latencies = []
+    for vector in query_vectors:
+        start_time = time.perf_counter()
+        results.append(search(vector, k))
+        latencies.append(time.perf_counter() - start_time)
+    return results, latencies
+
+
+def build_chroma(client, vectors: np.ndarray, ids: list, m: int, ef_construction: int, ef_search: int):
+    collection = client.create_collection(
+        f"bench-{uuid.uuid4().hex[:12]}",
+        metadata={
+            "hnsw:space": "cosine",
+            "hnsw:M": m,
+            "hnsw:construction_ef": ef_construction,
+            "hnsw:search_ef": ef_search,
+        },
+    )
+    for start in range(0, len(ids), CHROMA_ADD_BATCH):
+        collection.add(ids=ids[start : start + CHROMA_ADD_BATCH], embeddings=vectors[start : start + CHROMA_ADD_BATCH])
+    return collection
+
+
+def query_chroma(collection, vector: np.ndarray, k: int) -> list:
+    return collection.query(query_embeddings=[vector], n_results=k, include=[])["ids"][0]
+
+
+def run_benchmark(chunks: list, queries: list, args) -> list:
+    embedder = HashingEmbeddings(args.dimension)
+    ids = [str(i) for i in range(len(chunks))]
+    vectors = np.asarray(embedder.embed_documents(chunks), dtype=np.float32)
+    query_vectors = np.asarray(embedder.embed_documents(queries), dtype=np.float32)
+    max_k = max(args.k)
+    common = {"corpus": args.corpus, "chunks": len(chunks), "queries": len(queries), "dimension": args.dimension}
+    rows = []
+
+    # Exact search is the ground truth for recall
+    exact = NumpyVectorIndex.build(vectors, ids, chunks, [{}] * len(ids), dtype="float32")
+    expected = [[doc.id for doc in docs] for docs in exact.similarity_search_by_vectors(query_vectors.tolist(), max_k)]
+
+    for dtype in args.numpy_dtypes:
+        build_start = time.time()
+        index = NumpyVectorIndex.build(vectors, ids, chunks, [{}] * len(ids), dtype=dtype)
+        build_time = time.time() - build_start
+        for k in args.k:
+            results, latencies = time_queries(
+                lambda vector, k: [doc.id for doc in index.similarity_search_by_vector(vector.tolist(), k)],
+                query_vectors,
+                k,
+            )
+            rows.append(
+                {
+                    **common,
+                    "backend": f"numpy-{dtype}",
+                    "k": k,
+                    "hnsw_m": None,
+                    "ef_construction": None,
+                    "ef_search": None,
+                    "build_time_s": build_time,
+                    "p50_ms": percentile_ms(latencies, 50),
+                    "p95_ms": percentile_ms(latencies, 95),
+                    "recall_at_k": recall_at_k(results, [relevant[:k] for relevant in expected]),
+                }
+            )
+
+    client = chromadb.EphemeralClient()
+    # ef_search is fixed when Chroma loads the HNSW index, so every combination gets its own build
+    for m in args.hnsw_m:
+        for ef_construction in args.ef_construction:
+            for ef_search in args.ef_search:
+                build_start = time.time()
+                collection = build_chroma(client, vectors, ids, m, ef_construction, ef_search)
+                build_time = time.time() - build_start
+                for k in args.k:
+                    results, latencies = time_queries(
+                        lambda vector, k: query_chroma(collection, vector, k),
+                        query_vectors,
+                        k,
+                    )
+                    rows.append(
+                        {
+                            **common,
+                            "backend": "chroma-hnsw",
+                            "k": k,
+                            "hnsw_m": m,
+                            "ef_construction": ef_construction,
+                            "ef_search": ef_search,
+                            "build_time_s": build_time,
+                            "p50_ms": percentile_ms(latencies, 50),
+                            "p95_ms": percentile_ms(latencies, 95),
+                            "recall_at_k": recall_at_k(results, [relevant[:k] for relevant in expected]),
+                        }
+                    )
+                client.delete_collection(collection.name)
+                print(f"  chroma M={m} ef_construction={ef_construction} ef_search={ef_search} done")
+    return rows
+
+
+def save_results(rows: list, output_dir: str) -> tuple:
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    json_path = output_dir / f"retrieval_benchmark_{timestamp}.json"
+    csv_path = output_dir / f"retrieval_benchmark_{timestamp}.csv"
+    with open(json_path, "w") as f:
+        json.dump({"timestamp": datetime.now().isoformat(), "results": rows}, f, indent=2)
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    return json_path, csv_path
+
+
+def _int_list(value: str) -> list:
+    return [int(item) for item in value.split(",") if item]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark retrieval latency and recall over a parameter grid")
+    parser.add_argument("--corpus", choices=["documents", "synthetic"], default="documents")
+    parser.add_argument("--size", type=int, default=5000, help="Number of synthetic chunks")
+    parser.add_argument("--paraphrases", type=int, default=2, choices=[0, 1, 2], help="Paraphrases per eval question")
+    parser.add_argument("--dimension", type=int, default=256, help="Fake embedding dimension")
+    parser.add_argument("--k", type=_int_list, default=[1, 3, 5])
+    parser.add_argument("--hnsw-m", type=_int_list, default=[8, 16, 32])
+    parser.add_argument("--ef-construction", type=_int_list, default=[100])
+    parser.add_argument("--ef-search", type=_int_list, default=[10, 50, 100])
+    parser.add_argument("--numpy-dtypes", type=lambda value: value.split(","), default=["float32", "int8"])
+    parser.add_argument("--output-dir", default=RESULTS_PATH)
+    args = parser.parse_args()
+
+    chunks = load_document_chunks() if args.corpus == "documents" else synthetic_chunks(args.size)
+    if not chunks:
+        print(f"No documents found in {DOCUMENTS_PATH}. Use --corpus synthetic or add .txt / .md files.")
+        return
+    queries = build_queries(args.paraphrases)
+    print(f"📏 Benchmarking {len(chunks)} chunks ({args.corpus}) with {len(queries)} queries")
+
+    rows = run_benchmark(chunks, queries, args)
+
+    print(f"\n{'backend':<14} {'k':>3} {'M':>4} {'ef':>5} {'build s':>8} {'p50 ms':>8} {'p95 ms':>8} {'recall':>7}")
+    for row in rows:
+        print(
+            f"{row['backend']:<14} {row['k']:>3} {row['hnsw_m'] or '-':>4} {row['ef_search'] or '-':>5} "
+            f"{row['build_time_s']:>8.3f} {row['p50_ms']:>8.3f} {row['p95_ms']:>8.3f} {row['recall_at_k']:>7.3f}"
+        )
+
+    json_path, csv_path = save_results(rows, args.output_dir)
+    print(f"\n💾 Results saved to {json_path} and {csv_path}")
+
+
+if __name__ == "__main__":
+    main()
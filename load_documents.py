@@ -1,106 +1,448 @@
 """
 Simple document loader and indexer
 Loads documents from data/documents and creates a vector index
+Re-runs are incremental: a manifest of file and chunk hashes decides which
+chunks are embedded, updated, deleted or skipped
 """
 
+import argparse
+import hashlib
+import json
 import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from dotenv import load_dotenv
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_chroma import Chroma
 from langchain_community.document_loaders import TextLoader, UnstructuredMarkdownLoader
 from langchain_ollama import OllamaEmbeddings
 
-load_dotenv()
+from app.config.config import (
+    CHROMA_PERSIST_DIRECTORY,
+    EMBEDDING_MODEL,
+    INGEST_MANIFEST_PATH,
+    LEXICAL_INDEX_PATH,
+    NUMPY_INDEX_DTYPE,
+    NUMPY_INDEX_PATH,
+    OLLAMA_BASE_URL,
+    VECTOR_BACKEND,
+)
+from app.vector_store.category_router import classify_text
+from app.vector_store.index_registry import (
+    check_compatibility,
+    describe_embeddings,
+    get_active_collection,
+    new_collection_name,
+    set_active_collection,
+)
+from app.vector_store.lexical_index import LexicalIndex
+from app.vector_store.numpy_index import META_FILE, NumpyVectorIndex
 
-# Configuration
-OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "gemma3:12b")
-CHROMA_PERSIST_DIRECTORY = os.getenv("CHROMA_PERSIST_DIRECTORY", "./data/vector_store")
+# Index paths and the embedding model come from app.config, so the indexer writes
+# where the API and the index reloader read (all under VECTOR_STORE_PATH)
 DOCUMENTS_PATH = "./data/documents"
 
+# Supported file types: suffix -> (file_type, loader)
+LOADERS = {".txt": ("txt", TextLoader), ".md": ("md", UnstructuredMarkdownLoader)}
+# Streaming pipeline: chunks per embedding request / add() call, concurrent embedding
+# requests, and retries (with exponential backoff) of a failed embedding request
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "4"))
+INGEST_MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", "3"))
+INGEST_RETRY_BACKOFF = float(os.getenv("INGEST_RETRY_BACKOFF", "1.0"))
 
-def load_documents():
-    """Load documents from the documents directory"""
-    documents = []
-    docs_path = Path(DOCUMENTS_PATH)
 
+def discover_files():
+    """List the supported files under the documents directory"""
+    docs_path = Path(DOCUMENTS_PATH)
     if not docs_path.exists():
         print(f"Documents directory {DOCUMENTS_PATH} not found. Creating it...")
         docs_path.mkdir(parents=True, exist_ok=True)
-        return documents
+        return []
+    return sorted(path for path in docs_path.rglob("*") if path.suffix in LOADERS and path.is_file())
+
+
+def load_file(file_path):
+    """Load one file with the loader for its type"""
+    file_type, loader_class = LOADERS[file_path.suffix]
+    docs = loader_class(str(file_path)).load()
+    for doc in docs:
+        doc.metadata["source"] = str(file_path)
+        doc.metadata["file_type"] = file_type
+    return docs
+
+
+def split_documents(documents):
+    """Split documents into chunks with offsets and a product-line category"""
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, add_start_index=True)
+
+    chunks = text_splitter.split_documents(documents)
+    # Character offsets let retrieval merge overlapping or adjacent chunks
+    for chunk in chunks:
+        chunk.metadata["end_index"] = chunk.metadata["start_index"] + len(chunk.page_content)
+        # Product-line tag used for per-category partitions and query routing
+        chunk.metadata["category"] = classify_text(chunk.page_content)
+    return chunks
+
+
+def file_hash(file_path) -> str:
+    return hashlib.sha256(Path(file_path).read_bytes()).hexdigest()
+
+
+def file_stat(file_path) -> dict:
+    """Size and modification time, compared before hashing so unchanged files are not read"""
+    stat = os.stat(file_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def chunk_ids(chunks) -> list:
+    """Content-addressed chunk ids: the same text in the same file keeps its id wherever it moves"""
+    ids = []
+    occurrences = {}
+    for chunk in chunks:
+        key = f"{chunk.metadata['source']}\x00{chunk.page_content}"
+        occurrence = occurrences.get(key, 0)
+        occurrences[key] = occurrence + 1
+        ids.append(hashlib.sha256(f"{key}\x00{occurrence}".encode()).hexdigest())
+    return ids
 
-    # Support txt and md files
-    for file_path in docs_path.rglob("*.txt"):
-        try:
-            loader = TextLoader(str(file_path))
-            docs = loader.load()
-            for doc in docs:
-                doc.metadata["source"] = str(file_path)
-                doc.metadata["file_type"] = "txt"
-            documents.extend(docs)
-            print(f"Loaded {len(docs)} documents from {file_path}")
-        except Exception as e:
-            print(f"Error loading {file_path}: {e}")
 
-    for file_path in docs_path.rglob("*.md"):
+def metadata_hash(metadata: dict) -> str:
+    return hashlib.sha256(json.dumps(metadata, sort_keys=True).encode()).hexdigest()
+
+
+def load_manifest() -> dict:
+    if not os.path.exists(INGEST_MANIFEST_PATH):
+        return {"files": {}}
+    with open(INGEST_MANIFEST_PATH, "r") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: dict):
+    Path(INGEST_MANIFEST_PATH).parent.mkdir(parents=True, exist_ok=True)
+    temp_path = f"{INGEST_MANIFEST_PATH}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, INGEST_MANIFEST_PATH)
+
+
+def batched(items, size: int):
+    """Group an iterable into lists of ``size`` items without materializing it"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def embed_with_retry(embeddings, texts: list, max_retries: int = INGEST_MAX_RETRIES):
+    """Embed one batch, retrying transient failures with exponential backoff and jitter"""
+    for attempt in range(max_retries + 1):
         try:
-            loader = UnstructuredMarkdownLoader(str(file_path))
-            docs = loader.load()
-            for doc in docs:
-                doc.metadata["source"] = str(file_path)
-                doc.metadata["file_type"] = "md"
-            documents.extend(docs)
-            print(f"Loaded {len(docs)} documents from {file_path}")
+            return embeddings.embed_documents(texts)
         except Exception as e:
-            print(f"Error loading {file_path}: {e}")
+            if attempt == max_retries:
+                raise
+            delay = INGEST_RETRY_BACKOFF * 2**attempt * (1 + random.random())
+            print(f"⚠️ Embedding batch failed ({e}); retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+            time.sleep(delay)
 
-    return documents
 
+def embed_and_write(
+    collection,
+    embeddings,
+    chunks,
+    batch_size: int = INGEST_BATCH_SIZE,
+    concurrency: int = INGEST_CONCURRENCY,
+    max_retries: int = INGEST_MAX_RETRIES,
+) -> int:
+    """Embed a stream of ``(id, text, metadata)`` chunks and add them to ``collection``
 
-def create_vector_store(documents):
-    """Create vector store from documents"""
-    if not documents:
-        print("No documents to index")
-        return None
+    Batches are embedded by ``concurrency`` workers while the caller's generator keeps
+    loading and splitting files. At most two batches per worker are in flight, so memory
+    stays bounded however large the corpus is. Batches are written in order from this
+    thread; a batch that still fails after its retries aborts the run.
 
-    # Split documents
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    Returns:
+        Number of chunks written
+    """
+    start_time = time.time()
+    written = 0
+    pending = deque()
 
-    chunks = text_splitter.split_documents(documents)
-    print(f"Split {len(documents)} documents into {len(chunks)} chunks")
+    def write_next():
+        nonlocal written
+        batch, future = pending.popleft()
+        collection.add(
+            ids=[chunk_id for chunk_id, _, _ in batch],
+            embeddings=future.result(),
+            documents=[text for _, text, _ in batch],
+            metadatas=[metadata for _, _, metadata in batch],
+        )
+        written += len(batch)
+        print(f"Embedded {written} chunks ({written / (time.time() - start_time):.1f} chunks/sec)")
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        try:
+            for batch in batched(chunks, batch_size):
+                texts = [text for _, text, _ in batch]
+                pending.append((batch, executor.submit(embed_with_retry, embeddings, texts, max_retries)))
+                while len(pending) >= 2 * concurrency:
+                    write_next()
+            while pending:
+                write_next()
+        except BaseException:
+            for _, future in pending:
+                future.cancel()
+            raise
+    return written
 
-    # Initialize embeddings
-    embeddings = OllamaEmbeddings(model=OLLAMA_MODEL, base_url=OLLAMA_BASE_URL)
 
-    # Create vector store
-    vector_store = Chroma.from_documents(
-        documents=chunks, embedding=embeddings, persist_directory=CHROMA_PERSIST_DIRECTORY
+def open_collection(embeddings, rebuild: bool = False):
+    """Open the active collection, or start a new versioned one when there is none yet or on rebuild
+
+    Returns:
+        Tuple of (vector_store, previous_store) where previous_store is the collection to
+        retire once the new one is active, or None when the active collection is updated in place
+    """
+    active = Chroma(
+        collection_name=get_active_collection(CHROMA_PERSIST_DIRECTORY),
+        persist_directory=CHROMA_PERSIST_DIRECTORY,
+        embedding_function=embeddings,
+    )
+    if active._collection.count() and not rebuild:
+        problem = check_compatibility(active._collection.metadata, EMBEDDING_MODEL)
+        if problem:
+            raise RuntimeError(
+                f"{problem}. Run `python migrate_index.py` to re-embed it, or `python load_documents.py --rebuild`"
+            )
+        return active, None
+
+    name = new_collection_name(EMBEDDING_MODEL)
+    if name == active._collection.name:
+        # Names have one-second resolution; reusing the active collection would mix the two
+        time.sleep(1)
+        name = new_collection_name(EMBEDDING_MODEL)
+    vector_store = Chroma(
+        collection_name=name,
+        persist_directory=CHROMA_PERSIST_DIRECTORY,
+        embedding_function=embeddings,
+        collection_metadata=describe_embeddings(embeddings, EMBEDDING_MODEL),
     )
+    print(f"🆕 Creating collection {vector_store._collection.name} ({EMBEDDING_MODEL})")
+    return vector_store, active
+
 
-    print(f"Created vector store with {len(chunks)} chunks")
-    return vector_store
+def update_vector_store(
+    rebuild: bool = False,
+    batch_size: int = INGEST_BATCH_SIZE,
+    concurrency: int = INGEST_CONCURRENCY,
+    max_retries: int = INGEST_MAX_RETRIES,
+):
+    """Bring the vector store in line with data/documents, embedding only new or changed chunks
+
+    Chunks are embedded with ``EMBEDDING_MODEL``, the model the API queries with. A new
+    versioned collection is created on the first run and on ``rebuild``; the previous one
+    keeps serving until the new one is complete.
+
+    Files whose size and modification time match the manifest are skipped without being
+    read, and so are touched files whose content hash is unchanged. In changed files, chunks
+    whose text is unchanged keep their embedding (only moved offsets are written as metadata
+    updates), and chunks whose text changed are re-embedded. Chunks of removed files, and
+    chunks the manifest does not know about (e.g. duplicates from older full re-indexes),
+    are deleted. If a new collection cannot be completed, it is removed again.
+
+    Files are loaded and split one at a time and their new chunks are streamed through
+    ``embed_and_write``, so only the file being split and the batches in flight are held
+    in memory.
+
+    Returns:
+        Tuple of (vector_store, summary) where summary counts added, updated, deleted and
+        skipped chunks
+    """
+    embeddings = OllamaEmbeddings(model=EMBEDDING_MODEL, base_url=OLLAMA_BASE_URL)
+    vector_store, previous_store = open_collection(embeddings, rebuild)
+    if previous_store is None:
+        files, summary = _sync_collection(
+            vector_store, embeddings, load_manifest()["files"], batch_size, concurrency, max_retries
+        )
+        save_manifest({"files": files})
+        return vector_store, summary
+
+    # A new collection: drop it if the run fails or is interrupted, so no half-built orphan is left
+    try:
+        files, summary = _sync_collection(vector_store, embeddings, {}, batch_size, concurrency, max_retries)
+    except BaseException:
+        print(f"🧹 Removing incomplete collection {vector_store._collection.name}")
+        vector_store.delete_collection()
+        raise
+
+    # The new collection is complete: switch to it. A non-empty old one is kept for rollback
+    set_active_collection(CHROMA_PERSIST_DIRECTORY, vector_store._collection.name)
+    save_manifest({"files": files})
+    if previous_store._collection.count():
+        print(f"Kept previous collection {previous_store._collection.name}; remove with migrate_index.py --prune")
+    else:
+        previous_store.delete_collection()
+    return vector_store, summary
+
+
+def _sync_collection(
+    vector_store, embeddings, previous_files: dict, batch_size: int, concurrency: int, max_retries: int
+):
+    """Embed, update and delete chunks so ``vector_store`` matches the documents
+
+    ``previous_files`` is the manifest of what ``vector_store`` already holds (empty for a new collection).
+
+    Returns:
+        Tuple of (files, summary): the new manifest entries per file, and counts of added,
+        updated, deleted and skipped chunks
+    """
+    existing_ids = set(vector_store._collection.get(include=[])["ids"])
+
+    summary = {"added": 0, "updated": 0, "deleted": 0, "skipped": 0}
+    files = {}
+    metadata_updates = []
+    stale_ids = set()
+
+    def new_chunks():
+        """Scan the documents, yielding ``(id, text, metadata)`` for chunks that need embedding"""
+        nonlocal stale_ids
+        for file_path in discover_files():
+            source = str(file_path)
+            previous = previous_files.get(source)
+            stat = file_stat(file_path)
+            if previous and all(previous.get(key) == value for key, value in stat.items()):
+                files[source] = previous
+                summary["skipped"] += len(previous["chunks"])
+                continue
+            digest = file_hash(file_path)
+            if previous and previous["hash"] == digest:
+                files[source] = {**previous, **stat}
+                summary["skipped"] += len(previous["chunks"])
+                continue
+
+            try:
+                chunks = split_documents(load_file(file_path))
+            except Exception as e:
+                print(f"Error loading {file_path}: {e}")
+                if previous:
+                    files[source] = previous
+                continue
+            print(f"Loaded {file_path}: {len(chunks)} chunks")
+
+            old_chunks = previous["chunks"] if previous else {}
+            entry = {}
+            added = []
+            for chunk_id, chunk in zip(chunk_ids(chunks), chunks):
+                entry[chunk_id] = metadata_hash(chunk.metadata)
+                if chunk_id in old_chunks or chunk_id in existing_ids:
+                    if old_chunks.get(chunk_id) == entry[chunk_id]:
+                        summary["skipped"] += 1
+                    else:
+                        metadata_updates.append((chunk_id, chunk.metadata))
+                        summary["updated"] += 1
+                else:
+                    added.append((chunk_id, chunk.page_content, chunk.metadata))
+            removed = set(old_chunks) - set(entry)
+            stale_ids |= removed
+            # New text that replaces removed text in the same file counts as an update
+            replaced = min(len(added), len(removed))
+            summary["updated"] += replaced
+            summary["added"] += len(added) - replaced
+            summary["deleted"] += len(removed) - replaced
+            files[source] = {"hash": digest, **stat, "chunks": entry}
+            yield from added
+
+    embed_and_write(vector_store._collection, embeddings, new_chunks(), batch_size, concurrency, max_retries)
+
+    for source, previous in previous_files.items():
+        if source not in files:
+            print(f"Removed {source}: {len(previous['chunks'])} chunks")
+            stale_ids |= set(previous["chunks"])
+            summary["deleted"] += len(previous["chunks"])
+
+    known_ids = {chunk_id for entry in files.values() for chunk_id in entry["chunks"]}
+    untracked = existing_ids - known_ids - stale_ids
+    summary["deleted"] += len(untracked)
+    stale_ids = (stale_ids | untracked) & existing_ids
+
+    for batch in batched(stale_ids, batch_size):
+        vector_store.delete(ids=batch)
+    for batch in batched(metadata_updates, batch_size):
+        vector_store._collection.update(
+            ids=[chunk_id for chunk_id, _ in batch], metadatas=[metadata for _, metadata in batch]
+        )
+
+    return files, summary
+
+
+def export_numpy_index(vector_store):
+    """Export the Chroma vectors to the NumPy backend without re-embedding"""
+    index = NumpyVectorIndex.from_chroma(vector_store._collection, dtype=NUMPY_INDEX_DTYPE)
+    index.save(NUMPY_INDEX_PATH)
+    return index
+
+
+def numpy_index_collection():
+    """Name of the collection the saved NumPy index was exported from, or None"""
+    try:
+        with open(os.path.join(NUMPY_INDEX_PATH, META_FILE), "r") as f:
+            return json.load(f).get("collection")
+    except (OSError, ValueError):
+        return None
+
+
+def build_lexical_index(vector_store):
+    """Build the BM25 inverted index over the same chunks (and ids) as the vector store"""
+    index = LexicalIndex.from_chroma(vector_store._collection)
+    index.save(LEXICAL_INDEX_PATH)
+    return index
 
 
 def main():
     """Main function"""
-    print("🔍 Loading documents...")
-    documents = load_documents()
+    parser = argparse.ArgumentParser(description="Index data/documents into the vector store")
+    parser.add_argument(
+        "--rebuild", action="store_true", help="Re-embed every chunk into a new collection, then switch to it"
+    )
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="Chunks per embedding request")
+    parser.add_argument("--concurrency", type=int, default=INGEST_CONCURRENCY, help="Concurrent embedding requests")
+    parser.add_argument("--max-retries", type=int, default=INGEST_MAX_RETRIES, help="Retries of a failed batch")
+    args = parser.parse_args()
 
-    if not documents:
+    print("🔍 Scanning documents...")
+    if not discover_files() and not load_manifest()["files"]:
         print("No documents found. Add .txt or .md files to data/documents/")
         return
 
-    print(f"📚 Found {len(documents)} documents")
-
-    print("🔧 Creating vector store...")
-    vector_store = create_vector_store(documents)
+    print("🔧 Updating vector store...")
+    try:
+        vector_store, summary = update_vector_store(
+            rebuild=args.rebuild, batch_size=args.batch_size, concurrency=args.concurrency, max_retries=args.max_retries
+        )
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return
+    print(
+        f"✅ Vector store up to date: {summary['added']} added, {summary['updated']} updated, "
+        f"{summary['deleted']} deleted, {summary['skipped']} skipped"
+    )
 
-    if vector_store:
-        print("✅ Vector store created successfully!")
-    else:
-        print("❌ Failed to create vector store")
+    changed = summary["added"] or summary["updated"] or summary["deleted"]
+    # The NumPy export is only read by VECTOR_BACKEND=numpy
+    if VECTOR_BACKEND == "numpy" and (changed or numpy_index_collection() != vector_store._collection.name):
+        print("🧮 Exporting NumPy index...")
+        export_numpy_index(vector_store)
+    if changed or not os.path.exists(LEXICAL_INDEX_PATH):
+        print("🔤 Building lexical index...")
+        build_lexical_index(vector_store)
 
 
 if __name__ == "__main__":
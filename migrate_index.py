@@ -0,0 +1,141 @@
+"""
+Embedding model migration for the vector store
+Re-embeds the active collection into a new versioned collection while the old
+one keeps serving, then switches the active collection pointer atomically
+"""
+
+import argparse
+import os
+import shutil
+
+import chromadb
+from langchain_chroma import Chroma
+from langchain_ollama import OllamaEmbeddings
+
+from app.config.config import (
+    CHROMA_PERSIST_DIRECTORY,
+    EMBEDDING_MODEL,
+    NUMPY_INDEX_DTYPE,
+    NUMPY_INDEX_PATH,
+    OLLAMA_BASE_URL,
+    VECTOR_BACKEND,
+)
+from app.vector_store.index_registry import (
+    describe_embeddings,
+    embedding_info,
+    get_active_collection,
+    new_collection_name,
+    set_active_collection,
+)
+from app.vector_store.numpy_index import NumpyVectorIndex
+from load_documents import INGEST_BATCH_SIZE, INGEST_CONCURRENCY, embed_and_write
+
+
+def _collection_names(client) -> list:
+    # Older chromadb versions return names, newer ones Collection objects
+    return [collection if isinstance(collection, str) else collection.name for collection in client.list_collections()]
+
+
+def show_status(client):
+    """Print every collection with its embedding model and size, marking the active one"""
+    active = get_active_collection(CHROMA_PERSIST_DIRECTORY)
+    for name in _collection_names(client):
+        collection = client.get_collection(name)
+        info = embedding_info(collection.metadata)
+        marker = "*" if name == active else " "
+        print(
+            f"{marker} {name}: {collection.count()} chunks, model={info['embedding_model']}, "
+            f"dimension={info['embedding_dimension']}, normalized={info['embedding_normalized']}"
+        )
+
+
+def swap_numpy_index(collection):
+    """Export the new collection to the NumPy backend next to the old index, then swap the directories"""
+    next_path = f"{NUMPY_INDEX_PATH}.next"
+    old_path = f"{NUMPY_INDEX_PATH}.old"
+    NumpyVectorIndex.from_chroma(collection, dtype=NUMPY_INDEX_DTYPE).save(next_path)
+    if os.path.exists(NUMPY_INDEX_PATH):
+        os.replace(NUMPY_INDEX_PATH, old_path)
+    os.replace(next_path, NUMPY_INDEX_PATH)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def migrate(client, embedding_model: str, batch_size: int, concurrency: int):
+    """Re-embed the active collection with ``embedding_model`` and make the result active"""
+    source_name = get_active_collection(CHROMA_PERSIST_DIRECTORY)
+    source = client.get_collection(source_name)
+    total = source.count()
+    embeddings = OllamaEmbeddings(model=embedding_model, base_url=OLLAMA_BASE_URL)
+    target = Chroma(
+        collection_name=new_collection_name(embedding_model),
+        persist_directory=CHROMA_PERSIST_DIRECTORY,
+        embedding_function=embeddings,
+        collection_metadata=describe_embeddings(embeddings, embedding_model),
+    )._collection
+    print(f"🔁 Re-embedding {total} chunks from {source_name} into {target.name} with {embedding_model}")
+
+    def source_chunks():
+        # Page through the source so only one page of it is in memory at a time
+        for offset in range(0, total, batch_size):
+            page = source.get(limit=batch_size, offset=offset, include=["documents", "metadatas"])
+            yield from zip(page["ids"], page["documents"], page["metadatas"])
+
+    try:
+        embed_and_write(target, embeddings, source_chunks(), batch_size, concurrency)
+    except Exception:
+        client.delete_collection(target.name)
+        raise
+
+    if target.count() != total:
+        client.delete_collection(target.name)
+        raise RuntimeError(f"expected {total} chunks in {target.name}, found {target.count()}; migration aborted")
+
+    if VECTOR_BACKEND == "numpy":
+        swap_numpy_index(target)
+    set_active_collection(CHROMA_PERSIST_DIRECTORY, target.name)
+    print(f"✅ Active collection is now {target.name}; {source_name} is kept for rollback")
+    return target.name
+
+
+def prune(client):
+    """Delete every collection except the active one"""
+    active = get_active_collection(CHROMA_PERSIST_DIRECTORY)
+    for name in _collection_names(client):
+        if name != active:
+            client.delete_collection(name)
+            print(f"🗑️ Deleted collection {name}")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Migrate the vector store to another embedding model")
+    parser.add_argument("--model", default=EMBEDDING_MODEL, help="Embedding model to migrate to")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="Chunks per embedding request")
+    parser.add_argument("--concurrency", type=int, default=INGEST_CONCURRENCY, help="Concurrent embedding requests")
+    parser.add_argument("--status", action="store_true", help="List collections and exit")
+    parser.add_argument("--prune", action="store_true", help="Delete all inactive collections and exit")
+    parser.add_argument("--activate", help="Make an existing collection active (e.g. to roll back) and exit")
+    args = parser.parse_args()
+
+    client = chromadb.PersistentClient(path=CHROMA_PERSIST_DIRECTORY)
+    if args.status:
+        show_status(client)
+    elif args.prune:
+        prune(client)
+    elif args.activate:
+        if args.activate not in _collection_names(client):
+            print(f"❌ Collection {args.activate} not found")
+            return
+        if VECTOR_BACKEND == "numpy":
+            swap_numpy_index(client.get_collection(args.activate))
+        set_active_collection(CHROMA_PERSIST_DIRECTORY, args.activate)
+        print(f"✅ Active collection is now {args.activate}")
+    else:
+        try:
+            migrate(client, args.model, args.batch_size, args.concurrency)
+        except Exception as e:
+            print(f"❌ Migration failed, the active collection is unchanged: {e}")
+
+
+if __name__ == "__main__":
+    main()
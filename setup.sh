@@ -41,7 +41,7 @@ OLLAMA_BASE_URL=http://localhost:11434
 OLLAMA_MODEL=gemma3:1b
 
 # Vector Store
-CHROMA_PERSIST_DIRECTORY=./data/vector_store
+VECTOR_STORE_PATH=./data/vector_store
 
 # App Settings
 API_TITLE=Simple Insurance Chatbot
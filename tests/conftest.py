@@ -0,0 +1,36 @@
+"""
+Shared pytest setup: point every data path at a temporary directory before the app is
+imported, so tests never open or modify the indexes and caches under data/.
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+
+_DATA_DIR = tempfile.mkdtemp(prefix="insurance-chatbot-tests-")
+os.environ.setdefault("VECTOR_STORE_PATH", os.path.join(_DATA_DIR, "vector_store"))
+os.environ.setdefault("EMBEDDING_CACHE_PATH", os.path.join(_DATA_DIR, "embedding_cache", "embeddings.sqlite3"))
+os.environ.setdefault("EVAL_CACHE_PATH", os.path.join(_DATA_DIR, "eval_cache.sqlite3"))
+os.environ.setdefault("INDEX_WATCH_INTERVAL", "0")
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from langchain_core.embeddings import Embeddings  # noqa: E402
+
+# Evaluation scripts run by hand against a live Ollama server (python tests/test_evaluator.py)
+collect_ignore = ["test_evaluator.py", "test_semantic_evaluator.py", "run_promptfoo.py"]
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic offline embeddings: a fixed pseudo-random vector per text."""
+
+    def __init__(self, dimension: int = 16):
+        self.dimension = dimension
+
+    def embed_documents(self, texts: list) -> list:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> list:
+        digest = hashlib.sha256(text.encode()).digest()
+        return [byte / 255 - 0.5 for byte in digest[: self.dimension]]
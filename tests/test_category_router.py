@@ -0,0 +1,59 @@
+"""
+Keyword classification of chunks and partition routing of queries.
+"""
+
+import pytest
+
+from app.vector_store.category_router import DEFAULT_CATEGORY, CategoryRouter, category_scores, classify_text
+
+
+def test_chunks_get_the_category_with_most_keyword_hits():
+    assert classify_text("Collision coverage pays to repair your car after an accident.") == "auto"
+    assert classify_text("Flood damage to the dwelling and your belongings.") == "home"
+    assert classify_text("Name a beneficiary for the death benefit of your term policy.") == "life"
+    assert classify_text("Your copay for a doctor visit under the PPO plan.") == "health"
+
+
+def test_chunks_without_keywords_fall_back_to_the_default_category():
+    assert classify_text("Thank you for reading this document.") == DEFAULT_CATEGORY
+
+
+def test_keywords_match_after_stemming():
+    assert category_scores("Drivers involved in collisions")["auto"] == 2
+
+
+@pytest.mark.parametrize(
+    "query, categories",
+    [
+        ("Does my car insurance cover collision damage?", ["auto"]),
+        # A second category is searched when it scores at least half of the best one
+        ("Will flood damage to my house affect my car?", ["home", "auto"]),
+        ("Does a car accident claim after a collision affect my home policy?", ["auto"]),
+        ("What is the meaning of this?", []),
+        # Ties that do not fit in the partitions searched fall back to a global search
+        ("car, house or doctor?", []),
+    ],
+)
+def test_route(query, categories):
+    assert CategoryRouter(max_partitions=2).route(query) == categories
+
+
+def test_single_partition_router_searches_globally_on_a_tie():
+    router = CategoryRouter(max_partitions=1)
+
+    assert router.route("car and house") == []
+    assert router.route("car and a car accident near the house") == ["auto"]
+
+
+def test_stats_count_routed_and_global_searches():
+    router = CategoryRouter()
+    router.route("my car")
+    router.route("car and roof")
+    router.route("hello")
+
+    stats = router.stats()
+
+    assert stats["routed"]["auto"] == 2
+    assert stats["routed"]["home"] == 1
+    assert stats["global"] == 1
+    assert stats["fallbacks"] == 0
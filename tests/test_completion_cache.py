@@ -0,0 +1,63 @@
+"""
+Evaluation completion cache: cached /eval/run answers and verdicts keep the event loop free.
+"""
+
+import asyncio
+import time
+
+from app.evaluation import evaluator
+from app.evaluation.completion_cache import CompletionCache
+
+JUDGE_RESPONSE = "Accuracy: 4/5\nCompleteness: 4/5\nClarity: 5/5\nRelevance: 5/5\nHelpfulness: 4/5\nOverall: 4.4/5"
+
+
+def fake_model(calls: list):
+    async def complete(messages, temperature=None, max_tokens=None, model=None):
+        calls.append(model)
+        response = JUDGE_RESPONSE if model == evaluator.EVAL_JUDGE_MODEL else "An answer."
+        return response, {"wall_time": 0.01}
+
+    return complete
+
+
+async def run_with_ticker(**kwargs):
+    """Run an evaluation while a ticker records the longest gap between event loop turns."""
+    gaps = []
+    done = asyncio.Event()
+
+    async def ticker():
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    ticking = asyncio.create_task(ticker())
+    try:
+        results = await evaluator.run_evaluation(log_to_mlflow=False, **kwargs)
+    finally:
+        done.set()
+        await ticking
+    return results, max(gaps)
+
+
+def test_cached_evaluation_keeps_event_loop_responsive(monkeypatch):
+    calls = []
+    monkeypatch.setattr(evaluator, "aget_ollama_response_with_metrics", fake_model(calls))
+    asyncio.run(evaluator.run_evaluation(sample_size=3, log_to_mlflow=False, concurrency=3, cache_mode="refresh"))
+    assert len(calls) == 6
+
+    # Simulate slow disk lookups; they must run in worker threads, not on the loop
+    get = CompletionCache.get
+
+    def slow_get(self, key, stage):
+        time.sleep(0.1)
+        return get(self, key, stage)
+
+    monkeypatch.setattr(CompletionCache, "get", slow_get)
+    results, max_gap = asyncio.run(run_with_ticker(sample_size=3, concurrency=3, cache_mode="read_only"))
+
+    assert len(calls) == 6
+    assert results["summary"]["cache"]["hits"] == {"answer": 3, "judge": 3}
+    assert max_gap < 0.08
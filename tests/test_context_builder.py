@@ -0,0 +1,98 @@
+"""
+Merging of retrieved chunks and token-budgeted context assembly.
+"""
+
+from langchain_core.documents import Document
+
+from app.vector_store.context_builder import build_context, estimate_tokens, merge_chunks, source_label
+
+POLICY = (
+    "Your policy covers fire damage to the dwelling. "
+    "Flood damage is excluded unless you add flood coverage. "
+    "Claims must be filed within thirty days of the loss. "
+    "The deductible applies to every covered claim."
+)
+
+
+def chunk(source: str, start: int, length: int, text: str = POLICY) -> Document:
+    return Document(page_content=text[start : start + length], metadata={"source": source, "start_index": start})
+
+
+def test_overlapping_chunks_merge_into_one_span():
+    docs = [chunk("policy.md", 40, 80), chunk("policy.md", 0, 60), chunk("policy.md", 110, 60)]
+
+    merged = merge_chunks(docs)
+
+    assert len(merged) == 1
+    assert merged[0].page_content == POLICY[0:170]
+    assert merged[0].metadata == {"source": "policy.md", "start_index": 0, "end_index": 170}
+    assert source_label(merged[0]) == "policy.md#0-170"
+
+
+def test_adjacent_chunks_merge_only_within_the_gap():
+    text = "a" * 10 + "b" * 10 + "c" * 10
+    touching = merge_chunks([chunk("x.md", 0, 10, text), chunk("x.md", 12, 8, text)], max_gap=2)
+    apart = merge_chunks([chunk("x.md", 0, 10, text), chunk("x.md", 13, 8, text)], max_gap=2)
+
+    assert [(doc.metadata["start_index"], doc.metadata["end_index"]) for doc in touching] == [(0, 20)]
+    assert [(doc.metadata["start_index"], doc.metadata["end_index"]) for doc in apart] == [(0, 10), (13, 21)]
+
+
+def test_chunks_from_different_sources_are_not_merged():
+    docs = [chunk("a.md", 0, 60), chunk("b.md", 40, 60)]
+
+    assert [doc.metadata["source"] for doc in merge_chunks(docs)] == ["a.md", "b.md"]
+
+
+def test_merged_spans_keep_the_best_rank():
+    docs = [chunk("b.md", 0, 50), chunk("a.md", 100, 50), chunk("a.md", 60, 50)]
+
+    merged = merge_chunks(docs)
+
+    assert [doc.metadata["source"] for doc in merged] == ["b.md", "a.md"]
+
+
+def test_near_duplicates_are_dropped():
+    docs = [
+        Document(page_content=POLICY, metadata={"source": "a.md"}),
+        Document(page_content=POLICY + " Call us.", metadata={"source": "copy.md"}),
+        Document(page_content="Roadside assistance is included.", metadata={"source": "auto.md"}),
+    ]
+
+    assert [doc.metadata["source"] for doc in merge_chunks(docs)] == ["a.md", "auto.md"]
+
+
+def test_context_within_budget_is_kept_whole():
+    docs = [chunk("policy.md", 0, 100), chunk("policy.md", 80, 100), chunk("other.md", 0, 50, "Other text.")]
+
+    context, sources, stats = build_context("fire damage", docs, token_budget=1000)
+
+    assert context == POLICY[0:180] + "\nOther text."
+    assert sources == ["policy.md#0-180", "other.md#0-11"]
+    assert stats["context_tokens"] == estimate_tokens(context)
+    assert stats["tokens_saved"] == stats["original_tokens"] - stats["context_tokens"]
+    assert stats["tokens_saved"] > 0
+
+
+def test_over_budget_context_keeps_the_relevant_sentences():
+    docs = [
+        Document(page_content=POLICY, metadata={"source": "policy.md"}),
+        Document(page_content="Roadside assistance is included. Rental cars are not.", metadata={"source": "auto.md"}),
+    ]
+
+    context, sources, stats = build_context("How many days do I have to file a claim?", docs, token_budget=20)
+
+    assert "Claims must be filed within thirty days of the loss." in context
+    assert "Roadside" not in context
+    assert sources == ["policy.md"]
+    assert stats["context_tokens"] <= 20
+    assert stats["sentences_kept"] < stats["sentences_total"]
+
+
+def test_zero_budget_keeps_every_chunk():
+    docs = [Document(page_content=POLICY, metadata={"source": "policy.md"})]
+
+    context, sources, _ = build_context("anything", docs, token_budget=0)
+
+    assert context == POLICY
+    assert sources == ["policy.md"]
@@ -0,0 +1,62 @@
+"""
+Hot reload of the Chroma store after another process changed it in place.
+"""
+
+import asyncio
+import subprocess
+import sys
+
+from conftest import HashEmbeddings
+from langchain_chroma import Chroma
+
+from app.vector_store import index_reloader, vector_store
+from app.vector_store.index_registry import set_active_collection
+
+COLLECTION = "docs-test-reload"
+
+DELETE_SCRIPT = """
+import sys
+import chromadb
+
+collection = chromadb.PersistentClient(path=sys.argv[1]).get_collection(sys.argv[2])
+collection.delete(ids=sys.argv[3:])
+"""
+
+
+def test_reload_sees_deletes_made_by_another_process(tmp_path, monkeypatch):
+    persist_directory = str(tmp_path / "vector_store")
+    embeddings = HashEmbeddings()
+    for module in (vector_store, index_reloader):
+        monkeypatch.setattr(module, "CHROMA_PERSIST_DIRECTORY", persist_directory)
+        monkeypatch.setattr(module, "LEXICAL_INDEX_PATH", str(tmp_path / "lexical_index.json"))
+        monkeypatch.setattr(module, "VECTOR_BACKEND", "chroma")
+        monkeypatch.setattr(module, "embeddings", embeddings)
+    # Restore the module's snapshot once the test is done
+    monkeypatch.setattr(vector_store, "_stores", vector_store.get_stores())
+
+    ids = [f"chunk-{i}" for i in range(40)]
+    store = Chroma(
+        collection_name=COLLECTION,
+        persist_directory=persist_directory,
+        embedding_function=embeddings,
+        collection_metadata={"embedding_model": vector_store.EMBEDDING_MODEL},
+    )
+    store.add_texts([f"policy text {i}" for i in range(40)], ids=ids)
+    set_active_collection(persist_directory, COLLECTION)
+    vector_store.swap_stores(vector_store.load_stores())
+    query = embeddings.embed_query("policy text 4")
+    assert len(vector_store._search_by_vector(vector_store.get_stores().vector_store, query, 10)) == 10
+
+    # An incremental re-ingest in another process deletes half of the chunks
+    deleted = ids[::2]
+    subprocess.run([sys.executable, "-c", DELETE_SCRIPT, persist_directory, COLLECTION, *deleted], check=True)
+
+    stats = asyncio.run(index_reloader.IndexReloader(interval=0).reload("test"))
+    assert stats["reloads"] == 1 and stats["failures"] == 0
+
+    current = vector_store.get_stores().vector_store
+    assert vector_store.count_documents(current) == 20
+    docs = vector_store._search_by_vector(current, query, 10)
+    assert len(docs) == 10
+    assert not {doc.id for doc in docs} & set(deleted)
+    assert all(doc.page_content.startswith("policy text") for doc in docs)
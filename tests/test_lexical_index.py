@@ -0,0 +1,113 @@
+"""
+BM25 lexical search and reciprocal rank fusion of result lists.
+"""
+
+import pytest
+from langchain_core.documents import Document
+
+from app.vector_store.lexical_index import RRF_K, LexicalIndex, reciprocal_rank_fusion
+
+CHUNKS = [
+    ("cobra", "COBRA lets you keep your employer health coverage after leaving a job.", "health"),
+    ("hsa", "An HSA is a tax-advantaged savings account paired with a high-deductible plan.", "health"),
+    ("nfip", "The NFIP offers flood insurance for homes in participating communities.", "home"),
+    ("flood", "Standard homeowners policies exclude flood damage; buy separate flood coverage.", "home"),
+    ("auto", "Collision coverage pays for damage to your car after an accident.", "auto"),
+]
+
+
+@pytest.fixture
+def index():
+    ids, texts, categories = zip(*CHUNKS)
+    return LexicalIndex.build(ids, texts, [{"category": category} for category in categories])
+
+
+def test_exact_terms_rank_their_chunk_first(index):
+    assert index.search("What does COBRA cover?", k=1)[0].id == "cobra"
+    assert index.search("hsa", k=1)[0].id == "hsa"
+    assert index.search("NFIP", k=1)[0].id == "nfip"
+
+
+def test_scores_are_descending_and_unknown_terms_match_nothing(index):
+    results = index.search_with_scores("flood coverage", k=5)
+
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+    assert results[0][0].id == "flood"
+    assert index.search("xylophone", k=3) == []
+
+
+def test_category_filter(index):
+    docs = index.search("coverage damage", k=5, categories=["auto"])
+
+    assert [doc.id for doc in docs] == ["auto"]
+    assert docs[0].metadata == {"category": "auto"}
+
+
+def test_save_and_load_round_trip(tmp_path, index):
+    path = tmp_path / "lexical" / "index.json"
+    index.save(str(path))
+    loaded = LexicalIndex.load(str(path))
+
+    assert loaded.count() == index.count()
+    assert not (tmp_path / "lexical" / "index.json.tmp").exists()
+    for query in ("flood coverage", "savings account", "employer health"):
+        assert loaded.search_with_scores(query, k=3) == index.search_with_scores(query, k=3)
+
+
+class FakeCollection:
+    def __init__(self):
+        self.pages = 0
+
+    def count(self) -> int:
+        return len(CHUNKS)
+
+    def get(self, limit: int, offset: int, include: list) -> dict:
+        self.pages += 1
+        page = CHUNKS[offset : offset + limit]
+        return {
+            "ids": [chunk_id for chunk_id, _, _ in page],
+            "documents": [text for _, text, _ in page],
+            "metadatas": [{"category": category} for _, _, category in page],
+        }
+
+
+def test_from_chroma_pages_through_the_collection(index):
+    collection = FakeCollection()
+    paged = LexicalIndex.from_chroma(collection, page_size=2)
+
+    assert collection.pages == 3
+    assert paged.ids == index.ids
+    assert paged.postings == index.postings
+
+
+def doc(doc_id: str) -> Document:
+    return Document(page_content=doc_id, id=doc_id)
+
+
+def test_rrf_rewards_documents_found_by_both_retrievers():
+    vector_results = [doc("a"), doc("b"), doc("c")]
+    lexical_results = [doc("c"), doc("d"), doc("a")]
+
+    fused = reciprocal_rank_fusion([vector_results, lexical_results], k=4)
+
+    assert [d.id for d in fused] == ["a", "c", "b", "d"]
+
+
+def test_rrf_uses_the_rank_constant():
+    # With a tiny constant the top rank of one list outweighs two middling ranks
+    first = [doc("a"), doc("b")]
+    second = [doc("c"), doc("b")]
+
+    assert [d.id for d in reciprocal_rank_fusion([first, second], k=1, rrf_k=0)] == ["a"]
+    assert [d.id for d in reciprocal_rank_fusion([first, second], k=1, rrf_k=RRF_K)] == ["b"]
+
+
+def test_rrf_matches_documents_without_ids_by_source_and_offset():
+    chunk = {"source": "policy.md", "start_index": 120}
+    first = [Document(page_content="Deductibles apply.", metadata=chunk), doc("x")]
+    second = [doc("y"), Document(page_content="Deductibles apply.", metadata=dict(chunk))]
+
+    fused = reciprocal_rank_fusion([first, second], k=3)
+
+    assert [d.page_content for d in fused] == ["Deductibles apply.", "y", "x"]
@@ -0,0 +1,127 @@
+"""
+Incremental ingestion: which chunks are added, updated, deleted or skipped between runs.
+"""
+
+import os
+
+import chromadb
+import pytest
+from conftest import HashEmbeddings
+
+import load_documents
+
+
+class CountingEmbeddings(HashEmbeddings):
+    """Offline embeddings that record how many texts ingestion sent to be embedded."""
+
+    def __init__(self):
+        super().__init__()
+        self.embedded = 0
+
+    def embed_documents(self, texts: list) -> list:
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+
+def paragraphs(name: str, count: int) -> str:
+    return "\n\n".join(f"Paragraph {i} of the {name} guide. " * 12 for i in range(count))
+
+
+@pytest.fixture
+def ingest(tmp_path, monkeypatch):
+    """Point ingestion at temporary documents and store; returns a function running one ingestion."""
+    documents = tmp_path / "documents"
+    documents.mkdir()
+    persist_directory = str(tmp_path / "vector_store")
+    embeddings = CountingEmbeddings()
+    hashed = []
+    file_hash = load_documents.file_hash
+
+    monkeypatch.setattr(load_documents, "DOCUMENTS_PATH", str(documents))
+    monkeypatch.setattr(load_documents, "CHROMA_PERSIST_DIRECTORY", persist_directory)
+    monkeypatch.setattr(load_documents, "INGEST_MANIFEST_PATH", str(tmp_path / "vector_store" / "ingest_manifest.json"))
+    monkeypatch.setattr(load_documents, "OllamaEmbeddings", lambda **kwargs: embeddings)
+    monkeypatch.setattr(load_documents, "file_hash", lambda path: hashed.append(path) or file_hash(path))
+
+    def run(**kwargs):
+        embeddings.embedded = 0
+        hashed.clear()
+        vector_store, summary = load_documents.update_vector_store(**kwargs)
+        return vector_store, summary, embeddings.embedded, len(hashed)
+
+    run.documents = documents
+    run.persist_directory = persist_directory
+    return run
+
+
+def manifest_chunks() -> int:
+    return sum(len(entry["chunks"]) for entry in load_documents.load_manifest()["files"].values())
+
+
+def test_manifest_diff_between_runs(ingest):
+    for name, count in (("auto", 6), ("home", 6), ("life", 4)):
+        (ingest.documents / f"{name}.txt").write_text(paragraphs(name, count))
+
+    vector_store, summary, embedded, _ = ingest()
+    total = vector_store._collection.count()
+    assert total == manifest_chunks() == summary["added"] == embedded > 3
+    assert summary["updated"] == summary["deleted"] == summary["skipped"] == 0
+
+    # Nothing changed: every file is skipped by size and mtime without being read
+    vector_store, summary, embedded, hashed = ingest()
+    assert summary == {"added": 0, "updated": 0, "deleted": 0, "skipped": total}
+    assert embedded == hashed == 0
+
+    # Touched but unchanged: hashed once, still skipped
+    os.utime(ingest.documents / "auto.txt")
+    vector_store, summary, embedded, hashed = ingest()
+    assert summary == {"added": 0, "updated": 0, "deleted": 0, "skipped": total}
+    assert (embedded, hashed) == (0, 1)
+
+    # One paragraph edited in place: only the chunks containing it are re-embedded
+    home = ingest.documents / "home.txt"
+    home.write_text(home.read_text().replace("Paragraph 2 of the home", "Paragraph 9 of the home"))
+    vector_store, summary, embedded, _ = ingest()
+    assert 1 <= embedded < total / 2
+    assert summary == {"added": 0, "updated": embedded, "deleted": 0, "skipped": total - embedded}
+    assert vector_store._collection.count() == manifest_chunks() == total
+
+    # Text inserted before unchanged chunks only moves their offsets: metadata updates, no embedding
+    home.write_text("Preface. " + home.read_text())
+    vector_store, summary, embedded, _ = ingest()
+    assert summary["updated"] > embedded
+    assert vector_store._collection.count() == manifest_chunks() == total
+
+    # Appended text is added to the file's existing chunks
+    with open(ingest.documents / "life.txt", "a") as f:
+        f.write("\n\n" + "A new paragraph about beneficiaries. " * 12)
+    vector_store, summary, embedded, _ = ingest()
+    assert summary["added"] >= 1
+    assert summary["deleted"] == 0
+    assert vector_store._collection.count() == manifest_chunks() == total + summary["added"]
+    total = vector_store._collection.count()
+
+    # A removed file has all of its chunks deleted
+    life_chunks = len(load_documents.load_manifest()["files"][str(ingest.documents / "life.txt")]["chunks"])
+    (ingest.documents / "life.txt").unlink()
+    vector_store, summary, embedded, _ = ingest()
+    assert summary == {"added": 0, "updated": 0, "deleted": life_chunks, "skipped": total - life_chunks}
+    assert embedded == 0
+    assert vector_store._collection.count() == manifest_chunks() == total - life_chunks
+
+
+def test_failed_rebuild_removes_the_incomplete_collection(ingest, monkeypatch):
+    (ingest.documents / "auto.txt").write_text(paragraphs("auto", 4))
+    vector_store, _, _, _ = ingest()
+    active = vector_store._collection.name
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("embedding server down")
+
+    monkeypatch.setattr(load_documents, "embed_with_retry", fail)
+    with pytest.raises(RuntimeError, match="embedding server down"):
+        ingest(rebuild=True)
+
+    client = chromadb.PersistentClient(path=ingest.persist_directory)
+    assert [collection.name for collection in client.list_collections()] == [active]
+    assert load_documents.get_active_collection(ingest.persist_directory) == active
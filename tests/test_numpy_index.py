@@ -0,0 +1,130 @@
+"""
+Save/load round trips and search of the NumPy vector index for every storage dtype.
+"""
+
+import numpy as np
+import pytest
+
+from app.vector_store.numpy_index import NumpyVectorIndex, normalize_rows
+
+DTYPES = ["float32", "float16", "int8", "binary"]
+CATEGORIES = ["auto", "home", "life"]
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(300, 64)).astype(np.float32)
+    ids = [f"chunk-{row}" for row in range(len(vectors))]
+    texts = [f"text {row}" for row in range(len(vectors))]
+    metadatas = [{"category": CATEGORIES[row % len(CATEGORIES)], "source": f"{row}.md"} for row in range(len(vectors))]
+    return vectors, ids, texts, metadatas
+
+
+def exact_top_ids(corpus, query, k: int, categories: list = None) -> list:
+    vectors, ids, _, metadatas = corpus
+    rows = [row for row in range(len(ids)) if not categories or metadatas[row]["category"] in categories]
+    scores = normalize_rows(vectors[rows]) @ normalize_rows([query])[0]
+    return [ids[rows[i]] for i in np.argsort(-scores)[:k]]
+
+
+@pytest.mark.parametrize("dtype", DTYPES)
+def test_save_and_load_round_trip(tmp_path, corpus, dtype):
+    index = NumpyVectorIndex.build(*corpus, dtype=dtype, collection="docs")
+    index.save(str(tmp_path))
+    loaded = NumpyVectorIndex.load(str(tmp_path))
+
+    assert loaded.count() == index.count() == 300
+    assert loaded.meta == index.meta
+    assert loaded.meta["dtype"] == dtype
+    assert loaded.meta["collection"] == "docs"
+    assert loaded.ids == index.ids
+    assert loaded.metadatas == index.metadatas
+    assert loaded.quantized == (dtype in ("int8", "binary"))
+    assert isinstance(loaded.vectors, np.memmap)
+    np.testing.assert_array_equal(np.asarray(loaded.vectors), np.asarray(index.vectors))
+    if loaded.quantized:
+        np.testing.assert_array_equal(np.asarray(loaded.codes), np.asarray(index.codes))
+
+
+@pytest.mark.parametrize("dtype", DTYPES)
+def test_search_finds_the_query_vector_first(tmp_path, corpus, dtype):
+    vectors, ids, texts, _ = corpus
+    NumpyVectorIndex.build(*corpus, dtype=dtype).save(str(tmp_path))
+    index = NumpyVectorIndex.load(str(tmp_path))
+
+    results = index.similarity_search_by_vectors_with_scores([vectors[10], vectors[200]], k=3)
+
+    assert [docs[0][0].id for docs in results] == ["chunk-10", "chunk-200"]
+    assert results[0][0][0].page_content == texts[10]
+    assert results[0][0][1] == pytest.approx(1.0, abs=1e-2)
+    for docs in results:
+        scores = [score for _, score in docs]
+        assert scores == sorted(scores, reverse=True)
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16", "int8"])
+def test_search_matches_exact_ranking(corpus, dtype):
+    index = NumpyVectorIndex.build(*corpus, dtype=dtype)
+    query = np.random.default_rng(11).normal(size=64)
+
+    found = [doc.id for doc in index.similarity_search_by_vector(query, k=5)]
+
+    assert found == exact_top_ids(corpus, query, 5)
+
+
+def test_binary_search_recalls_most_exact_neighbours(corpus):
+    index = NumpyVectorIndex.build(*corpus, dtype="binary")
+    query = np.random.default_rng(11).normal(size=64)
+
+    found = [doc.id for doc in index.similarity_search_by_vector(query, k=5)]
+
+    assert len(set(found) & set(exact_top_ids(corpus, query, 5))) >= 4
+
+
+@pytest.mark.parametrize("dtype", DTYPES)
+def test_category_filter_searches_only_those_partitions(corpus, dtype):
+    index = NumpyVectorIndex.build(*corpus, dtype=dtype)
+    query = np.random.default_rng(3).normal(size=64)
+
+    docs = index.similarity_search_by_vector(query, k=10, categories=["home", "life"])
+
+    assert {doc.metadata["category"] for doc in docs} <= {"home", "life"}
+    assert docs[0].id == exact_top_ids(corpus, query, 1, ["home", "life"])[0]
+    assert index.similarity_search_by_vector(query, k=5, categories=["travel"]) == []
+
+
+class FakeCollection:
+    """The part of a Chroma collection that ``from_chroma`` reads."""
+
+    name = "docs-test"
+    metadata = {"embedding_model": "hash", "hnsw:space": "cosine"}
+
+    def __init__(self, vectors, ids, texts, metadatas):
+        self.vectors, self.ids, self.texts, self.metadatas = vectors, ids, texts, metadatas
+        self.pages = 0
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def get(self, limit: int, offset: int, include: list) -> dict:
+        self.pages += 1
+        page = slice(offset, offset + limit)
+        return {
+            "ids": self.ids[page],
+            "embeddings": self.vectors[page],
+            "documents": self.texts[page],
+            "metadatas": self.metadatas[page],
+        }
+
+
+def test_from_chroma_pages_through_the_collection(corpus):
+    collection = FakeCollection(*corpus)
+
+    paged = NumpyVectorIndex.from_chroma(collection, page_size=40)
+    whole = NumpyVectorIndex.build(*corpus, collection="docs-test", embedding_model="hash")
+
+    assert collection.pages == 8
+    assert paged.ids == whole.ids
+    assert paged.meta == whole.meta
+    np.testing.assert_array_equal(paged.vectors, whole.vectors)
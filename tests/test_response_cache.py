@@ -0,0 +1,141 @@
+"""
+TTL, LRU eviction and reload invalidation of the /chat response cache.
+"""
+
+import asyncio
+import importlib
+
+import pytest
+
+from app.cache.response_cache import ResponseCache, normalize_message
+from app.vector_store.vector_store import RetrievalStores
+
+# app.cache re-exports the global instance under the module's name
+response_cache = importlib.import_module("app.cache.response_cache")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(response_cache.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def stores(monkeypatch):
+    """Swap in a retrieval snapshot whose version the test can change."""
+    current = {"stores": RetrievalStores(None, None, {}, "docs@1")}
+    monkeypatch.setattr(response_cache, "get_stores", lambda: current["stores"])
+    return current
+
+
+def make_cache(**kwargs) -> ResponseCache:
+    options = {"enabled": True, "max_size": 3, "ttl": 60, "semantic_enabled": False}
+    options.update(kwargs)
+    return ResponseCache(**options)
+
+
+def lookup(cache: ResponseCache, message: str, use_context: bool = True):
+    entry, _ = asyncio.run(cache.get(message, use_context))
+    return entry.response if entry is not None else None
+
+
+def test_normalize_message():
+    assert normalize_message("  What IS   covered?? ") == "what is covered"
+
+
+def test_exact_hit_ignores_case_spacing_and_punctuation(clock, stores):
+    cache = make_cache()
+    cache.put("What is covered?", True, "Fire and theft.", ["policy.md"])
+
+    assert lookup(cache, "what is   covered") == "Fire and theft."
+    assert lookup(cache, "What is covered?", use_context=False) is None
+    assert cache.metrics["exact_hits"] == 1
+    assert cache.metrics["misses"] == 1
+
+
+def test_entries_expire_after_ttl(clock, stores):
+    cache = make_cache(ttl=60)
+    cache.put("question", True, "answer", [])
+
+    clock.now += 59
+    assert lookup(cache, "question") == "answer"
+    clock.now += 2
+    assert lookup(cache, "question") is None
+    assert cache.metrics["expirations"] == 1
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock, stores):
+    cache = make_cache(max_size=3)
+    for name in ("a", "b", "c"):
+        cache.put(name, True, name.upper(), [])
+    # Reading "a" makes "b" the least recently used entry
+    assert lookup(cache, "a") == "A"
+    cache.put("d", True, "D", [])
+
+    assert lookup(cache, "b") is None
+    assert [lookup(cache, name) for name in ("a", "c", "d")] == ["A", "C", "D"]
+    assert cache.metrics["evictions"] == 1
+
+
+def test_reload_invalidates_cached_responses(clock, stores):
+    cache = make_cache()
+    cache.put("question", True, "old answer", [], index_version="docs@1")
+    assert lookup(cache, "question") == "old answer"
+
+    stores["stores"] = RetrievalStores(None, None, {}, "docs@2")
+
+    assert lookup(cache, "question") is None
+    assert cache.metrics["invalidations"] == 1
+    assert cache.fingerprint == "docs@2"
+
+
+def test_response_from_replaced_snapshot_is_not_stored(clock, stores):
+    cache = make_cache()
+    stores["stores"] = RetrievalStores(None, None, {}, "docs@2")
+
+    cache.put("question", True, "stale answer", [], index_version="docs@1")
+    assert lookup(cache, "question") is None
+    assert cache.metrics["stale_responses"] == 1
+
+    cache.put("question", True, "fresh answer", [], index_version="docs@2")
+    assert lookup(cache, "question") == "fresh answer"
+
+
+def test_semantic_tier_matches_similar_questions(clock, stores, monkeypatch):
+    vectors = {
+        "how do i file a claim": [1.0, 0.0, 0.0],
+        "how can i submit a claim": [0.95, 0.1, 0.0],
+        "what does my policy cost": [0.0, 0.0, 1.0],
+    }
+
+    async def embed(text: str) -> list:
+        return vectors[text]
+
+    monkeypatch.setattr(response_cache.embedding_batcher, "embed", embed)
+    cache = make_cache(semantic_enabled=True, semantic_threshold=0.9)
+
+    entry, query_embedding = asyncio.run(cache.get("how do i file a claim", True))
+    assert entry is None
+    cache.put("how do i file a claim", True, "Use the claims portal.", [], query_embedding=query_embedding)
+
+    assert lookup(cache, "how can i submit a claim") == "Use the claims portal."
+    assert lookup(cache, "what does my policy cost") is None
+    assert cache.metrics["semantic_hits"] == 1
+
+
+def test_disabled_cache_stores_nothing(clock, stores):
+    cache = make_cache(enabled=False)
+    cache.put("question", True, "answer", [])
+
+    assert lookup(cache, "question") is None
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,112 @@
+"""
+Coalescing of identical in-flight chat requests.
+"""
+
+import asyncio
+
+import pytest
+
+from app.cache.single_flight import SingleFlight
+
+
+def test_identical_requests_share_one_run():
+    async def main():
+        single_flight = SingleFlight()
+        release = asyncio.Event()
+        calls = []
+
+        async def produce(flight):
+            calls.append(flight.key)
+            flight.set_sources(["policy.md"])
+            await release.wait()
+            for token in ("Hello", " ", "world"):
+                flight.add_token(token)
+
+        first = single_flight.run("key", produce)
+        second = single_flight.run("key", produce)
+        other = single_flight.run("other", produce)
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(first.result(), second.result(), other.result())
+        return single_flight, first, second, calls, results
+
+    single_flight, first, second, calls, results = asyncio.run(main())
+    assert first is second
+    assert first.waiters == 2
+    assert sorted(calls) == ["key", "other"]
+    assert results[0] == results[1] == ("Hello world", ["policy.md"])
+    assert single_flight.stats() == {"in_flight": 0, "started": 2, "coalesced": 1}
+    assert not single_flight.tasks
+
+
+def test_late_waiter_replays_produced_events():
+    async def main():
+        single_flight = SingleFlight()
+        halfway = asyncio.Event()
+        release = asyncio.Event()
+
+        async def produce(flight):
+            flight.set_sources(["claims.md"])
+            flight.add_token("a")
+            flight.add_token("b")
+            halfway.set()
+            await release.wait()
+            flight.add_token("c")
+
+        single_flight.run("key", produce)
+        await halfway.wait()
+        late = single_flight.run("key", produce)
+        events = []
+
+        async def consume():
+            async for event in late.events():
+                events.append(event)
+
+        consumer = asyncio.create_task(consume())
+        await asyncio.sleep(0)
+        release.set()
+        await consumer
+        return events
+
+    assert asyncio.run(main()) == [("sources", ["claims.md"]), ("token", "a"), ("token", "b"), ("token", "c")]
+
+
+def test_errors_reach_every_waiter_and_clear_the_flight():
+    async def main():
+        single_flight = SingleFlight()
+
+        async def produce(flight):
+            await asyncio.sleep(0)
+            raise RuntimeError("generation failed")
+
+        flights = [single_flight.run("key", produce) for _ in range(3)]
+        outcomes = await asyncio.gather(*(flight.result() for flight in flights), return_exceptions=True)
+        return single_flight, outcomes
+
+    single_flight, outcomes = asyncio.run(main())
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+    assert single_flight.flights == {}
+
+    # A new request after the failure starts a fresh run
+    async def retry():
+        async def produce(flight):
+            flight.add_token("ok")
+
+        return await single_flight.run("key", produce).result()
+
+    assert asyncio.run(retry()) == ("ok", [])
+    assert single_flight.started == 2
+
+
+@pytest.mark.parametrize("waiters", [1, 5])
+def test_flight_without_sources_yields_empty_list(waiters):
+    async def main():
+        single_flight = SingleFlight()
+
+        async def produce(flight):
+            flight.add_token("x")
+
+        flights = [single_flight.run("key", produce) for _ in range(waiters)]
+        return await asyncio.gather(*(flight.result() for flight in flights))
+
+    assert asyncio.run(main()) == [("x", [])] * waiters